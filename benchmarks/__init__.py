@@ -0,0 +1 @@
+""" Module for enabling the benchmarks/ directory to be a package of benchmarks that run against local stand-ins of SPARQL endpoints """
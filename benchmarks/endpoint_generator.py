@@ -0,0 +1,165 @@
+from lodanalysis.mongo_db import DB
+from typing import Any, Dict, Iterator, List
+import itertools
+import math
+import random
+
+class EndpointGenerator:
+    """
+    Class for generating synthetic harvested endpoints with Zipf-distributed classes and properties from a shared vocabulary
+    """
+    NAMESPACES = [
+        'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+        'http://www.w3.org/2000/01/rdf-schema#',
+        'http://www.w3.org/2002/07/owl#',
+        'http://xmlns.com/foaf/0.1/',
+        'http://purl.org/dc/terms/',
+        'http://schema.org/',
+        'http://www.w3.org/2004/02/skos/core#',
+        'http://rdfs.org/ns/void#',
+        'http://dbpedia.org/ontology/',
+        'http://www.wikidata.org/prop/direct/'
+    ]
+    EDITORS = ['Virtuoso', 'Apache Jena Fuseki', 'GraphDB Workbench', 'Blazegraph', '']
+    DOMAINS = ['life_sciences', 'linguistics', 'publications', 'cross_domain', 'government', 'geography', 'media']
+
+    def __init__(
+            self,
+            seed: int = 0,
+            vocabulary_size: int = 20000,
+            fail_share: float = 0.35,
+            duplicate_share: float = 0.05,
+            hosts: int = 500
+        ):
+        """ Builds the vocabulary """
+        # Half of it lives in well-known namespaces, the rest in namespaces of their own hosts
+        self.seed = seed
+        self.fail_share = fail_share
+        self.duplicate_share = duplicate_share
+        self.hosts = hosts
+        self.classes = self.__get_vocabulary('Class', vocabulary_size // 4)
+        self.properties = self.__get_vocabulary('property', vocabulary_size - vocabulary_size // 4)
+        self.class_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.classes) + 1)))
+        self.property_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.properties) + 1)))
+        self.originals: List[Dict[str, Any]] = []
+
+    def get_endpoint(
+            self,
+            access_url: str,
+            domains: List[str] = None
+        ) -> Dict[str, Any]:
+        """ Returns the data that the extractor would harvest from the endpoint """
+        # The same access URL always gives the same data
+        seeded_random = random.Random(f'{self.seed}:{access_url}')
+        endpoint = { DB.ACCESS_URL: access_url }
+
+        if domains != None:
+            endpoint[DB.DOMAINS] = domains
+
+        if seeded_random.random() < self.fail_share:
+            endpoint[DB.STATUS] = DB.STATUS_FAIL
+            endpoint[DB.ERROR_MESSAGE] = seeded_random.choice(['<urlopen error timed out>', 'HTTP Error 503: Service Unavailable', 'EndPointNotFound'])
+            return endpoint
+
+        endpoint[DB.STATUS] = DB.STATUS_OK
+        endpoint[DB.QUERY_EDITOR_NAME] = seeded_random.choice(self.EDITORS)
+        endpoint[DB.QUERY_EDITOR_ADDITIONAL_INFORMATION] = ''
+
+        if len(self.originals) > 0 and seeded_random.random() < self.duplicate_share:
+            # Mirrors return the very same classes and properties as their original
+            original = seeded_random.choice(self.originals)
+            endpoint.update({field: original[field] for field in original if field not in endpoint})
+            return endpoint
+
+        triples = int(10 ** seeded_random.uniform(2, 9))
+        used_classes = self.__get_instances(seeded_random, self.classes, self.class_weights, triples // 4)
+        used_properties = self.__get_instances(seeded_random, self.properties, self.property_weights, triples)
+        instances = sum(instance[DB.INSTANCE_AMOUNT] for instance in used_classes)
+        unique_subjects = max(triples // seeded_random.randint(2, 20), 1)
+
+        endpoint.update({
+            # Some endpoints only answer the capped fallback queries
+            DB.TRIPLES_AMOUNT: triples if seeded_random.random() > 0.1 else 10000,
+            DB.USED_CLASSES: used_classes,
+            DB.CLASSES_AMOUNT: len(used_classes),
+            DB.INSTANCES_AMOUNT: instances,
+            DB.USED_PROPERTIES: used_properties,
+            DB.USED_PROPERTIES_AMOUNT: len(used_properties),
+            DB.PROPERTIES_AMOUNT: max(triples - instances, -1),
+            DB.UNIQUE_SUBJECTS_AMOUNT: unique_subjects,
+            DB.AVERAGE_UNIQUE_SUBJECTS_AMOUNT: triples // unique_subjects
+        })
+
+        if len(self.originals) < 1000:
+            self.originals.append({
+                field: endpoint[field]
+                for field in endpoint
+                if field not in [DB.ACCESS_URL, DB.DOMAINS, DB.STATUS]
+            })
+
+        return endpoint
+
+    def generate(
+            self,
+            amount: int
+        ) -> Iterator[Dict[str, Any]]:
+        """ Yields endpoints as stored by generate, spread over the hosts and domains """
+        for index in range(amount):
+            access_url = f'http://host{index % self.hosts}.example.org/{index}/sparql'
+            domains = [self.DOMAINS[index % len(self.DOMAINS)]]
+
+            if index % 20 == 0:
+                domains.append(self.DOMAINS[(index // 20) % len(self.DOMAINS)])
+
+            endpoint = self.get_endpoint(access_url, list(dict.fromkeys(domains)))
+            endpoint[DB.NAMES] = [{ DB.DATASET_CODE: f'dataset-{index}', DB.DOMAIN: domains[0] }]
+            endpoint[DB.SPARQL] = True
+
+            yield endpoint
+
+    def load(
+            self,
+            db: DB,
+            amount: int,
+            batch_size: int = 1000,
+            workers: int = 4
+        ) -> Dict[str, int]:
+        """ Loads the amount of endpoints into the endpoint collection with the bulk import """
+        return db.import_endpoints(self.generate(amount), batch_size=batch_size, workers=workers)
+
+    def __get_vocabulary(
+            self,
+            kind: str,
+            size: int
+        ) -> List[str]:
+        vocabulary = []
+
+        for index in range(size):
+            if index % 2 == 0:
+                namespace = self.NAMESPACES[(index // 2) % len(self.NAMESPACES)]
+            else:
+                namespace = f'http://vocab{index % 97}.example.org/ontology/'
+
+            vocabulary.append(f'{namespace}{kind}{index}')
+
+        return vocabulary
+
+    def __get_instances(
+            self,
+            seeded_random: random.Random,
+            vocabulary: List[str],
+            weights: List[float],
+            total: int
+        ) -> List[Dict[str, Any]]:
+        """ Draws a log-uniform amount of distinct IRIs by popularity and spreads the total over them, the most used first """
+        amount = min(int(10 ** seeded_random.uniform(0, math.log10(len(vocabulary)) - 0.5)), len(vocabulary))
+        names = list(dict.fromkeys(seeded_random.choices(vocabulary, cum_weights=weights, k=amount)))
+        shares = [seeded_random.paretovariate(1.2) for _ in names]
+        shares_sum = sum(shares)
+
+        instances = [
+            { DB.INSTANCE_NAME: name, DB.INSTANCE_AMOUNT: max(int(total * share / shares_sum), 1) }
+            for name, share in zip(names, shares)
+        ]
+
+        return sorted(instances, key=lambda instance: instance[DB.INSTANCE_AMOUNT], reverse=True)
@@ -0,0 +1,90 @@
+from lodanalysis.config import Config
+from typing import Any, Dict
+import json
+import os
+import tempfile
+
+class BenchmarkEnvironment:
+    """
+    Class for pointing the application at a separate benchmark database and raw data file for the duration of a benchmark
+    """
+    def __init__(
+            self,
+            database: str = 'lod_benchmark',
+            keep_database: bool = False
+        ):
+        """ Overrides the configuration before the first database connection is opened """
+        self.config = Config()
+        self.database = database
+        self.keep_database = keep_database
+        self.directory = tempfile.TemporaryDirectory(prefix='lodanalysis-benchmark-')
+
+        for section in [Config.DATABASE_SECTION_CONFIG, Config.FILES_SECTION_CONFIG]:
+            if not self.config.config_parser.has_section(section):
+                self.config.config_parser.add_section(section)
+
+        database_config = self.config.config_parser[Config.DATABASE_SECTION_CONFIG]
+        database_config.setdefault('host', 'localhost')
+        database_config.setdefault('port', '27017')
+        database_config.setdefault('endpoint_collection', 'endpoint')
+
+        # The parsed configs are shared by the whole process, so the configured values are put back on exit
+        self.configured_database = database_config.get('name')
+        self.configured_raw_data = self.config.config_parser[Config.FILES_SECTION_CONFIG].get('raw_data')
+
+        if database == self.configured_database:
+            raise ValueError('The benchmark database has to differ from the configured database, it is dropped afterwards')
+
+        database_config['name'] = database
+
+    def __enter__(self) -> 'BenchmarkEnvironment':
+        self.drop_database()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        from lodanalysis.mongo_db import DB
+
+        if self.keep_database:
+            DB().flush()
+            DB.reset_connection()
+        else:
+            self.drop_database()
+
+        self.directory.cleanup()
+        self.__restore(Config.DATABASE_SECTION_CONFIG, 'name', self.configured_database)
+        self.__restore(Config.FILES_SECTION_CONFIG, 'raw_data', self.configured_raw_data)
+
+    def write_raw_data(
+            self,
+            lod_cloud: Dict[str, Any]
+        ) -> str:
+        """ Writes the LOD Cloud JSON and configures it as the raw data file that generate reads """
+        raw_data = os.path.join(self.directory.name, 'lod-cloud-raw')
+
+        with open(raw_data + '.json', 'w') as file:
+            json.dump(lod_cloud, file)
+
+        self.config.config_parser[Config.FILES_SECTION_CONFIG]['raw_data'] = raw_data
+
+        return raw_data + '.json'
+
+    def drop_database(self) -> None:
+        """ Drops the benchmark database, writing the buffered operations first """
+        from lodanalysis.mongo_db import DB
+        db = DB()
+
+        db.flush()
+        db.db.client.drop_database(self.database)
+        DB.reset_connection()
+
+    def __restore(
+            self,
+            section: str,
+            config_name: str,
+            value: str
+        ) -> None:
+        if value == None:
+            self.config.config_parser.remove_option(section, config_name)
+        else:
+            self.config.config_parser[section][config_name] = value
@@ -0,0 +1,278 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import urlparse, parse_qs
+import json
+import random
+import re
+import threading
+import time
+
+class FakeEndpoint:
+    """
+    Synthetic dataset with the network behaviour and the query engine personality of one SPARQL endpoint
+    """
+    PERSONALITY_VIRTUOSO = 'virtuoso'
+    PERSONALITY_GENERIC = 'generic'
+    PERSONALITY_NO_COUNT = 'no-count'
+    PERSONALITIES = [PERSONALITY_VIRTUOSO, PERSONALITY_GENERIC, PERSONALITY_NO_COUNT]
+
+    NAMESPACES = [
+        'http://xmlns.com/foaf/0.1/',
+        'http://purl.org/dc/terms/',
+        'http://schema.org/',
+        'http://www.w3.org/2004/02/skos/core#',
+        'http://dbpedia.org/ontology/'
+    ]
+
+    def __init__(
+            self,
+            name: str,
+            triples: int = 10000,
+            classes: int = 50,
+            properties: int = 100,
+            personality: str = PERSONALITY_VIRTUOSO,
+            latency: float = 0.0,
+            timeout_rate: float = 0.0,
+            error_rate: float = 0.0,
+            query_timeout: float = 1.0,
+            max_rows: int = 10000,
+            seed: int = 0
+        ):
+        """ Builds a dataset whose class and property amounts follow a power law """
+        # latency is the delay of every response in seconds
+        if personality not in self.PERSONALITIES:
+            raise ValueError(f'The personality has to be one of: {", ".join(self.PERSONALITIES)}')
+
+        self.name = name
+        self.triples = triples
+        self.personality = personality
+        self.latency = latency
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.query_timeout = query_timeout
+        self.max_rows = max_rows
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.classes = self.__get_instances('Class', classes, triples // 4)
+        self.properties = self.__get_instances('property', properties, triples)
+        self.instances = sum(amount for _, amount in self.classes)
+        self.subjects = max(triples // 8, 1)
+
+    def __get_instances(
+            self,
+            kind: str,
+            amount: int,
+            total: int
+        ) -> List[tuple]:
+        """ Spreads the total over the IRIs by a Zipf distribution, the most used first """
+        weights = [1 / rank for rank in range(1, amount + 1)]
+        weights_sum = sum(weights)
+        instances = []
+
+        for index, weight in enumerate(weights):
+            namespace = self.NAMESPACES[self.random.randrange(len(self.NAMESPACES))]
+            instances.append((f'{namespace}{kind}{index}', max(int(total * weight / weights_sum), 1)))
+
+        return instances
+
+    def get_delay(self) -> float:
+        with self.lock:
+            return self.latency * (0.5 + self.random.random())
+
+    def get_failure(self) -> str:
+        """ Draws whether the next query times out, fails or succeeds """
+        with self.lock:
+            draw = self.random.random()
+
+        if draw < self.timeout_rate:
+            return 'timeout'
+
+        if draw < self.timeout_rate + self.error_rate:
+            return 'error'
+
+        return None
+
+    def get_editor_page(self) -> tuple:
+        """ Returns the status and HTML of the query editor page that is served without a query """
+        if self.personality == self.PERSONALITY_VIRTUOSO:
+            return 200, (
+                '<html><head><title>OpenLink Virtuoso SPARQL Query Editor</title></head><body>'
+                f'<input id="timeout" max="{int(self.query_timeout * 1000)}"/>'
+                '<div id="footer">Copyright (C) OpenLink Software Virtuoso version 07.20.3235</div>'
+                '</body></html>'
+            )
+
+        if self.personality == self.PERSONALITY_GENERIC:
+            return 200, '<html><head><title>SPARQL Endpoint</title></head><body></body></html>'
+
+        return 404, 'Not found'
+
+    def answer(
+            self,
+            query: str
+        ) -> tuple:
+        """ Returns the HTTP status and body of the query, recognizing the queries that the extractor sends """
+        normalized_query = ' '.join(query.split())
+        is_aggregate = 'COUNT' in normalized_query or 'GROUP BY' in normalized_query
+
+        if is_aggregate and self.personality == self.PERSONALITY_NO_COUNT:
+            return 400, 'Virtuoso 37000 Error SP030: SPARQL compiler: aggregates are not supported'
+
+        limit = re.search(r'LIMIT (\d+)', normalized_query)
+        limit = min(int(limit.group(1)), self.max_rows) if limit != None else self.max_rows
+
+        if 'GROUP BY ?class' in normalized_query:
+            return self.__get_bindings([{ 'class': name, 'classAmount': amount } for name, amount in self.classes[:limit]])
+
+        if 'GROUP BY ?property' in normalized_query:
+            return self.__get_bindings([{ 'property': name, 'propAmount': amount } for name, amount in self.properties[:limit]])
+
+        if 'DISTINCT ?class' in normalized_query:
+            return self.__get_bindings([{ 'class': name, 'classAmount': 0 } for name, _ in self.classes[:limit]])
+
+        if 'DISTINCT ?property' in normalized_query:
+            return self.__get_bindings([{ 'property': name, 'propAmount': 0 } for name, _ in self.properties[:limit]])
+
+        if 'instanceAmount' in normalized_query:
+            return self.__get_bindings([{ 'instanceAmount': self.instances }])
+
+        if 'subjectsAmount' in normalized_query:
+            return self.__get_bindings([{ 'subjectsAmount': self.subjects }])
+
+        if 'COUNT(?s)' in normalized_query:
+            # Like most stores, the count of an unnamed projection comes back under a generated variable name
+            return self.__get_bindings([{ 'callret-0': self.triples }])
+
+        if 'SELECT ?type' in normalized_query:
+            return self.__get_bindings([{ 'type': self.classes[index % len(self.classes)][0] } for index in range(min(self.instances, limit))])
+
+        if 'DISTINCT ?s' in normalized_query:
+            return self.__get_bindings([{ 's': f'http://example.org/{self.name}/{index}' } for index in range(min(self.subjects, limit))])
+
+        if 'SELECT' in normalized_query:
+            rows = min(self.triples, limit)
+            return self.__get_bindings([{ 's': f'http://example.org/{self.name}/{index}' } for index in range(rows)])
+
+        return 400, 'Virtuoso 37000 Error SP030: SPARQL compiler: syntax error'
+
+    def __get_bindings(
+            self,
+            rows: List[Dict[str, Any]]
+        ) -> tuple:
+        bindings = [
+            {
+                variable: { 'type': 'uri' if isinstance(value, str) else 'literal', 'value': str(value) }
+                for variable, value in row.items()
+            }
+            for row in rows
+        ]
+
+        return 200, json.dumps({
+            'head': { 'vars': list(rows[0]) if len(rows) > 0 else [] },
+            'results': { 'bindings': bindings }
+        })
+
+class FakeSPARQLServer:
+    """
+    Local HTTP server that serves many fake SPARQL endpoints under /<name>/sparql
+    """
+    JSON_CONTENT_TYPE = 'application/sparql-results+json'
+
+    def __init__(
+            self,
+            endpoints: List[FakeEndpoint],
+            host: str = '127.0.0.1',
+            port: int = 0
+        ):
+        """ Sets up the server on the port, 0 for a free one """
+        self.endpoints = {endpoint.name: endpoint for endpoint in endpoints}
+        self.server = ThreadingHTTPServer((host, port), self.__get_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    def start(self) -> 'FakeSPARQLServer':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'FakeSPARQLServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_access_url(
+            self,
+            name: str
+        ) -> str:
+        host, port = self.server.server_address[:2]
+
+        return f'http://{host}:{port}/{name}/sparql'
+
+    def get_access_urls(self) -> List[str]:
+        return [self.get_access_url(name) for name in self.endpoints]
+
+    def __get_handler(self) -> Any:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                self.__answer(url.path, parse_qs(url.query).get('query', [None])[0])
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+                self.__answer(urlparse(self.path).path, parse_qs(body).get('query', [None])[0])
+
+            def __answer(
+                    self,
+                    path: str,
+                    query: str
+                ) -> None:
+                endpoint = server.endpoints.get(path.strip('/').split('/')[0])
+
+                if endpoint == None:
+                    return self.__send(404, 'text/plain', 'Unknown endpoint')
+
+                time.sleep(endpoint.get_delay())
+
+                if query == None:
+                    status, page = endpoint.get_editor_page()
+                    return self.__send(status, 'text/html', page)
+
+                failure = endpoint.get_failure()
+                if failure == 'timeout':
+                    time.sleep(endpoint.query_timeout)
+                    return self.__send(500, 'text/plain', 'Virtuoso S1T00 Error SR171: Transaction timed out')
+
+                if failure == 'error':
+                    return self.__send(503, 'text/plain', 'Service Unavailable')
+
+                status, body = endpoint.answer(query)
+                self.__send(status, server.JSON_CONTENT_TYPE if status == 200 else 'text/plain', body)
+
+            def __send(
+                    self,
+                    status: int,
+                    content_type: str,
+                    body: str
+                ) -> None:
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
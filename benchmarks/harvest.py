@@ -0,0 +1,148 @@
+""" Benchmarks the harvest of many local fake SPARQL endpoints: python3 -m benchmarks.harvest --help """
+
+from benchmarks.fake_sparql_server import FakeEndpoint, FakeSPARQLServer
+from benchmarks.measurement import Measurement
+from typing import Any, Dict, List
+import contextlib
+import io
+import json
+import random
+import typer
+
+app = typer.Typer()
+
+def build_endpoints(
+        amount: int,
+        triples: int,
+        personalities: List[str],
+        latency: float,
+        timeout_rate: float,
+        error_rate: float,
+        query_timeout: float,
+        seed: int
+    ) -> List[FakeEndpoint]:
+    """ Returns endpoints with log-normally spread dataset sizes and the personalities in turn """
+    seeded_random = random.Random(seed)
+    endpoints = []
+
+    for index in range(amount):
+        endpoint_triples = max(int(triples * seeded_random.lognormvariate(0, 1)), 100)
+        endpoints.append(FakeEndpoint(
+            f'endpoint{index}',
+            triples=endpoint_triples,
+            classes=max(endpoint_triples // 200, 5),
+            properties=max(endpoint_triples // 100, 10),
+            personality=personalities[index % len(personalities)],
+            latency=latency,
+            timeout_rate=timeout_rate,
+            error_rate=error_rate,
+            query_timeout=query_timeout,
+            seed=seed + index
+        ))
+
+    return endpoints
+
+def get_lod_cloud(access_urls: List[str]) -> Dict[str, Any]:
+    """ Returns a minimal LOD Cloud JSON with one dataset per endpoint """
+    return {
+        f'dataset{index}': {
+            'identifier': f'dataset{index}',
+            'title': f'Dataset {index}',
+            'domain': ['cross_domain', 'life_sciences', 'government', 'publications'][index % 4],
+            'sparql': [{ 'access_url': access_url, 'title': 'SPARQL endpoint' }],
+            'other_download': []
+        }
+        for index, access_url in enumerate(access_urls)
+    }
+
+def benchmark_extract_data(
+        access_urls: List[str],
+        trace_memory: bool
+    ) -> Dict[str, Any]:
+    """ Runs SPARQLDataExtractor.extract_data on every endpoint without storing anything """
+    from lodanalysis.sparql_data_extractor import SPARQLDataExtractor
+    data_extractor = SPARQLDataExtractor()
+
+    with Measurement('extract_data', trace_memory, 'endpoints') as measurement:
+        for access_url in access_urls:
+            measurement.time(data_extractor.extract_data, access_url, save_endpoint=False)
+
+    return measurement.get_report()
+
+def benchmark_generate(
+        access_urls: List[str],
+        trace_memory: bool,
+        database: str,
+        keep_database: bool
+    ) -> Dict[str, Any]:
+    """ Runs the generate pipeline (LODCloud.process_data) against the endpoints with a separate benchmark database """
+    from benchmarks.environment import BenchmarkEnvironment
+    from lodanalysis.lod_cloud import LODCloud
+
+    with BenchmarkEnvironment(database, keep_database) as environment:
+        environment.write_raw_data(get_lod_cloud(access_urls))
+        lod_cloud = LODCloud()
+
+        with Measurement('generate', trace_memory, 'endpoints') as measurement:
+            extract_data = lod_cloud.data_extractor.extract_data
+            lod_cloud.data_extractor.extract_data = lambda *args, **kwargs: measurement.time(extract_data, *args, **kwargs)
+            lod_cloud.process_data(include_base_queries=True, queries_directory='')
+
+        return measurement.get_report()
+
+@app.command()
+def main(
+    endpoints_amount: int = typer.Option(100, '--endpoints', '-n', help='Amount of fake endpoints'),
+    triples: int = typer.Option(5000, '--triples', help='Median amount of triples per endpoint'),
+    personalities: str = typer.Option(
+        ','.join(FakeEndpoint.PERSONALITIES),
+        '--personalities',
+        help=f'Comma separated engine personalities assigned in turn: {", ".join(FakeEndpoint.PERSONALITIES)}'
+    ),
+    latency: float = typer.Option(0.005, '--latency', help='Mean response delay in seconds'),
+    timeout_rate: float = typer.Option(0.02, '--timeout-rate', help='Share of queries that time out on the server'),
+    error_rate: float = typer.Option(0.02, '--error-rate', help='Share of queries that fail with 503'),
+    query_timeout: float = typer.Option(0.2, '--query-timeout', help='Seconds until a timing out query fails'),
+    seed: int = typer.Option(0, '--seed'),
+    generate: bool = typer.Option(False, '--generate/--no-generate', help='Also benchmark generate, which needs a running MongoDB'),
+    database: str = typer.Option('lod_benchmark', '--database', help='Database that generate writes to and that is dropped afterwards'),
+    keep_database: bool = typer.Option(False, '--keep-database', help='Keep the benchmark database for inspection'),
+    trace_memory: bool = typer.Option(False, '--trace-memory', help='Trace the peak Python allocations of each phase (slower)'),
+    output_file: str = typer.Option('', '--output-file', '-o', help='JSON file to write the reports to')
+) -> None:
+    """ Reports endpoints per second, per-endpoint latency percentiles and peak memory of harvesting fake endpoints """
+    try:
+        endpoints = build_endpoints(
+            endpoints_amount,
+            triples,
+            [personality.strip() for personality in personalities.split(',')],
+            latency,
+            timeout_rate,
+            error_rate,
+            query_timeout,
+            seed
+        )
+    except ValueError as e:
+        print(e)
+        return
+
+    reports = []
+
+    with FakeSPARQLServer(endpoints) as server:
+        access_urls = server.get_access_urls()
+
+        # The extractor reports every phase on stdout
+        with contextlib.redirect_stdout(io.StringIO()):
+            reports.append(benchmark_extract_data(access_urls, trace_memory))
+
+            if generate == True:
+                reports.append(benchmark_generate(access_urls, trace_memory, database, keep_database))
+
+    Measurement.print_reports(reports)
+
+    if output_file != '':
+        with open(output_file, 'w') as file:
+            json.dump(reports, file, indent=4)
+
+if __name__ == '__main__':
+    app()
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List
+import itertools
+import json
+import random
+
+class LODCloudGenerator:
+    """
+    Class for generating a synthetic LOD Cloud JSON with the structure of lod-data.json at any scale
+    """
+    # The domains of the LOD Cloud weighted by their approximate amount of datasets
+    DOMAINS = {
+        'life_sciences': 0.24,
+        'linguistics': 0.21,
+        'publications': 0.12,
+        'cross_domain': 0.11,
+        'government': 0.1,
+        'social_networking': 0.08,
+        'geography': 0.06,
+        'media': 0.05,
+        'user_generated': 0.03
+    }
+    WORDS = [
+        'bio', 'gene', 'lex', 'word', 'lib', 'open', 'gov', 'stat', 'geo', 'map', 'news', 'film',
+        'music', 'people', 'wiki', 'data', 'link', 'cat', 'onto', 'sci', 'art', 'hist', 'law', 'city'
+    ]
+
+    def __init__(
+            self,
+            datasets: int = 1500,
+            seed: int = 0,
+            hosts_share: float = 0.5,
+            sparql_share: float = 0.55,
+            shared_endpoint_share: float = 0.05,
+            void_share: float = 0.3,
+            sparql_download_share: float = 0.1
+        ):
+        """ Sets up the generator """
+        # The shares are the probabilities of a dataset having the respective feature
+        self.datasets = datasets
+        self.seed = seed
+        self.hosts_share = hosts_share
+        self.sparql_share = sparql_share
+        self.shared_endpoint_share = shared_endpoint_share
+        self.void_share = void_share
+        self.sparql_download_share = sparql_download_share
+
+    def generate(self) -> Dict[str, Any]:
+        """ Returns the datasets keyed by identifier """
+        # A few large hosts serve many datasets, like the real aggregators
+        seeded_random = random.Random(self.seed)
+        hosts = [
+            f'{self.WORDS[index % len(self.WORDS)]}{index}.example.org'
+            for index in range(max(int(self.datasets * self.hosts_share), 1))
+        ]
+        host_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(hosts) + 1)))
+        domains = list(self.DOMAINS)
+        domain_weights = list(itertools.accumulate(self.DOMAINS.values()))
+        identifiers = []
+        access_urls = []
+        lod_cloud = {}
+
+        for index in range(self.datasets):
+            identifier = f'{seeded_random.choice(self.WORDS)}-{seeded_random.choice(self.WORDS)}-{index}'
+            host = seeded_random.choices(hosts, cum_weights=host_weights)[0]
+            domain = seeded_random.choices(domains, cum_weights=domain_weights)[0]
+            sparql = []
+
+            if seeded_random.random() < self.sparql_share:
+                if len(access_urls) > 0 and seeded_random.random() < self.shared_endpoint_share:
+                    # Several datasets list the endpoint of their aggregator
+                    access_url = seeded_random.choice(access_urls)
+                else:
+                    access_url = f'http://{host}/{identifier}/sparql'
+                    access_urls.append(access_url)
+
+                sparql.append({
+                    'access_url': access_url,
+                    'title': 'SPARQL endpoint',
+                    'description': f'SPARQL endpoint of {identifier}',
+                    'status': seeded_random.choice(['OK', 'OK', 'OK', 'FAIL'])
+                })
+
+            lod_cloud[identifier] = {
+                '_id': identifier,
+                'identifier': identifier,
+                'title': identifier.replace('-', ' ').title(),
+                'description': { 'en': f'Synthetic {domain.replace("_", " ")} dataset {index}' },
+                'domain': domain,
+                'keywords': seeded_random.sample(self.WORDS, 3),
+                'triples': str(int(10 ** seeded_random.uniform(3, 9))),
+                'website': f'http://{host}/{identifier}',
+                'namespace': f'http://{host}/{identifier}/resource/',
+                'links': [
+                    { 'target': seeded_random.choice(identifiers), 'value': str(seeded_random.randint(1, 100000)) }
+                    for _ in range(min(len(identifiers), seeded_random.randint(0, 5)))
+                ],
+                'sparql': sparql,
+                'other_download': self.__get_downloads(seeded_random, host, identifier),
+                'full_download': [
+                    {
+                        'access_url': f'http://{host}/{identifier}/dump.nt.gz',
+                        'title': 'Data dump',
+                        'description': 'N-Triples dump',
+                        'media_type': 'application/n-triples'
+                    }
+                ]
+            }
+            identifiers.append(identifier)
+
+        return lod_cloud
+
+    def write(
+            self,
+            path: str
+        ) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.generate(), file)
+
+    def __get_downloads(
+            self,
+            seeded_random: random.Random,
+            host: str,
+            identifier: str
+        ) -> List[Dict[str, Any]]:
+        """ Returns the other downloads: VoID descriptions and SPARQL endpoints that are only listed as downloads """
+        downloads = [
+            {
+                'access_url': f'http://{host}/{identifier}/data.rdf',
+                'title': 'RDF/XML',
+                'description': 'Dataset in RDF/XML',
+                'media_type': 'application/rdf+xml'
+            }
+        ]
+
+        if seeded_random.random() < self.void_share:
+            downloads.append({
+                'access_url': f'http://{host}/{identifier}/.well-known/void',
+                'title': 'VoID description',
+                'description': 'void',
+                'media_type': 'text/turtle'
+            })
+
+        if seeded_random.random() < self.sparql_download_share:
+            downloads.append({
+                'access_url': f'http://{host}/{identifier}/query',
+                'title': 'sparql',
+                'description': 'sparql query interface',
+                'media_type': 'api/sparql'
+            })
+
+        return downloads
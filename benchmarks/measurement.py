@@ -0,0 +1,131 @@
+from typing import Any, Callable, Dict, List
+import gc
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class Measurement:
+    """
+    Class for timing a benchmark phase: throughput, per-item latency percentiles and peak memory
+    """
+    PERCENTILES = [0.5, 0.9, 0.99]
+
+    def __init__(
+            self,
+            name: str,
+            trace_memory: bool = False,
+            unit: str = 'items'
+        ):
+        """ Sets up an empty measurement of items of the unit """
+        # Tracing the Python allocations gives the phase's own peak but slows it down
+        self.name = name
+        self.unit = unit
+        self.trace_memory = trace_memory
+        self.latencies: List[float] = []
+        self.items = None
+        self.started = None
+        self.duration = 0.0
+        self.peak_allocated = None
+
+    def __enter__(self) -> 'Measurement':
+        gc.collect()
+
+        if self.trace_memory:
+            tracemalloc.start()
+
+        self.started = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.duration = time.perf_counter() - self.started
+
+        if self.trace_memory:
+            self.peak_allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def time(
+            self,
+            call: Callable[..., Any],
+            *args,
+            **kwargs
+        ) -> Any:
+        """ Calls the function and records its latency as one item """
+        started = time.perf_counter()
+
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    def set_items(
+            self,
+            items: int
+        ) -> None:
+        """ Sets the amount of items that a phase without per-item timings has processed """
+        self.items = items
+
+    def add_latency(
+            self,
+            latency: float
+        ) -> None:
+        self.latencies.append(latency)
+
+    def get_percentile(
+            self,
+            percentile: float
+        ) -> float:
+        """ Returns the nearest-rank percentile of the latencies in seconds """
+        if len(self.latencies) == 0:
+            return None
+
+        latencies = sorted(self.latencies)
+
+        return latencies[min(int(round(percentile * (len(latencies) - 1))), len(latencies) - 1)]
+
+    def get_report(self) -> Dict[str, Any]:
+        """ Returns the throughput, the latency percentiles in milliseconds and the peak memory in MiB """
+        items = self.items if self.items != None else len(self.latencies)
+        report = {
+            'name': self.name,
+            self.unit: items,
+            'duration_s': round(self.duration, 3),
+            f'{self.unit}_per_second': round(items / self.duration, 2) if self.duration > 0 else None
+        }
+
+        for percentile in self.PERCENTILES:
+            latency = self.get_percentile(percentile)
+            report[f'p{int(percentile * 100)}_ms'] = round(latency * 1000, 1) if latency != None else None
+
+        if self.peak_allocated != None:
+            report['peak_allocated_mib'] = round(self.peak_allocated / 2 ** 20, 1)
+
+        report['peak_rss_mib'] = self.get_peak_rss()
+
+        return report
+
+    @staticmethod
+    def get_peak_rss() -> float:
+        """ Returns the peak resident memory of the process in MiB """
+        # The peak never decreases, so it bounds every phase run so far
+        if resource == None:
+            return None
+
+        # ru_maxrss is in KiB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    @staticmethod
+    def print_reports(reports: List[Dict[str, Any]]) -> None:
+        """ Prints the reports as an aligned table """
+        columns = list(dict.fromkeys(column for report in reports for column in report))
+        rows = [[str(report.get(column, '')) for column in columns] for report in reports]
+        widths = [max(len(column), *[len(row[index]) for row in rows]) for index, column in enumerate(columns)]
+
+        print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+
+        for row in rows:
+            print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,183 @@
+""" Benchmarks parsing, harvest planning and analytics at multiples of the LOD Cloud's size: python3 -m benchmarks.scaling --help """
+
+from benchmarks.endpoint_generator import EndpointGenerator
+from benchmarks.lod_cloud_generator import LODCloudGenerator
+from benchmarks.measurement import Measurement
+from typing import Any, Dict, List
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import tempfile
+import typer
+
+app = typer.Typer()
+
+PHASE_PARSE = 'parse'
+PHASE_PLANNING = 'planning'
+PHASE_ANALYTICS = 'analytics'
+PHASES = [PHASE_PARSE, PHASE_PLANNING, PHASE_ANALYTICS]
+
+def benchmark_parse(
+        lod_cloud_generator: LODCloudGenerator,
+        scale: int,
+        trace_memory: bool
+    ) -> List[Dict[str, Any]]:
+    """ Measures generating, writing and loading the LOD Cloud JSON """
+    reports = []
+
+    with tempfile.TemporaryDirectory(prefix='lodanalysis-benchmark-') as directory:
+        path = os.path.join(directory, 'lod-cloud-raw.json')
+
+        with Measurement(f'generate_json x{scale}', trace_memory, 'datasets') as measurement:
+            lod_cloud_generator.write(path)
+            measurement.set_items(lod_cloud_generator.datasets)
+
+        reports.append(measurement.get_report())
+
+        with Measurement(f'parse x{scale}', trace_memory, 'datasets') as measurement:
+            with open(path) as file:
+                measurement.set_items(len(json.load(file)))
+
+        report = measurement.get_report()
+        report['size_mib'] = round(os.path.getsize(path) / 2 ** 20, 1)
+        reports.append(report)
+
+    return reports
+
+def benchmark_planning(
+        lod_cloud_generator: LODCloudGenerator,
+        scale: int,
+        trace_memory: bool,
+        database: str,
+        keep_database: bool
+    ) -> List[Dict[str, Any]]:
+    """ Runs LODCloud.process_data with an extractor that answers instantly, which leaves the parsing, lookups, duplicate detection and writes """
+    from benchmarks.environment import BenchmarkEnvironment
+    from lodanalysis.lod_cloud import LODCloud
+    from lodanalysis.mongo_db import DB
+
+    endpoint_generator = EndpointGenerator(seed=lod_cloud_generator.seed)
+
+    with BenchmarkEnvironment(database, keep_database) as environment:
+        environment.write_raw_data(lod_cloud_generator.generate())
+        lod_cloud = LODCloud()
+        lod_cloud.data_extractor.extract_data = lambda access_url, **kwargs: endpoint_generator.get_endpoint(access_url)
+
+        with Measurement(f'planning x{scale}', trace_memory, 'datasets') as measurement:
+            lod_cloud.process_data(include_base_queries=True, queries_directory='')
+            measurement.set_items(lod_cloud_generator.datasets)
+
+        report = measurement.get_report()
+        report['endpoints'] = DB().endpoints.estimated_document_count()
+
+        return [report]
+
+def benchmark_analytics(
+        endpoints_amount: int,
+        scale: int,
+        seed: int,
+        trace_memory: bool,
+        database: str,
+        keep_database: bool
+    ) -> List[Dict[str, Any]]:
+    """ Loads a synthetic endpoint collection and measures the statistics, totals, top, rollup and duplicate lookups over it """
+    from benchmarks.environment import BenchmarkEnvironment
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.vocabulary_rollup import VocabularyRollup
+
+    endpoint_generator = EndpointGenerator(seed=seed)
+    reports = []
+
+    with BenchmarkEnvironment(database, keep_database):
+        db = DB()
+
+        with Measurement(f'load x{scale}', trace_memory, 'endpoints') as measurement:
+            counts = endpoint_generator.load(db, endpoints_amount)
+            measurement.set_items(counts['inserted'])
+
+        reports.append(measurement.get_report())
+
+        def roll_up_vocabularies() -> None:
+            vocabulary_rollup = VocabularyRollup()
+
+            for endpoint in db.get_encoded_instances():
+                vocabulary_rollup.add(db.decode_endpoint(endpoint))
+
+            vocabulary_rollup.get_rollup_by_domain()
+
+        analytics = {
+            'rebuild_statistics': db.rebuild_statistics,
+            'get_statistics': lambda: db.get_statistics(True),
+            'get_totals': lambda: db.get_endpoint_collection_totals_by_domain(),
+            'top_classes': lambda: db.get_most_used_instances_by_domain(DB.USED_CLASSES, 50),
+            'top_properties': lambda: db.get_most_used_instances_by_domain(DB.USED_PROPERTIES, 50),
+            'vocabularies': roll_up_vocabularies
+        }
+
+        # The analytics need the optional numpy module
+        if importlib.util.find_spec('numpy') != None:
+            from lodanalysis.endpoint_analytics import EndpointAnalytics
+            analytics['analyze'] = lambda: EndpointAnalytics().load(db.get_endpoint_collection_totals(include_domains=True))
+
+        for name, analytic in analytics.items():
+            with Measurement(f'{name} x{scale}', trace_memory, 'endpoints') as measurement:
+                analytic()
+                measurement.set_items(endpoints_amount)
+
+            reports.append(measurement.get_report())
+
+        with Measurement(f'get_duplicate x{scale}', trace_memory, 'endpoints') as measurement:
+            for endpoint in itertools.islice(endpoint_generator.generate(endpoints_amount), 1000):
+                measurement.time(db.get_duplicate, endpoint)
+
+        reports.append(measurement.get_report())
+
+    return reports
+
+@app.command()
+def main(
+    scales: str = typer.Option('1,10', '--scales', help='Comma separated multiples of the base sizes'),
+    datasets: int = typer.Option(1500, '--datasets', help='Datasets of the LOD Cloud JSON at scale 1'),
+    endpoints_amount: int = typer.Option(1000, '--endpoints', '-n', help='Endpoints of the analytics collection at scale 1'),
+    phases: str = typer.Option(','.join(PHASES), '--phases', help=f'Comma separated phases: {", ".join(PHASES)}'),
+    seed: int = typer.Option(0, '--seed'),
+    database: str = typer.Option('lod_benchmark', '--database', help='Database that the benchmarks write to and that is dropped afterwards'),
+    keep_database: bool = typer.Option(False, '--keep-database', help='Keep the benchmark database of the last phase for inspection'),
+    trace_memory: bool = typer.Option(False, '--trace-memory', help='Trace the peak Python allocations of each phase (slower)'),
+    output_file: str = typer.Option('', '--output-file', '-o', help='JSON file to write the reports to')
+) -> None:
+    """ Reports the throughput and peak memory of the benchmark phases at growing scales (planning and analytics need MongoDB) """
+    selected_phases = [phase.strip() for phase in phases.split(',')]
+    unknown_phases = [phase for phase in selected_phases if phase not in PHASES]
+
+    if len(unknown_phases) > 0:
+        print(f'The phases have to be some of: {", ".join(PHASES)}')
+        return
+
+    reports = []
+
+    for scale in [int(scale) for scale in scales.split(',')]:
+        lod_cloud_generator = LODCloudGenerator(datasets * scale, seed)
+
+        # The planning prints every access URL and the import reports its progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            if PHASE_PARSE in selected_phases:
+                reports.extend(benchmark_parse(lod_cloud_generator, scale, trace_memory))
+
+            if PHASE_PLANNING in selected_phases:
+                reports.extend(benchmark_planning(lod_cloud_generator, scale, trace_memory, database, keep_database))
+
+            if PHASE_ANALYTICS in selected_phases:
+                reports.extend(benchmark_analytics(endpoints_amount * scale, scale, seed, trace_memory, database, keep_database))
+
+    Measurement.print_reports(reports)
+
+    if output_file != '':
+        with open(output_file, 'w') as file:
+            json.dump(reports, file, indent=4)
+
+if __name__ == '__main__':
+    app()
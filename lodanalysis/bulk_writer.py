@@ -0,0 +1,331 @@
+from pymongo import InsertOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from typing import Callable, Dict, Any
+import atexit
+import threading
+import time
+
+class BulkWriter:
+    """
+    Write-behind buffer that groups collection writes into bulk_write batches
+    """
+    INSERT = 'insert'
+    UPDATE = 'update'
+
+    def __init__(
+            self,
+            batch_size: int = 500,
+            flush_interval: float = 2.0,
+            prepare: Callable[[Collection, list], None] = None,
+            complete: Callable[[Collection, list], None] = None
+        ):
+        """ Starts the background thread that flushes the buffer by size or by time """
+        # prepare amends each collection's operations right before they are written, complete sees them right after
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.prepare = prepare
+        self.complete = complete
+        self.operations = []
+        self.in_flight = []
+        self.pending_keys = {}
+        self.last_flush = time.monotonic()
+        self.closed = False
+        self.flushing_thread = None
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+        atexit.register(self.close)
+
+    def insert(
+            self,
+            collection: Collection,
+            document: Dict[str, Any],
+            key: str = None,
+            on_written: Callable[[], None] = None
+        ) -> None:
+        """ Buffers an insert of the document """
+        self.__add({
+            'collection': collection,
+            'kind': self.INSERT,
+            'document': document,
+            'key': key,
+            'on_written': on_written
+        })
+
+    def update(
+            self,
+            collection: Collection,
+            filters: Dict[str, Any],
+            update: Dict[str, Any],
+            upsert: bool = False,
+            key: str = None,
+            on_written: Callable[[], None] = None
+        ) -> None:
+        """ Buffers an update (or an upsert) of the documents matching the filters """
+        self.__add({
+            'collection': collection,
+            'kind': self.UPDATE,
+            'filters': filters,
+            'update': update,
+            'upsert': upsert,
+            'key': key,
+            'on_written': on_written
+        })
+
+    def is_pending(
+            self,
+            key: str
+        ) -> bool:
+        """ Checks whether there are buffered or in-flight writes for the key """
+        with self.lock:
+            return key in self.pending_keys
+
+    def find_pending(
+            self,
+            collection: Collection,
+            predicate: Callable[[Dict[str, Any]], bool]
+        ) -> Any:
+        """ Returns the most recently buffered document (insert or $set) of the collection that satisfies the predicate """
+        for document in reversed(self.get_pending(collection)):
+            if predicate(document):
+                return document
+
+        return None
+
+    def get_pending(
+            self,
+            collection: Collection
+        ) -> list:
+        """ Returns the buffered and in-flight documents of the collection, the oldest first """
+        # An update contributes its $set together with the equality conditions of its filters
+        with self.lock:
+            operations = self.in_flight + self.operations
+
+        documents = []
+
+        for operation in operations:
+            if operation['collection'].full_name != collection.full_name:
+                continue
+
+            if operation['kind'] == self.INSERT:
+                documents.append(operation['document'])
+            elif operation['update'].get('$set') != None:
+                documents.append({
+                    **{
+                        field: value
+                        for field, value in operation['filters'].items()
+                        if not field.startswith('$') and not isinstance(value, dict)
+                    },
+                    **operation['update']['$set']
+                })
+
+        return documents
+
+    def flush(self) -> None:
+        """ Writes all buffered operations, one bulk_write per collection """
+        # The on_written callbacks may buffer follow-up writes, which are written by the same flush
+        with self.flush_lock:
+            self.flushing_thread = threading.get_ident()
+
+            try:
+                while self.__flush_buffer():
+                    pass
+            finally:
+                self.flushing_thread = None
+
+    def __flush_buffer(self) -> bool:
+        """ Writes the buffered operations and tells whether callbacks may have buffered new ones """
+        with self.lock:
+            operations = self.operations
+            self.operations = []
+            self.in_flight = operations
+            self.last_flush = time.monotonic()
+
+        if len(operations) == 0:
+            return False
+
+        collections = {}
+        for operation in operations:
+            collection = operation['collection']
+            collections.setdefault(collection.full_name, (collection, []))[1].append(operation)
+
+        for collection, collection_operations in collections.values():
+            self.__prepare(collection, collection_operations)
+            self.__write(collection, collection_operations)
+            self.__complete(collection, collection_operations)
+
+        with self.lock:
+            self.in_flight = []
+
+            for operation in operations:
+                self.__release_key(operation['key'])
+
+        return self.__notify(operations)
+
+    def close(self) -> None:
+        """ Stops the background thread and drains the buffer """
+        with self.lock:
+            if self.closed:
+                return
+
+            self.closed = True
+            self.condition.notify()
+
+        self.thread.join()
+        self.flush()
+
+    def __add(
+            self,
+            operation: Dict[str, Any]
+        ) -> None:
+        # The callbacks of the final flush may still buffer their follow-up writes
+        if self.closed and self.flushing_thread != threading.get_ident():
+            raise RuntimeError('The bulk writer has been closed')
+
+        with self.lock:
+            self.operations.append(operation)
+
+            if operation['key'] != None:
+                self.pending_keys[operation['key']] = self.pending_keys.get(operation['key'], 0) + 1
+
+            if len(self.operations) >= self.batch_size:
+                self.condition.notify()
+
+    def __release_key(
+            self,
+            key: str
+        ) -> None:
+        if key == None:
+            return
+
+        self.pending_keys[key] -= 1
+
+        if self.pending_keys[key] == 0:
+            del self.pending_keys[key]
+
+    def __prepare(
+            self,
+            collection: Collection,
+            operations: list
+        ) -> None:
+        """ Lets the owner amend the operations before they are written """
+        # The operations are still written when it fails
+        if self.prepare == None:
+            return
+
+        try:
+            self.prepare(collection, operations)
+        except Exception as e:
+            print(f'Could not prepare {len(operations)} operations for {collection.name}: {e}')
+
+    def __complete(
+            self,
+            collection: Collection,
+            operations: list
+        ) -> None:
+        """ Tells the owner that the operations have been written or have failed """
+        if self.complete == None:
+            return
+
+        try:
+            self.complete(collection, operations)
+        except Exception as e:
+            print(f'Could not complete {len(operations)} operations for {collection.name}: {e}')
+
+    def __notify(
+            self,
+            operations: list
+        ) -> bool:
+        """ Calls the on_written callbacks of the operations that have not failed """
+        notified = False
+
+        for operation in operations:
+            if operation.get('on_written') == None or operation.get('failed'):
+                continue
+
+            notified = True
+
+            try:
+                operation['on_written']()
+            except Exception as e:
+                print(f'Could not complete the write of {operation["key"] or "a document"} to {operation["collection"].name}: {e}')
+
+        return notified
+
+    def __run(self) -> None:
+        """ Flushes the buffer once it is full or older than the flush interval """
+        while True:
+            with self.lock:
+                while not self.closed and not self.__should_flush():
+                    self.condition.wait(self.flush_interval)
+
+                if self.closed:
+                    return
+
+            try:
+                self.flush()
+            except Exception as e:
+                print(e)
+
+    def __should_flush(self) -> bool:
+        if len(self.operations) >= self.batch_size:
+            return True
+
+        return len(self.operations) > 0 and time.monotonic() - self.last_flush >= self.flush_interval
+
+    def __to_request(
+            self,
+            operation: Dict[str, Any]
+        ) -> Any:
+        if operation['kind'] == self.INSERT:
+            return InsertOne(operation['document'])
+
+        return UpdateOne(
+            operation['filters'],
+            operation['update'],
+            upsert=operation['upsert']
+        )
+
+    def __write(
+            self,
+            collection: Collection,
+            operations: list
+        ) -> None:
+        """ Runs the operations in order, reports and marks failed ones and continues with the rest """
+        while len(operations) > 0:
+            try:
+                collection.bulk_write(
+                    [self.__to_request(operation) for operation in operations],
+                    ordered=True
+                )
+                return
+            except BulkWriteError as e:
+                write_errors = e.details.get('writeErrors', [])
+
+                if len(write_errors) == 0:
+                    print(e)
+                    self.__mark_failed(operations)
+                    return
+
+                failed_index = write_errors[0]['index']
+                failed_key = operations[failed_index]['key']
+                print(f'Could not write {failed_key or "a document"} to {collection.name}: {write_errors[0]["errmsg"]}')
+                self.__mark_failed(operations[failed_index:failed_index + 1])
+
+                operations = operations[failed_index + 1:]
+            except Exception as e:
+                print(f'Could not write {len(operations)} operations to {collection.name}: {e}')
+                self.__mark_failed(operations)
+                return
+
+    def __mark_failed(
+            self,
+            operations: list
+        ) -> None:
+        for operation in operations:
+            operation['failed'] = True
@@ -1,18 +1,55 @@
-""" Module for defining CLI commands  """
+""" Module for defining CLI commands """
+# The modules behind the commands are imported by the commands themselves to keep the startup fast
+
+import time
+
+STARTED_AT = time.perf_counter()
 
 from lodanalysis.config import Config
-from lodanalysis.collection_dump import CollectionDump
-from lodanalysis.lod_cloud import LODCloud
-from lodanalysis.mongo_db import DB
-from lodanalysis.sparql_data_extractor import SPARQLDataExtractor
+import atexit
+import contextlib
+import os
+import sys
+from typing import Any, Callable
 import typer
 
 app = typer.Typer()
-db = DB()
+matrix_app = typer.Typer(help='Analyses over a sparse matrix of endpoints by used classes and properties (requires numpy and scipy)')
+app.add_typer(matrix_app, name='matrix')
 config = Config()
-collection_dump = CollectionDump()
-lod_cloud = LODCloud()
-data_extractor = SPARQLDataExtractor()
+
+IMPORTED_AT = time.perf_counter()
+
+OUTPUT_FORMATS = 'json, ndjson, ndjson.gz, ndjson.zst (needs zstandard), parquet or arrow (both need pyarrow)'
+INPUT_FILE_SKETCH_HELP = 'Dump file to estimate the top from with bounded memory instead of reading the database'
+SKETCH_HELP = 'Sketch used for dump files: space-saving or count-min'
+CAPACITY_HELP = 'Counters (space-saving) or candidates (count-min) kept per domain'
+CACHE_HELP = 'Reuse the result of an identical earlier call if no endpoint has changed since'
+PROGRESS_HELP = 'Progress output: auto (a status line on a terminal, else the plain prints), status, json (JSON lines on stdout, other messages on stderr) or off'
+PROGRESS_LOG_HELP = 'File to append the progress of every endpoint to as JSON lines'
+
+@app.callback()
+def main(
+    timing: bool = typer.Option(
+        False,
+        '--timing',
+        help='Report the import and startup cost of the command'
+    )
+) -> None:
+    """ The LOD Cloud Analysis Tool """
+    if timing == True:
+        atexit.register(report_timing, time.perf_counter(), len(sys.modules))
+
+def report_timing(
+        command_started_at: float,
+        modules_at_start: int
+    ) -> None:
+    """ Prints how long the CLI module import, the argument parsing and the command took """
+    finished_at = time.perf_counter()
+
+    print(f'cli import: {(IMPORTED_AT - STARTED_AT) * 1000:.1f} ms', file=sys.stderr)
+    print(f'startup: {(command_started_at - STARTED_AT) * 1000:.1f} ms (process CPU time {time.process_time() * 1000:.1f} ms at exit)', file=sys.stderr)
+    print(f'command: {(finished_at - command_started_at) * 1000:.1f} ms, {len(sys.modules) - modules_at_start} modules imported lazily', file=sys.stderr)
 
 @app.command()
 def generate(
@@ -26,22 +63,54 @@ def generate(
         '--input-file',
         '-i',
         prompt='Directory with queries (Leave empty to skip)'
-    )
+    ),
+    near_duplicate_threshold: float = typer.Option(
+        None,
+        '--near-duplicate-threshold',
+        help='Mark new endpoints whose classes and properties are at least this similar to a stored endpoint'
+    ),
+    snapshot: bool = typer.Option(
+        True,
+        '--snapshot/--no-snapshot',
+        help='Record the endpoints in the snapshot history after the run'
+    ),
+    progress: str = typer.Option(config.get_lod_cloud_config('progress', 'auto'), '--progress', help=PROGRESS_HELP),
+    progress_log: str = typer.Option(config.get_file_config('progress_log', ''), '--progress-log', help=PROGRESS_LOG_HELP)
 ) -> None:
     """ Extracts data from the LOD Cloud JSON file and performs SPARQL queries on their endpoints """
+    from lodanalysis.lod_cloud import LODCloud
+    lod_cloud = LODCloud()
+
     if not config.check_dir(queries_directory):
         print('The specified directory does not exist or is empty')
         return
 
-    process_result = lod_cloud.process_data(
-        include_base_queries,
-        queries_directory
-    )
-    if (process_result == False):
-        print('An error has occured while trying to get the LOD Cloud JSON file')
+    try:
+        progress_reporter = get_progress_reporter(progress, progress_log)
+    except (ValueError, OSError) as e:
+        print(e)
         return
-    else:
-        print('The LOD Cloud processing has been finished!')
+
+    with redirect_prints(progress_reporter):
+        try:
+            process_result = lod_cloud.process_data(
+                include_base_queries,
+                queries_directory,
+                near_duplicate_threshold,
+                progress_reporter
+            )
+        finally:
+            if progress_reporter != None:
+                progress_reporter.finish()
+
+        if (process_result == False):
+            print('An error has occured while trying to get the LOD Cloud JSON file')
+            return
+        else:
+            print('The LOD Cloud processing has been finished!')
+
+        if snapshot == True:
+            take_snapshot()
 
 @app.command('generate-custom')
 def generate_custom_queries(
@@ -55,16 +124,57 @@ def generate_custom_queries(
         '--input-file',
         '-i',
         prompt='Queries directory'
-    )
+    ),
+    progress: str = typer.Option(config.get_lod_cloud_config('progress', 'auto'), '--progress', help=PROGRESS_HELP),
+    progress_log: str = typer.Option(config.get_file_config('progress_log', ''), '--progress-log', help=PROGRESS_LOG_HELP)
 ) -> None:
     """ Performs custom queries on existing stored active endpoint; appends new or replaces all existing result based on the query names """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.sparql_data_extractor import SPARQLDataExtractor
+    db = DB()
+    data_extractor = SPARQLDataExtractor()
+
     if not config.check_dir(queries_directory):
         print('The specified directory does not exist or empty')
         return
 
+    try:
+        progress_reporter = get_progress_reporter(progress, progress_log)
+    except (ValueError, OSError) as e:
+        print(e)
+        return
+
+    data_extractor.set_progress_reporter(progress_reporter)
+
+    with redirect_prints(progress_reporter):
+        try:
+            update_custom_queries(db, data_extractor, queries_directory, only_new_custom_queries, progress_reporter)
+            db.flush()
+        finally:
+            if progress_reporter != None:
+                progress_reporter.finish()
+
+def update_custom_queries(
+        db,
+        data_extractor,
+        queries_directory: str,
+        only_new_custom_queries: bool,
+        progress_reporter: Any
+    ) -> None:
+    """ Runs the custom queries on every active endpoint and buffers the updates """
+    from lodanalysis.mongo_db import DB
+
+    if progress_reporter != None:
+        progress_reporter.start(db.get_access_urls({DB.STATUS: DB.STATUS_OK}))
+
     active_endpoints = db.get_endpoint_collection({DB.STATUS: DB.STATUS_OK})
     for endpoint in active_endpoints:
-        print(endpoint[DB.ACCESS_URL])
+        if progress_reporter != None:
+            progress_reporter.start_endpoint(endpoint[DB.ACCESS_URL])
+            progress_reporter.print(endpoint[DB.ACCESS_URL])
+        else:
+            print(endpoint[DB.ACCESS_URL])
+
         updated_endpoint = data_extractor.extract_data(
             endpoint[DB.ACCESS_URL],
             include_base_queries=False,
@@ -73,6 +183,36 @@ def generate_custom_queries(
         )
 
         db.update_endpoint(updated_endpoint)
+
+        if progress_reporter != None:
+            progress_reporter.finish_endpoint(
+                endpoint[DB.ACCESS_URL],
+                updated_endpoint.get(DB.STATUS, endpoint[DB.STATUS]),
+                updated_endpoint.get(DB.ERROR_MESSAGE)
+            )
+
+def redirect_prints(progress_reporter: Any) -> Any:
+    """ Keeps stdout to the JSON lines of the progress """
+    if progress_reporter != None:
+        return progress_reporter.redirect_prints()
+
+    return contextlib.nullcontext()
+
+def get_progress_reporter(
+        progress: str,
+        progress_log: str
+    ) -> Any:
+    """ Returns the progress reporter of a harvest or None if nothing is reported """
+    from lodanalysis.progress_reporter import ProgressReporter
+
+    progress_reporter = ProgressReporter(
+        progress,
+        progress_log,
+        float(config.get_lod_cloud_config('progress_interval', '1')),
+        int(config.get_lod_cloud_config('progress_window', '50'))
+    )
+
+    return progress_reporter if progress_reporter.is_active() else None
         
 @app.command()
 def get(
@@ -101,6 +241,11 @@ def get(
     )
 ) -> None:
     """ Analyzes a single SPARQL endpoint by its URL and performs custom queries """
+    from lodanalysis.collection_dump import CollectionDump
+    from lodanalysis.sparql_data_extractor import SPARQLDataExtractor
+    collection_dump = CollectionDump()
+    data_extractor = SPARQLDataExtractor()
+
     endpoint_data = data_extractor.extract_data(
         access_url=access_url,
         include_base_queries=include_base_queries,
@@ -114,6 +259,9 @@ def get(
 @app.command()
 def download() -> None:
     """ Downloads the latest LOD cloud JSON file with raw datasets """
+    from lodanalysis.lod_cloud import LODCloud
+    lod_cloud = LODCloud()
+
     input_file = config.get_file_config('raw_data') + '.json'
 
     lod_cloud.get_lod_cloud_json(input_file)
@@ -130,18 +278,160 @@ def dump(
         '--output-file',
         '-o',
         prompt='Output file'
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}; all but json are streamed'
+    ),
+    batch_size: int = typer.Option(
+        1000,
+        '--batch-size',
+        help='Amount of endpoints fetched from the database at once'
+    ),
+    partitions: int = typer.Option(
+        1,
+        '--partitions',
+        '-p',
+        help='Export the collection as this many part files in parallel processes, with a manifest of the parts'
+    ),
+    partition_by: str = typer.Option(
+        'id',
+        '--partition-by',
+        help='Split the partitions by _id ranges (id) or by the endpoints\' first domain (domain)'
+    ),
+    since: str = typer.Option(
+        None,
+        '--since',
+        help='Export only the endpoints changed or deleted after this revision (or after the last dump with "last") as an NDJSON delta'
     )
 ) -> None:
     """ Dumps the whole endpoint collection in JSON format """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    db = DB()
+    collection_dump = CollectionDump()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    if partition_by not in DB.PARTITION_MODES:
+        print(f'The partitioning has to be one of: {", ".join(DB.PARTITION_MODES)}')
+        return
+
+    # Read before exporting so that changes made during the export, and writes still in progress, are included in the next delta
+    revision = db.get_committed_revision()
+
+    if since != None:
+        dump_delta(db, collection_dump, output_file_name, output_format, batch_size, since, revision)
+        return
+
     filters = {}
     if all_endpoints == False:
         filters[DB.STATUS] = DB.STATUS_OK
 
-    collection = db.get_endpoint_collection(filters)
-    collection_dump.export_dump(output_file_name, collection)
+    if partitions > 1:
+        partition_filters = db.get_partition_filters(filters, partitions, partition_by)
+        if collection_dump.export_partitions(output_file_name, partition_filters, output_format, batch_size, partition_by) == False:
+            return
 
+        db.set_dump_revision(revision)
+        print(f'Data dump has been created in {len(partition_filters)} parts!')
+        return
+
+    collection = db.get_endpoint_collection(filters, batch_size, exclude_internal=True)
+    if collection_dump.export_dump(output_file_name, collection, output_format, endpoint_documents=True) == False:
+        return
+
+    db.set_dump_revision(revision)
     print('Data dump has been created!')
 
+def dump_delta(
+        db,
+        collection_dump,
+        output_file_name: str,
+        output_format: str,
+        batch_size: int,
+        since: str,
+        revision: int
+    ) -> None:
+    """ Exports the endpoint upserts and deletions between the since revision and the current one as NDJSON change lines """
+    if since == 'last':
+        since_revision = db.get_dump_revision()
+    elif since.isdigit():
+        since_revision = int(since)
+    else:
+        print('The since option has to be a revision number or "last"')
+        return
+
+    if output_format not in collection_dump.NDJSON_FORMATS:
+        print(f'Delta dumps are written as {collection_dump.FORMAT_NDJSON}')
+        output_format = collection_dump.FORMAT_NDJSON
+
+    changes = db.get_changes(since_revision, revision, batch_size, exclude_internal=True)
+    delta_file_name = f'{output_file_name}.delta-{since_revision}-{revision}'
+    if collection_dump.export_dump(delta_file_name, changes, output_format) == False:
+        return
+
+    db.set_dump_revision(revision)
+    print(f'Delta dump from revision {since_revision} to {revision} has been created!')
+
+@app.command('import')
+def import_dump(
+    input_file: str = typer.Option(
+        None,
+        '--input-file',
+        '-i',
+        prompt='Dump file (JSON array or NDJSON, optionally .gz or .zst compressed)'
+    ),
+    upsert: bool = typer.Option(
+        False,
+        '--upsert',
+        help='Replace the endpoints with the same access_url instead of inserting new ones'
+    ),
+    ordered: bool = typer.Option(
+        False,
+        '--ordered',
+        help='Stop writing a batch at its first failed endpoint'
+    ),
+    batch_size: int = typer.Option(
+        1000,
+        '--batch-size',
+        help='Amount of endpoints written with one bulk write'
+    ),
+    workers: int = typer.Option(
+        4,
+        '--workers',
+        '-w',
+        help='Amount of batches written in parallel'
+    )
+) -> None:
+    """ Restores endpoints from a dump into the endpoint collection and rebuilds the indexes and summaries """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    db = DB()
+    collection_dump = CollectionDump()
+
+    if not os.path.isfile(input_file):
+        print('The specified file does not exist')
+        return
+
+    try:
+        counts = db.import_endpoints(
+            collection_dump.read_dump(input_file),
+            upsert=upsert,
+            ordered=ordered,
+            batch_size=batch_size,
+            workers=workers
+        )
+    except Exception as e:
+        print(e)
+        return
+
+    print(f'{counts["inserted"]} endpoints inserted, {counts["upserted"]} upserted, {counts["modified"]} replaced and {counts["failed"]} failed')
+
 @app.command('top-properties')
 def top_properties(
     separate: bool = typer.Option(
@@ -154,19 +444,22 @@ def top_properties(
         '--output-file',
         '-o',
         prompt='Output dump file name'
-    )
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    ),
+    limit: int = typer.Option(50, '--limit', '-k', help='Amount of the most used properties'),
+    input_file: str = typer.Option('', '--input-file', '-i', help=INPUT_FILE_SKETCH_HELP),
+    sketch: str = typer.Option('space-saving', '--sketch', help=SKETCH_HELP),
+    capacity: int = typer.Option(1000, '--capacity', help=CAPACITY_HELP),
+    use_cache: bool = typer.Option(True, '--cache/--no-cache', help=CACHE_HELP)
 ) -> None:
     """ Retrieves the most used properties accross all endpoints """
-    result = {}
-    if separate == True:
-        for domain in db.get_domains():
-            domain_name = domain['_id']
-            most_used_props = db.get_most_used_instances(DB.USED_PROPERTIES, domain_name)
-            result[domain_name] = most_used_props
-        collection_dump.export_dump(output_file_name, result)
-    else:
-        result = db.get_most_used_instances(DB.USED_PROPERTIES)
-        collection_dump.export_dump(output_file_name, result)
+    from lodanalysis.mongo_db import DB
+    export_top_instances(DB.USED_PROPERTIES, separate, output_file_name, output_format, limit, input_file, sketch, capacity, use_cache)
 
 @app.command('top-classes')
 def top_classes(
@@ -180,19 +473,84 @@ def top_classes(
         '--output-file',
         '-o',
         prompt='Output dump file name'
-    )
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    ),
+    limit: int = typer.Option(50, '--limit', '-k', help='Amount of the most used classes'),
+    input_file: str = typer.Option('', '--input-file', '-i', help=INPUT_FILE_SKETCH_HELP),
+    sketch: str = typer.Option('space-saving', '--sketch', help=SKETCH_HELP),
+    capacity: int = typer.Option(1000, '--capacity', help=CAPACITY_HELP),
+    use_cache: bool = typer.Option(True, '--cache/--no-cache', help=CACHE_HELP)
 ) -> None:
     """ Retrieves the most used classes accross all endpoints """
-    result = {}
+    from lodanalysis.mongo_db import DB
+    export_top_instances(DB.USED_CLASSES, separate, output_file_name, output_format, limit, input_file, sketch, capacity, use_cache)
+
+def export_top_instances(
+        instance_array_name: str,
+        separate: bool,
+        output_file_name: str,
+        output_format: str,
+        limit: int,
+        input_file: str,
+        sketch: str,
+        capacity: int,
+        use_cache: bool = True
+    ) -> None:
+    """ Exports the most used instances from the usage collections or, if an input file is given, estimated with sketches over the dump """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    from lodanalysis.heavy_hitters import HeavyHitters
+    collection_dump = CollectionDump()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    if input_file == '':
+        db = DB()
+
+        def get_most_used_instances() -> Any:
+            if separate == True:
+                return db.get_most_used_instances_by_domain(instance_array_name, limit)
+
+            return list(db.get_most_used_instances(instance_array_name, limit=limit))
+
+        result = get_cached_result(
+            db,
+            use_cache,
+            f'top-{instance_array_name}',
+            { 'separate': separate, 'limit': limit },
+            get_most_used_instances
+        )
+        collection_dump.export_dump(output_file_name, result, output_format)
+        return
+
+    if not os.path.isfile(input_file):
+        print('The specified file does not exist')
+        return
+
+    try:
+        heavy_hitters = HeavyHitters(instance_array_name, sketch, capacity)
+
+        for endpoint in collection_dump.read_dump(input_file):
+            heavy_hitters.add(endpoint)
+    except Exception as e:
+        print(e)
+        return
+
+    for bounds in heavy_hitters.get_error_bounds():
+        if separate == True or bounds[DB.DOMAIN] == None:
+            print(f'{bounds[DB.DOMAIN] or "all domains"}: totals overestimated by at most {bounds["error"]:.0f} of {bounds[DB.TOTAL]} (confidence {bounds["confidence"]:.2f})')
+
     if separate == True:
-        for domain in db.get_domains():
-            domain_name = domain['_id']
-            most_used_classes = db.get_most_used_instances(DB.USED_CLASSES, domain_name)
-            result[domain_name] = most_used_classes
-        collection_dump.export_dump(output_file_name, result)
+        collection_dump.export_dump(output_file_name, heavy_hitters.get_top_by_domain(limit), output_format)
     else:
-        result = db.get_most_used_instances(DB.USED_CLASSES)
-        collection_dump.export_dump(output_file_name, result)
+        collection_dump.export_dump(output_file_name, heavy_hitters.get_top(limit=limit), output_format)
 
 @app.command('delete-query')
 def delete_query(
@@ -204,6 +562,9 @@ def delete_query(
     )
 ) -> None:
     """ Delete results from a single query accross all endpoints """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
     db.delete_queries([query_name])
     print('The querie\'s result have been removed')
 
@@ -217,6 +578,9 @@ def delete_directory_queries(
     )
 ) -> None:
     """ Delete results from all queries in the specified directory accross all endpoints """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
     if not config.check_dir(queries_directory):
         print('The specified directory does not exist or empty')
         return
@@ -236,6 +600,9 @@ def delete_endpoint(
     )
 ) -> None:
     """ Deletes a single endpoint by access_url """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
     db.delete_endpoint(access_url)
 
 @app.command('drop')
@@ -246,6 +613,9 @@ def drop_collections(delete_collections: bool = typer.Option(
     )
 ) -> None:
     """ Drops the endpoint, property and class collection """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
     if delete_collections == True:
         db.drop_all_collections()
         print('The collections have been dropped!')
@@ -260,6 +630,13 @@ def skip_endpoint(
     )
 ) -> None:
     """ Adds an empty endpoint record to the database so that it could be skipper during the generation process from lod-cloud.net """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    if db.get_endpoint(access_url) != None:
+        print(f'The endpoint {access_url} already exists')
+        return
+
     db.save_endpoint(
         {
             DB.ACCESS_URL: access_url,
@@ -268,9 +645,91 @@ def skip_endpoint(
     )
     print('The endpoint has been added to the databse and will be skipped on further queries')
 
+@app.command('indexes')
+def get_indexes() -> None:
+    """ Shows the endpoint collection's indexes with their usage statistics """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    for index in db.get_index_stats():
+        keys = ', '.join(f'{field}: {direction}' for field, direction in index['key'].items())
+        print(f'{index["name"]} ({keys})')
+        print(f'    accesses: {index["accesses"]} since {index["since"]}')
+        print(f'    size: {index["size"]} bytes')
+
+@app.command('similar')
+def get_similar(
+    access_url: str = typer.Option(
+        None,
+        '--access-url',
+        '-url',
+        prompt='Endpoint access URL'
+    ),
+    threshold: float = typer.Option(
+        0.8,
+        '--threshold',
+        '-t',
+        help='Minimal estimated Jaccard similarity of used classes and properties'
+    )
+) -> None:
+    """ Finds stored endpoints with similar used classes and properties """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    endpoint = db.get_endpoint(access_url)
+    if endpoint == None:
+        print('The endpoint does not exist')
+        return
+
+    similar_endpoints = db.get_similar_endpoints(endpoint, threshold)
+    if len(similar_endpoints) == 0:
+        print('There are no similar endpoints')
+
+    for similar_endpoint in similar_endpoints:
+        print(f'{similar_endpoint["similarity"]:.2f} {similar_endpoint[DB.ACCESS_URL]} ({similar_endpoint[DB.STATUS]})')
+
+@app.command('rebuild-fingerprints')
+def rebuild_fingerprints() -> None:
+    """ Recomputes the content fingerprints and MinHash signatures used for duplicate detection of all stored endpoints """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    amount = db.rebuild_fingerprints()
+    print(f'The fingerprints of {amount} endpoints have been rebuilt')
+
+@app.command('rebuild-usage')
+def rebuild_usage() -> None:
+    """ Recreates the class and property usage collections from the endpoint collection """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    db.rebuild_usage()
+    print('The usage collections have been rebuilt')
+
+@app.command('rebuild-stats')
+def rebuild_statistics() -> None:
+    """ Recomputes the endpoints' validity flags and recreates the statistics collection """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    db.rebuild_statistics()
+    print('The statistics have been rebuilt')
+
+@app.command('migrate')
+def migrate() -> None:
+    """ Converts endpoints stored with full class and property IRIs into the dictionary encoded form """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
+    amount = db.migrate_iris()
+    print(f'{amount} endpoints have been migrated')
+
 @app.command('get-skipped')
 def get_skipped() -> None:
     """ Gets all endpoints that are being skipped during analysis of endpoints from lod-cloud.net """
+    from lodanalysis.mongo_db import DB
+    db = DB()
+
     endpoints = db.get_endpoint_collection({DB.STATUS : DB.STATUS_UNKNOWN})
     empty = True
 
@@ -292,18 +751,363 @@ def get_endpoint_totals(
         config.get_file_config('endpoint_totals'),
         '--output-file',
         '-o',
-        prompt='Output dump file name')
+        prompt='Output dump file name'),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    ),
+    use_cache: bool = typer.Option(True, '--cache/--no-cache', help=CACHE_HELP)
 ) -> None:
     """ Gets general fields' data from endpoints """
-    result = {}
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    db = DB()
+    collection_dump = CollectionDump()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    def get_totals() -> Any:
+        if separate == True:
+            return db.get_endpoint_collection_totals_by_domain()
+
+        return list(db.get_endpoint_collection_totals())
+
+    result = get_cached_result(db, use_cache, 'get-totals', { 'separate': separate }, get_totals)
+    collection_dump.export_dump(output_file_name, result, output_format)
+
+@app.command('analyze')
+def analyze(
+    input_file: str = typer.Option(
+        '',
+        '--input-file',
+        '-i',
+        help='Dump file to analyze instead of the database'
+    ),
+    output_file_name: str = typer.Option(
+        config.get_file_config('endpoint_analysis', 'endpoint_analysis'),
+        '--output-file',
+        '-o',
+        prompt='Output dump file name'
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    )
+) -> None:
+    """ Computes quantiles, histograms and per-domain breakdowns of the active endpoints' amounts (requires numpy) """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    from lodanalysis.endpoint_analytics import EndpointAnalytics
+    collection_dump = CollectionDump()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    if input_file != '' and not os.path.isfile(input_file):
+        print('The specified file does not exist')
+        return
+
+    try:
+        analytics = EndpointAnalytics()
+
+        if input_file != '':
+            amount = analytics.load(collection_dump.read_dump(input_file))
+        else:
+            amount = analytics.load(DB().get_endpoint_collection_totals(include_domains=True))
+    except Exception as e:
+        print(e)
+        return
+
+    collection_dump.export_dump(output_file_name, analytics.get_report(), output_format)
+    print(f'{amount} active endpoints have been analyzed')
+
+@app.command('vocabularies')
+def vocabularies(
+    separate: bool = typer.Option(
+        True,
+        '--separate-domains',
+        '-d',
+        prompt='Separate by domains?'
+    ),
+    input_file: str = typer.Option(
+        '',
+        '--input-file',
+        '-i',
+        help='Dump file to read the endpoints from instead of the database'
+    ),
+    output_file_name: str = typer.Option(
+        config.get_file_config('vocabulary_rollup', 'vocabulary_rollup'),
+        '--output-file',
+        '-o',
+        prompt='Output dump file name'
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    )
+) -> None:
+    """ Rolls up the used classes and properties by namespace with their endpoint coverage """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    from lodanalysis.vocabulary_rollup import VocabularyRollup
+    collection_dump = CollectionDump()
+    vocabulary_rollup = VocabularyRollup()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    if input_file != '' and not os.path.isfile(input_file):
+        print('The specified file does not exist')
+        return
+
+    if input_file != '':
+        endpoints = collection_dump.read_dump(input_file)
+    else:
+        db = DB()
+        endpoints = (db.decode_endpoint(endpoint) for endpoint in db.get_encoded_instances())
+
+    try:
+        for endpoint in endpoints:
+            vocabulary_rollup.add(endpoint)
+    except Exception as e:
+        print(e)
+        return
+
     if separate == True:
-        for domain in db.get_domains():
-            domain_name = domain['_id']
-            result[domain_name] = db.get_endpoint_collection_totals(domain_name)
-        collection_dump.export_dump(output_file_name, result)
+        collection_dump.export_dump(output_file_name, vocabulary_rollup.get_rollup_by_domain(), output_format)
+    else:
+        collection_dump.export_dump(output_file_name, vocabulary_rollup.get_rollup(), output_format)
+
+@app.command('timings')
+def timings(
+    limit: int = typer.Option(20, '--limit', '-k', help='Amount of the slowest endpoints and hosts'),
+    output_file_name: str = typer.Option(
+        config.get_file_config('endpoint_timings', 'endpoint_timings'),
+        '--output-file',
+        '-o',
+        help='Output dump file name'
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    )
+) -> None:
+    """ Summarises the recorded query timings by the slowest endpoints, phases and hosts """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    collection_dump = CollectionDump()
+    db = DB()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    db.flush()
+    phases = db.get_phase_timings()
+    if len(phases) == 0:
+        print('No query timings have been recorded yet')
+        return
+
+    for phase in phases:
+        print(f'{phase["_id"]}: {phase["total_duration_ms"] / 1000:.1f} s in {phase["queries_amount"]} queries, {phase["timeouts_amount"]} timeouts, {phase["errors_amount"]} errors')
+
+    collection_dump.export_dump(output_file_name, {
+        'endpoints': db.get_slowest_endpoints(limit),
+        'phases': phases,
+        'hosts': db.get_host_timings(limit)
+    }, output_format)
+
+@app.command('snapshot')
+def take_snapshot() -> None:
+    """ Records the current state of the endpoints as a new run of the snapshot history """
+    from lodanalysis.snapshot_store import SnapshotStore
+
+    try:
+        summary = SnapshotStore().take()
+    except Exception as e:
+        print(e)
+        return
+
+    kind = 'baseline' if summary[SnapshotStore.BASELINE] == True else 'delta'
+    print(f'Snapshot run {summary["_id"]} ({kind}): {summary["endpoints_amount"]} endpoints, {summary["changed_amount"]} changed, {summary["deleted_amount"]} deleted')
+
+@app.command('history')
+def history(
+    access_url: str = typer.Option(
+        '',
+        '--access-url',
+        '-u',
+        help='Endpoint whose time series is exported'
+    ),
+    run: int = typer.Option(
+        None,
+        '--run',
+        '-r',
+        help='Run after which the state of all endpoints is exported'
+    ),
+    output_file_name: str = typer.Option(
+        config.get_file_config('endpoint_history', 'endpoint_history'),
+        '--output-file',
+        '-o',
+        help='Output dump file name'
+    ),
+    output_format: str = typer.Option(
+        'json',
+        '--format',
+        '-f',
+        help=f'Output format: {OUTPUT_FORMATS}'
+    )
+) -> None:
+    """ Exports the snapshot history: the runs, the time series of an endpoint or all endpoints as of a run """
+    from lodanalysis.collection_dump import CollectionDump
+    from lodanalysis.snapshot_store import SnapshotStore
+    collection_dump = CollectionDump()
+    snapshot_store = SnapshotStore()
+
+    if output_format not in CollectionDump.FORMATS:
+        print(f'The format has to be one of: {", ".join(CollectionDump.FORMATS)}')
+        return
+
+    if access_url != '':
+        time_series = snapshot_store.get_time_series(access_url)
+        if len(time_series) == 0:
+            print('The endpoint has no snapshot history')
+            return
+
+        collection_dump.export_dump(output_file_name, time_series, output_format)
+    elif run != None:
+        collection_dump.export_dump(output_file_name, list(snapshot_store.get_collection_as_of(run)), output_format)
     else:
-        collection_totals = db.get_endpoint_collection_totals()
-        collection_dump.export_dump(output_file_name, collection_totals)
+        collection_dump.export_dump(output_file_name, snapshot_store.get_runs(), output_format)
+
+def load_matrix(
+        instances: str,
+        weighting: str,
+        rebuild: bool = False
+    ):
+    """ Returns the cached or freshly built endpoint matrix, or None if it can not be built """
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.endpoint_matrix import EndpointMatrix
+
+    if instances not in EndpointMatrix.INSTANCE_ARRAYS:
+        print(f'The instances have to be one of: {", ".join(EndpointMatrix.INSTANCE_ARRAYS)}')
+        return None
+
+    if weighting not in EndpointMatrix.WEIGHTINGS:
+        print(f'The weighting has to be one of: {", ".join(EndpointMatrix.WEIGHTINGS)}')
+        return None
+
+    try:
+        endpoint_matrix = EndpointMatrix(instances, weighting)
+        cached = endpoint_matrix.load_or_build(DB(), rebuild)
+    except Exception as e:
+        print(e)
+        return None
+
+    rows, columns = endpoint_matrix.matrix.shape
+    print(f'{"Loaded" if cached else "Built"} a {rows} x {columns} matrix with {endpoint_matrix.matrix.nnz} entries')
+
+    return endpoint_matrix
+
+INSTANCES_OPTION_HELP = 'Columns of the matrix: classes, properties or all'
+WEIGHTING_OPTION_HELP = 'Weights of the matrix: counts (amounts of instances) or tfidf'
+
+@matrix_app.command('build')
+def build_matrix(
+    instances: str = typer.Option('all', '--instances', help=INSTANCES_OPTION_HELP),
+    weighting: str = typer.Option('counts', '--weighting', help=WEIGHTING_OPTION_HELP)
+) -> None:
+    """ Builds the endpoint matrix and caches it in the dumps directory """
+    load_matrix(instances, weighting, rebuild=True)
+
+@matrix_app.command('cooccur')
+def matrix_cooccurrences(
+    name: str = typer.Option(
+        None,
+        '--name',
+        '-n',
+        help='Class or property IRI; the most frequent pairs among the 5,000 most frequent IRIs are listed if omitted'
+    ),
+    limit: int = typer.Option(20, '--limit', '-l'),
+    instances: str = typer.Option('all', '--instances', help=INSTANCES_OPTION_HELP)
+) -> None:
+    """ Lists the classes and properties that are used by the most endpoints together """
+    endpoint_matrix = load_matrix(instances, 'counts')
+    if endpoint_matrix == None:
+        return
+
+    cooccurrences = endpoint_matrix.get_cooccurrences(name, limit)
+    if len(cooccurrences) == 0:
+        print('There are no co-occurrences')
+
+    for cooccurrence in cooccurrences:
+        if name != None:
+            print(f'{cooccurrence["endpoints_amount"]} ({cooccurrence["share"]:.2f}) {cooccurrence["name"]} ({cooccurrence["kind"]})')
+        else:
+            print(f'{cooccurrence["endpoints_amount"]} {cooccurrence["first"]["name"]} + {cooccurrence["second"]["name"]}')
+
+@matrix_app.command('similar')
+def matrix_similar(
+    access_url: str = typer.Option(
+        None,
+        '--access-url',
+        '-url',
+        prompt='Endpoint access URL'
+    ),
+    limit: int = typer.Option(10, '--limit', '-l'),
+    instances: str = typer.Option('all', '--instances', help=INSTANCES_OPTION_HELP),
+    weighting: str = typer.Option('tfidf', '--weighting', help=WEIGHTING_OPTION_HELP)
+) -> None:
+    """ Lists the endpoints with the most similar class and property vectors by cosine similarity """
+    endpoint_matrix = load_matrix(instances, weighting)
+    if endpoint_matrix == None:
+        return
+
+    similar_endpoints = endpoint_matrix.get_similar(access_url, limit)
+    if len(similar_endpoints) == 0:
+        print('There are no similar endpoints')
+
+    for similar_endpoint in similar_endpoints:
+        print(f'{similar_endpoint["similarity"]:.2f} {similar_endpoint["access_url"]}')
+
+@matrix_app.command('cluster')
+def matrix_clusters(
+    clusters: int = typer.Option(8, '--clusters', '-k'),
+    output_file_name: str = typer.Option(
+        config.get_file_config('endpoint_clusters', 'endpoint_clusters'),
+        '--output-file',
+        '-o',
+        prompt='Output dump file name'
+    ),
+    instances: str = typer.Option('all', '--instances', help=INSTANCES_OPTION_HELP),
+    weighting: str = typer.Option('tfidf', '--weighting', help=WEIGHTING_OPTION_HELP)
+) -> None:
+    """ Clusters the endpoints by their class and property vectors and dumps the clusters """
+    from lodanalysis.collection_dump import CollectionDump
+    collection_dump = CollectionDump()
+
+    endpoint_matrix = load_matrix(instances, weighting)
+    if endpoint_matrix == None:
+        return
+
+    endpoint_clusters = endpoint_matrix.get_clusters(clusters)
+    for endpoint_cluster in endpoint_clusters:
+        top_instances = ', '.join(instance['name'] for instance in endpoint_cluster['top_instances'][:3])
+        print(f'{endpoint_cluster["endpoints_amount"]} endpoints: {top_instances}')
+
+    collection_dump.export_dump(output_file_name, endpoint_clusters)
 
 @app.command('get-stats')
 def get_stats(
@@ -318,8 +1122,29 @@ def get_stats(
         '--output-file',
         '-o',
         prompt='Output dump file name'
-    )
+    ),
+    use_cache: bool = typer.Option(True, '--cache/--no-cache', help=CACHE_HELP)
 ) -> None:
     """ Gets statistics on endpoints """
-    stats = db.get_statistics(separate)
-    collection_dump.export_dump(output_file_name, stats)
\ No newline at end of file
+    from lodanalysis.mongo_db import DB
+    from lodanalysis.collection_dump import CollectionDump
+    db = DB()
+    collection_dump = CollectionDump()
+
+    stats = get_cached_result(db, use_cache, 'get-stats', { 'separate': separate }, lambda: db.get_statistics(separate))
+    collection_dump.export_dump(output_file_name, stats)
+
+def get_cached_result(
+        db: Any,
+        use_cache: bool,
+        command: str,
+        options: dict,
+        compute: Callable[[], Any]
+    ) -> Any:
+    """ Returns the result of an analytics command from the result cache, computing it on a miss or if the cache is not used """
+    if use_cache == False:
+        return compute()
+
+    from lodanalysis.result_cache import ResultCache
+
+    return ResultCache(db).get_or_compute(command, options, compute)
\ No newline at end of file
@@ -1,24 +1,516 @@
+from bson.json_util import dumps, loads, object_hook
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, TextIO
+import gzip
+import hashlib
+import importlib
+import io
+import itertools
 import json
-from bson.json_util import dumps
-from typing import Any
+import os
+import tempfile
 
 class CollectionDump():
-    """ 
-    Class for creating and exporting data dumps 
     """
+    Class for creating and exporting data dumps
+    """
+    DUMPS_DIRECTORY = 'dumps/'
+
+    FORMAT_JSON = 'json'
+    FORMAT_NDJSON = 'ndjson'
+    FORMAT_NDJSON_GZIP = 'ndjson.gz'
+    FORMAT_NDJSON_ZSTD = 'ndjson.zst'
+    FORMAT_PARQUET = 'parquet'
+    FORMAT_ARROW = 'arrow'
+    NDJSON_FORMATS = [FORMAT_NDJSON, FORMAT_NDJSON_GZIP, FORMAT_NDJSON_ZSTD]
+    COLUMNAR_FORMATS = [FORMAT_PARQUET, FORMAT_ARROW]
+    FORMATS = [FORMAT_JSON, *NDJSON_FORMATS, *COLUMNAR_FORMATS]
+
+    COLUMNAR_BATCH_SIZE = 10000
+    DOMAIN_COLUMN = 'domain'
+    EXTRA_COLUMN = 'extra'
+
+    MANIFEST_SUFFIX = '.manifest.json'
+    CHECKSUM_CHUNK_SIZE = 1 << 20
+    READ_CHUNK_SIZE = 1 << 20
+
     def export_dump(
-            self, 
-            output_file_name: str, 
-            data: Any
+            self,
+            output_file_name: str,
+            data: Any,
+            output_format: str = FORMAT_JSON,
+            endpoint_documents: bool = False
         ) -> bool:
         """ Creates a data dump for a single endpoint """
+        if output_format in self.NDJSON_FORMATS:
+            return self.export_ndjson(output_file_name, self.get_rows(data), output_format)
+
+        if output_format in self.COLUMNAR_FORMATS:
+            return self.export_columnar(output_file_name, self.get_rows(data), output_format, endpoint_documents)
+
         json_data = json.loads(dumps(data))
 
         try:
-            with open('dumps/' + output_file_name + '.json', 'w') as file:
+            with open(self.DUMPS_DIRECTORY + output_file_name + '.json', 'w') as file:
                 json.dump(json_data, file, indent=4)
         except Exception as e:
             print(e)
 
             return False
-        return True
\ No newline at end of file
+        return True
+
+    def export_ndjson(
+            self,
+            output_file_name: str,
+            documents: Iterable[Any],
+            output_format: str = FORMAT_NDJSON
+        ) -> bool:
+        """ Streams the documents into a file one JSON document per line so that only a single document is held in memory """
+        try:
+            with self.open_text_file(self.get_dump_path(output_file_name, output_format), output_format) as file:
+                for document in documents:
+                    file.write(dumps(document))
+                    file.write('\n')
+        except Exception as e:
+            print(e)
+
+            return False
+        return True
+
+    def export_columnar(
+            self,
+            output_file_name: str,
+            rows: Iterable[Any],
+            output_format: str = FORMAT_PARQUET,
+            endpoint_documents: bool = False
+        ) -> bool:
+        """ Writes the rows in batches to a Parquet or an Arrow IPC file """
+        try:
+            pyarrow = self.import_optional('pyarrow')
+
+            if endpoint_documents:
+                schema = self.get_endpoint_schema(pyarrow)
+                batches = (
+                    [self.__to_endpoint_row(row, schema) for row in batch]
+                    for batch in self.get_batches(rows, self.COLUMNAR_BATCH_SIZE)
+                )
+                self.__write_columnar(pyarrow, output_file_name, output_format, schema, batches)
+                return True
+
+            # The schema of result rows is only known after the last row, so the rows are spooled to disk and written in a second pass
+            with tempfile.TemporaryFile('w+') as spool:
+                column_types = {}
+
+                for row in rows:
+                    row = self.__to_scalar_row(row)
+
+                    for field, value in row.items():
+                        column_types[field] = self.__widen_type(column_types.get(field), self.__get_value_type(value))
+
+                    spool.write(json.dumps(row) + '\n')
+
+                spool.seek(0)
+                schema = pyarrow.schema([
+                    (field, getattr(pyarrow, column_type or 'string')())
+                    for field, column_type in column_types.items()
+                ])
+                batches = (
+                    [self.__to_schema_row(json.loads(line), column_types) for line in batch]
+                    for batch in self.get_batches(spool, self.COLUMNAR_BATCH_SIZE)
+                )
+                self.__write_columnar(pyarrow, output_file_name, output_format, schema, batches)
+        except Exception as e:
+            print(e)
+
+            return False
+        return True
+
+    def __write_columnar(
+            self,
+            pyarrow: Any,
+            output_file_name: str,
+            output_format: str,
+            schema: Any,
+            batches: Iterable[list]
+        ) -> None:
+        writer = self.__open_columnar_writer(pyarrow, output_file_name, output_format, schema)
+
+        try:
+            for batch in batches:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+        finally:
+            writer.close()
+
+    def export_partitions(
+            self,
+            output_file_name: str,
+            partition_filters: list,
+            output_format: str = FORMAT_NDJSON,
+            batch_size: int = 0,
+            partition_by: str = None
+        ) -> bool:
+        """ Exports every partition of the endpoint collection into its own part file in a separate process and writes a manifest of the parts """
+        from lodanalysis.mongo_db import DB
+
+        tasks = [
+            (f'{output_file_name}.part-{index:04d}', filters, output_format, batch_size)
+            for index, filters in enumerate(partition_filters)
+        ]
+        workers = max(1, min(len(tasks), os.cpu_count() or 1))
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=DB.reset_connection) as executor:
+                parts = list(executor.map(CollectionDump.export_partition, tasks))
+        except Exception as e:
+            print(e)
+
+            return False
+
+        failed_parts = [part['file'] for part in parts if part['sha256'] == None]
+        if len(failed_parts) > 0:
+            print(f'Could not export the parts: {", ".join(failed_parts)}')
+
+            return False
+
+        manifest = {
+            'format': output_format,
+            'partitioned_by': partition_by,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'rows': sum(part['rows'] for part in parts),
+            'parts': parts
+        }
+
+        try:
+            with open(self.DUMPS_DIRECTORY + output_file_name + self.MANIFEST_SUFFIX, 'w') as file:
+                json.dump(json.loads(dumps(manifest)), file, indent=4)
+        except Exception as e:
+            print(e)
+
+            return False
+        return True
+
+    @staticmethod
+    def export_partition(task: tuple) -> dict:
+        """ Exports the endpoints of one partition and returns the part's manifest entry """
+        from lodanalysis.mongo_db import DB
+
+        part_name, filters, output_format, batch_size = task
+        collection_dump = CollectionDump()
+        counter = [0]
+
+        rows = collection_dump.__count(DB().get_endpoint_collection(filters, batch_size, exclude_internal=True), counter)
+        exported = collection_dump.export_dump(part_name, rows, output_format, endpoint_documents=True)
+        path = collection_dump.get_dump_path(part_name, output_format)
+
+        return {
+            'file': os.path.basename(path),
+            'rows': counter[0],
+            'sha256': collection_dump.get_checksum(path) if exported else None,
+            'filters': filters
+        }
+
+    def get_checksum(
+            self,
+            path: str
+        ) -> str:
+        """ Returns the SHA-256 checksum of the file """
+        checksum = hashlib.sha256()
+
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.CHECKSUM_CHUNK_SIZE), b''):
+                checksum.update(chunk)
+
+        return checksum.hexdigest()
+
+    def read_dump(
+            self,
+            path: str
+        ) -> Iterator[Any]:
+        """ Streams the documents of a JSON array or NDJSON dump, plain or gzip or zstd compressed, without loading the whole file """
+        with self.open_text_file(path, path, 'r') as file:
+            first_character = file.read(1)
+            while first_character.isspace():
+                first_character = file.read(1)
+
+            if first_character == '[':
+                yield from self.__read_json_array(file)
+                return
+
+            for line in itertools.chain([first_character + file.readline()], file):
+                if line.strip() != '':
+                    yield loads(line)
+
+    def __read_json_array(
+            self,
+            file: TextIO
+        ) -> Iterator[Any]:
+        """ Decodes the array elements one at a time from a buffer that is refilled in chunks """
+        decoder = json.JSONDecoder(object_hook=object_hook)
+        buffer = ''
+        position = 0
+
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ','):
+                position += 1
+
+            if position < len(buffer) and buffer[position] == ']':
+                return
+
+            try:
+                if position == len(buffer):
+                    raise json.JSONDecodeError('Incomplete document', buffer, position)
+
+                document, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = file.read(self.READ_CHUNK_SIZE)
+                if chunk == '':
+                    if buffer[position:].strip() == '':
+                        return
+
+                    raise
+
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            yield document
+
+    def get_dump_path(
+            self,
+            output_file_name: str,
+            output_format: str
+        ) -> str:
+        """ Returns the path of the dump file with the format's extension """
+        return self.DUMPS_DIRECTORY + output_file_name + '.' + output_format
+
+    def open_text_file(
+            self,
+            path: str,
+            output_format: str,
+            mode: str = 'w'
+        ) -> TextIO:
+        """ Opens a plain, gzip or zstd compressed text file for reading ('r') or writing ('w') """
+        if output_format.endswith('.gz'):
+            return gzip.open(path, mode + 't', encoding='utf-8')
+
+        if output_format.endswith('.zst'):
+            zstandard = self.import_optional('zstandard')
+
+            if mode == 'r':
+                return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True), encoding='utf-8')
+
+            return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True), encoding='utf-8')
+
+        return open(path, mode, encoding='utf-8')
+
+    def import_optional(
+            self,
+            module_name: str
+        ) -> Any:
+        """ Imports an optional dependency that is only needed by some of the formats """
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            raise Exception(f'The {module_name} module is required for this format, install it with: python3 -m pip install {module_name}')
+
+    def get_rows(
+            self,
+            data: Any
+        ) -> Iterator[Any]:
+        """ Yields the rows of the data with a domain column for results separated by domains """
+        if isinstance(data, dict):
+            if len(data) > 0 and all(isinstance(value, list) for value in data.values()):
+                for domain, rows in data.items():
+                    for row in rows:
+                        yield {self.DOMAIN_COLUMN: domain, **row}
+            else:
+                yield data
+            return
+
+        for row in data:
+            yield row
+
+    def get_batches(
+            self,
+            rows: Iterable[Any],
+            batch_size: int
+        ) -> Iterator[list]:
+        """ Groups the rows into lists of at most batch_size rows """
+        batch = []
+
+        for row in rows:
+            batch.append(row)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+    def __count(
+            self,
+            rows: Iterable[Any],
+            counter: list
+        ) -> Iterator[Any]:
+        """ Passes the rows through while counting them in counter[0] """
+        for row in rows:
+            counter[0] += 1
+            yield row
+
+    def get_endpoint_schema(
+            self,
+            pyarrow: Any
+        ) -> Any:
+        """ Returns the columnar schema of endpoint documents """
+        # Class and property histograms are nested lists, fields without a column go to the extra column as JSON
+        from lodanalysis.mongo_db import DB
+
+        histogram = pyarrow.list_(pyarrow.struct([
+            (DB.INSTANCE_NAME, pyarrow.string()),
+            (DB.INSTANCE_AMOUNT, pyarrow.int64())
+        ]))
+        amount_fields = [
+            DB.TRIPLES_AMOUNT,
+            DB.CLASSES_AMOUNT,
+            DB.INSTANCES_AMOUNT,
+            DB.USED_PROPERTIES_AMOUNT,
+            DB.PROPERTIES_AMOUNT,
+            DB.UNIQUE_SUBJECTS_AMOUNT,
+            DB.AVERAGE_UNIQUE_SUBJECTS_AMOUNT
+        ]
+        string_fields = [
+            '_id',
+            DB.ACCESS_URL,
+            DB.STATUS,
+            DB.QUERY_EDITOR_NAME,
+            DB.QUERY_EDITOR_ADDITIONAL_INFORMATION,
+            DB.VOID_ACCESS_URL,
+            DB.DUPLICATE_REFERENCE,
+            DB.NEAR_DUPLICATE_REFERENCE,
+            DB.ERROR_MESSAGE
+        ]
+        boolean_fields = [DB.SPARQL]
+
+        return pyarrow.schema([
+            *[(field, pyarrow.string()) for field in string_fields],
+            (DB.DOMAINS, pyarrow.list_(pyarrow.string())),
+            *[(field, pyarrow.int64()) for field in amount_fields],
+            (DB.NEAR_DUPLICATE_SIMILARITY, pyarrow.float64()),
+            *[(field, pyarrow.bool_()) for field in boolean_fields],
+            (DB.USED_CLASSES, histogram),
+            (DB.USED_PROPERTIES, histogram),
+            (self.EXTRA_COLUMN, pyarrow.string())
+        ])
+
+    def __to_endpoint_row(
+            self,
+            document: dict,
+            schema: Any
+        ) -> dict:
+        """ Converts an endpoint document into a row of the endpoint schema """
+        row = {}
+        extra = {}
+
+        for field, value in document.items():
+            if field not in schema.names or field == self.EXTRA_COLUMN:
+                extra[field] = value
+                continue
+
+            field_type = str(schema.field(field).type)
+            if field_type == 'string' and value != None:
+                value = str(value)
+            elif field_type == 'int64' and value != None:
+                if isinstance(value, float) and not value.is_integer():
+                    raise ValueError(f'The {field} {value} of {document.get("_id")} is no integer and can not be stored in the {field_type} column')
+
+                value = int(value)
+
+            row[field] = value
+
+        row[self.EXTRA_COLUMN] = dumps(extra) if len(extra) > 0 else None
+
+        return row
+
+    def __to_scalar_row(
+            self,
+            row: Any
+        ) -> dict:
+        """ Converts a result row into scalar columns with nested values as JSON """
+        if not isinstance(row, dict):
+            row = { 'value': row }
+
+        scalar_row = {}
+        for field, value in row.items():
+            if value == None or isinstance(value, (str, int, float, bool)):
+                scalar_row[field] = value
+            else:
+                scalar_row[field] = dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+        return scalar_row
+
+    def __get_value_type(
+            self,
+            value: Any
+        ) -> str:
+        """ Returns the name of the pyarrow type of a scalar value or None for a missing value """
+        if value == None:
+            return None
+
+        if isinstance(value, bool):
+            return 'bool_'
+
+        if isinstance(value, int):
+            return 'int64'
+
+        if isinstance(value, float):
+            return 'float64'
+
+        return 'string'
+
+    def __widen_type(
+            self,
+            column_type: str,
+            value_type: str
+        ) -> str:
+        """ Returns the narrowest type that holds both types without loss """
+        # Integers and floats widen to floats, any other mix to strings
+        if column_type == None or column_type == value_type:
+            return value_type or column_type
+
+        if value_type == None:
+            return column_type
+
+        if {column_type, value_type} == {'int64', 'float64'}:
+            return 'float64'
+
+        return 'string'
+
+    def __to_schema_row(
+            self,
+            row: dict,
+            column_types: dict
+        ) -> dict:
+        """ Converts the values of columns that have been widened to strings """
+        for field, value in row.items():
+            if value != None and column_types[field] == 'string' and not isinstance(value, str):
+                row[field] = json.dumps(value)
+
+        return row
+
+    def __open_columnar_writer(
+            self,
+            pyarrow: Any,
+            output_file_name: str,
+            output_format: str,
+            schema: Any
+        ) -> Any:
+        path = self.get_dump_path(output_file_name, output_format)
+
+        if output_format == self.FORMAT_PARQUET:
+            parquet = self.import_optional('pyarrow.parquet')
+
+            return parquet.ParquetWriter(path, schema)
+
+        return pyarrow.ipc.new_file(path, schema)
@@ -9,29 +9,47 @@ class Config:
     FILES_SECTION_CONFIG = 'FILES'
     LOD_CLOUD_SECTION_CONFIG = 'LOD_CLOUD'
 
+    __config_parser = None
+
     def __init__(self):
-        self.config_parser = configparser.ConfigParser()
-        self.config_parser.read('env.ini')
+        """ Reads env.ini once per process and shares the parsed configs """
+        if Config.__config_parser == None:
+            Config.__config_parser = configparser.ConfigParser()
+            Config.__config_parser.read('env.ini')
+
+        self.config_parser = Config.__config_parser
 
     def get_db_config(
             self,
-            config_name: str
+            config_name: str,
+            fallback: str = None
         ) -> str:
         """ Returns database configuration value by the config path """
+        if fallback != None:
+            return self.config_parser.get(self.DATABASE_SECTION_CONFIG, config_name, fallback=fallback)
+
         return self.config_parser[self.DATABASE_SECTION_CONFIG][config_name]
 
     def get_file_config(
             self,
-            config_name: str
+            config_name: str,
+            fallback: str = None
         ) -> str:
         """ Returns file configuration value by the config path """
+        if fallback != None:
+            return self.config_parser.get(self.FILES_SECTION_CONFIG, config_name, fallback=fallback)
+
         return self.config_parser[self.FILES_SECTION_CONFIG][config_name]
 
     def get_lod_cloud_config(
             self, 
-            config_name: str
+            config_name: str,
+            fallback: str = None
         ) -> str:
         """ Returns app general configuration value by the config path """
+        if fallback != None:
+            return self.config_parser.get(self.LOD_CLOUD_SECTION_CONFIG, config_name, fallback=fallback)
+
         return self.config_parser[self.LOD_CLOUD_SECTION_CONFIG][config_name]
 
     def get_dir_content(
@@ -0,0 +1,95 @@
+from typing import Dict
+import hashlib
+import heapq
+import math
+
+class CountMinSketch:
+    """
+    Count-Min sketch of a weighted stream with a bounded set of top candidates
+    """
+    def __init__(
+            self,
+            epsilon: float = 0.001,
+            delta: float = 0.01,
+            candidates: int = 1000
+        ):
+        """ Sizes the sketch so that an estimate overshoots by at most epsilon * total with probability 1 - delta """
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = [[0] * self.width for _ in range(self.depth)]
+        self.capacity = candidates
+        self.candidates: Dict[str, int] = {}
+        self.heap = []
+        self.total = 0
+
+    def add(
+            self,
+            name: str,
+            amount: int = 1
+        ) -> None:
+        """ Adds the amount to the item's cells and keeps the item as a candidate if its estimate is among the largest """
+        self.total += amount
+        estimate = None
+
+        for row, column in zip(self.rows, self.__get_columns(name)):
+            row[column] += amount
+            estimate = row[column] if estimate == None else min(estimate, row[column])
+
+        if name not in self.candidates and len(self.candidates) >= self.capacity:
+            if estimate <= self.__get_smallest():
+                return
+
+            _, evicted_name = heapq.heappop(self.heap)
+            del self.candidates[evicted_name]
+
+        self.candidates[name] = estimate
+        heapq.heappush(self.heap, (estimate, name))
+
+        # The heap keeps outdated entries of updated candidates until they surface
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, name) for name, count in self.candidates.items()]
+            heapq.heapify(self.heap)
+
+    def get_top(
+            self,
+            limit: int
+        ) -> list:
+        """ Returns the candidates with the largest estimates """
+        # An item is guaranteed when its lower bound is not below the next estimate
+        error = self.get_error_bound()
+        top = sorted(self.candidates.items(), key=lambda candidate: candidate[1], reverse=True)
+        next_count = top[limit][1] if len(top) > limit else 0
+
+        return [
+            {
+                'name': name,
+                'total': count,
+                'error': error,
+                'guaranteed': count - error >= next_count
+            }
+            for name, count in top[:limit]
+        ]
+
+    def get_error_bound(self) -> float:
+        """ Returns the overestimation that holds for every item with probability 1 - delta """
+        return self.epsilon * self.total
+
+    def __get_smallest(self) -> int:
+        """ Drops the outdated heap entries and returns the smallest candidate estimate """
+        while self.heap[0][1] not in self.candidates or self.candidates[self.heap[0][1]] != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+        return self.heap[0][0]
+
+    def __get_columns(
+            self,
+            name: str
+        ) -> list:
+        """ Derives one column per row from a single 128 bit hash by double hashing """
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'big')
+        second_hash = int.from_bytes(digest[8:], 'big') | 1
+
+        return [(first_hash + row * second_hash) % self.width for row in range(self.depth)]
@@ -0,0 +1,147 @@
+from lodanalysis.mongo_db import DB
+from typing import Any, Dict, Iterable
+import importlib
+
+class EndpointAnalytics:
+    """
+    Class for computing distributions of the active endpoints' general amounts with vectorized operations
+    """
+    AMOUNT_FIELDS = [
+        DB.TRIPLES_AMOUNT,
+        DB.CLASSES_AMOUNT,
+        DB.INSTANCES_AMOUNT,
+        DB.USED_PROPERTIES_AMOUNT,
+        DB.UNIQUE_SUBJECTS_AMOUNT
+    ]
+    QUANTILES = [0.0, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+    ALL_DOMAINS = ''
+
+    def __init__(self):
+        """ Sets up an empty data set """
+        # NumPy is an optional dependency that is only needed by the analytics
+        try:
+            self.numpy = importlib.import_module('numpy')
+        except ImportError:
+            raise Exception('The numpy module is required for the analytics, install it with: python3 -m pip install numpy')
+
+        self.amounts = self.numpy.empty((0, len(self.AMOUNT_FIELDS)))
+        self.valid = self.numpy.empty((0, len(self.AMOUNT_FIELDS)), dtype=bool)
+        self.domains = []
+        self.domain_rows = self.numpy.empty(0, dtype=self.numpy.int64)
+        self.domain_ids = self.numpy.empty(0, dtype=self.numpy.int64)
+
+    def load(
+            self,
+            endpoints: Iterable[Dict[str, Any]]
+        ) -> int:
+        """ Loads the amounts and domains of the active endpoints in one pass and returns the amount of loaded endpoints """
+        numpy = self.numpy
+        rows = []
+        domain_ids = {}
+        domain_rows = []
+        endpoint_domain_ids = []
+
+        for endpoint in endpoints:
+            # Totals are only fetched for active endpoints and carry no status
+            if endpoint.get(DB.STATUS, DB.STATUS_OK) != DB.STATUS_OK:
+                continue
+
+            for domain in dict.fromkeys(endpoint.get(DB.DOMAINS) or []):
+                domain_rows.append(len(rows))
+                endpoint_domain_ids.append(domain_ids.setdefault(domain, len(domain_ids)))
+
+            rows.append([self.__to_number(endpoint.get(amount_field)) for amount_field in self.AMOUNT_FIELDS])
+
+        self.amounts = numpy.array(rows, dtype=numpy.float64).reshape(-1, len(self.AMOUNT_FIELDS))
+        self.valid = self.__get_valid_mask()
+        self.domains = list(domain_ids)
+        self.domain_rows = numpy.array(domain_rows, dtype=numpy.int64)
+        self.domain_ids = numpy.array(endpoint_domain_ids, dtype=numpy.int64)
+
+        return len(rows)
+
+    def get_report(self) -> list:
+        """ Returns the summary of all endpoints followed by the summaries of the individual domains """
+        numpy = self.numpy
+        report = [{ DB.DOMAIN: self.ALL_DOMAINS, **self.__summarize(numpy.arange(len(self.amounts))) }]
+
+        order = numpy.argsort(self.domain_ids, kind='stable')
+        sorted_ids = self.domain_ids[order]
+        sorted_rows = self.domain_rows[order]
+        boundaries = numpy.searchsorted(sorted_ids, numpy.arange(len(self.domains) + 1))
+
+        domains = sorted(enumerate(self.domains), key=lambda domain: domain[1], reverse=True)
+        for domain_id, domain in domains:
+            rows = sorted_rows[boundaries[domain_id]:boundaries[domain_id + 1]]
+            report.append({ DB.DOMAIN: domain, **self.__summarize(rows) })
+
+        return report
+
+    def __get_valid_mask(self) -> Any:
+        """ Marks the amounts that are neither missing, errors nor query limits """
+        numpy = self.numpy
+        valid = self.amounts > 0
+
+        for column, amount_field in enumerate(self.AMOUNT_FIELDS):
+            valid[:, column] &= ~numpy.isin(self.amounts[:, column], DB.SENTINEL_AMOUNTS[amount_field])
+
+        return valid
+
+    def __summarize(
+            self,
+            rows: Any
+        ) -> Dict[str, Any]:
+        """ Describes the valid amounts of the selected endpoints per field """
+        amounts = self.amounts[rows]
+        valid = self.valid[rows]
+        summary = { DB.ENDPOINTS_AMOUNT: int(len(rows)) }
+
+        for column, amount_field in enumerate(self.AMOUNT_FIELDS):
+            summary[amount_field] = self.__describe(amounts[valid[:, column], column])
+
+        triples = self.AMOUNT_FIELDS.index(DB.TRIPLES_AMOUNT)
+        subjects = self.AMOUNT_FIELDS.index(DB.UNIQUE_SUBJECTS_AMOUNT)
+        has_both = valid[:, triples] & valid[:, subjects]
+        subjects_total = amounts[has_both, subjects].sum()
+
+        summary['triples_per_unique_subject'] = float(amounts[has_both, triples].sum() / subjects_total) if subjects_total > 0 else None
+
+        return summary
+
+    def __describe(
+            self,
+            values: Any
+        ) -> Dict[str, Any]:
+        """ Returns the sum, mean, quantiles and the histogram over powers of ten of the values """
+        numpy = self.numpy
+
+        if len(values) == 0:
+            return { 'amount': 0 }
+
+        quantiles = numpy.quantile(values, self.QUANTILES)
+        exponents = numpy.maximum(numpy.floor(numpy.log10(values)), 0).astype(numpy.int64)
+        histogram = numpy.bincount(exponents)
+
+        return {
+            'amount': int(len(values)),
+            'sum': int(values.sum()),
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+            'quantiles': {
+                f'p{round(quantile * 100)}': float(value)
+                for quantile, value in zip(self.QUANTILES, quantiles)
+            },
+            'histogram': [
+                { 'from': 10 ** exponent, 'to': 10 ** (exponent + 1), 'amount': int(amount) }
+                for exponent, amount in enumerate(histogram)
+            ]
+        }
+
+    def __to_number(
+            self,
+            value: Any
+        ) -> float:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return float('nan')
+
+        return float(value)
@@ -0,0 +1,316 @@
+from lodanalysis.collection_dump import CollectionDump
+from lodanalysis.mongo_db import DB
+from typing import Any, Dict
+import importlib
+import os
+
+class EndpointMatrix:
+    """
+    Sparse matrix of endpoints by the IRIs of their used classes and properties
+    """
+    INSTANCES_CLASSES = 'classes'
+    INSTANCES_PROPERTIES = 'properties'
+    INSTANCES_ALL = 'all'
+    INSTANCE_ARRAYS = {
+        INSTANCES_CLASSES: [DB.USED_CLASSES],
+        INSTANCES_PROPERTIES: [DB.USED_PROPERTIES],
+        INSTANCES_ALL: [DB.USED_CLASSES, DB.USED_PROPERTIES]
+    }
+    # Columns are keyed by IRI id and kind so that an IRI used both as a class and as a property gets two columns
+    KINDS = [DB.USED_CLASSES, DB.USED_PROPERTIES]
+
+    WEIGHTING_COUNTS = 'counts'
+    WEIGHTING_TFIDF = 'tfidf'
+    WEIGHTINGS = [WEIGHTING_COUNTS, WEIGHTING_TFIDF]
+
+    CACHE_FILE = 'matrix-{instances}-{weighting}.npz'
+
+    # The most frequent pairs are only counted among this many of the most frequent columns, in blocks of columns, which bounds the memory of the product
+    COOCCURRENCE_COLUMNS = 5000
+    COOCCURRENCE_BLOCK_SIZE = 500
+
+    def __init__(
+            self,
+            instances: str = INSTANCES_ALL,
+            weighting: str = WEIGHTING_COUNTS
+        ):
+        """ Sets up an empty matrix """
+        # NumPy and SciPy are optional dependencies that are only needed by the matrix analyses
+        try:
+            self.numpy = importlib.import_module('numpy')
+            self.sparse = importlib.import_module('scipy.sparse')
+        except ImportError:
+            raise Exception('The numpy and scipy modules are required for the matrix analyses, install them with: python3 -m pip install numpy scipy')
+
+        self.instances = instances
+        self.weighting = weighting
+        self.matrix = self.sparse.csr_matrix((0, 0))
+        self.access_urls = self.numpy.empty(0, dtype=str)
+        self.columns = self.numpy.empty(0, dtype=str)
+        self.column_kinds = self.numpy.empty(0, dtype=self.numpy.int64)
+
+    def get_cache_path(self) -> str:
+        return CollectionDump.DUMPS_DIRECTORY + self.CACHE_FILE.format(instances=self.instances, weighting=self.weighting)
+
+    def load_or_build(
+            self,
+            db: DB,
+            rebuild: bool = False
+        ) -> bool:
+        """ Loads the cached matrix unless endpoints have changed since, otherwise builds and caches it """
+        revision = db.get_committed_revision()
+
+        if not rebuild and os.path.isfile(self.get_cache_path()) and self.load() == revision:
+            return True
+
+        self.build(db)
+        self.save(revision)
+
+        return False
+
+    def build(
+            self,
+            db: DB
+        ) -> None:
+        """ Builds the matrix from the encoded IRI id and amount arrays in one pass over the endpoints """
+        numpy = self.numpy
+        access_urls = []
+        rows = []
+        keys = []
+        values = []
+
+        for endpoint in db.get_encoded_instances():
+            row = len(access_urls)
+            access_urls.append(endpoint[DB.ACCESS_URL])
+
+            for instance_array_name in self.INSTANCE_ARRAYS[self.instances]:
+                ids_field, amounts_field = DB.ENCODED_INSTANCE_ARRAYS[instance_array_name]
+                ids = endpoint.get(ids_field) or []
+                kind = self.KINDS.index(instance_array_name)
+
+                rows.extend([row] * len(ids))
+                keys.extend(iri_id * len(self.KINDS) + kind for iri_id in ids)
+                values.extend(endpoint.get(amounts_field) or [0] * len(ids))
+
+        column_keys, columns = numpy.unique(numpy.array(keys, dtype=numpy.int64), return_inverse=True)
+        # The constructor sums the amounts of duplicate entries
+        self.matrix = self.sparse.csr_matrix(
+            (numpy.array(values, dtype=numpy.float64), (numpy.array(rows, dtype=numpy.int64), columns)),
+            shape=(len(access_urls), len(column_keys))
+        )
+        self.matrix.eliminate_zeros()
+        self.access_urls = numpy.array(access_urls, dtype=str)
+        self.columns = numpy.array([name or '' for name in db.iri_dictionary.get_names((column_keys // len(self.KINDS)).tolist())], dtype=str)
+        self.column_kinds = column_keys % len(self.KINDS)
+
+        if self.weighting == self.WEIGHTING_TFIDF:
+            self.__apply_tfidf()
+
+    def save(
+            self,
+            revision: int
+        ) -> None:
+        """ Caches the matrix and its labels together with the revision it was built at """
+        self.numpy.savez_compressed(
+            self.get_cache_path(),
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=self.numpy.array(self.matrix.shape),
+            access_urls=self.access_urls,
+            columns=self.columns,
+            column_kinds=self.column_kinds,
+            revision=self.numpy.array(revision)
+        )
+
+    def load(self) -> int:
+        """ Loads the cached matrix and returns the revision it was built at """
+        with self.numpy.load(self.get_cache_path(), allow_pickle=False) as cache:
+            self.matrix = self.sparse.csr_matrix(
+                (cache['data'], cache['indices'], cache['indptr']),
+                shape=tuple(cache['shape'])
+            )
+            self.access_urls = cache['access_urls']
+            self.columns = cache['columns']
+            self.column_kinds = cache['column_kinds']
+
+            return int(cache['revision'])
+
+    def get_cooccurrences(
+            self,
+            name: str = None,
+            limit: int = 20
+        ) -> list:
+        """ Returns the classes and properties used by most endpoints together with the named one, or the most frequent pairs if no name is given """
+        numpy = self.numpy
+        binary = self.__get_binary()
+        endpoints_amounts = numpy.asarray(binary.sum(axis=0)).ravel()
+
+        if name != None:
+            columns = numpy.flatnonzero(self.columns == name)
+            if len(columns) == 0:
+                return []
+
+            together = numpy.asarray(binary.T @ (binary[:, columns].sum(axis=1) > 0).astype(numpy.float64)).ravel()
+            together[columns] = 0
+
+            return [
+                {
+                    **self.__get_column(column),
+                    'endpoints_amount': int(together[column]),
+                    'share': float(together[column] / endpoints_amounts[column])
+                }
+                for column in self.__get_top(together, limit)
+            ]
+
+        # A pair is used by at most as many endpoints as its rarer column, so frequent pairs are made of frequent columns
+        top_columns = numpy.asarray(self.__get_top(endpoints_amounts, self.COOCCURRENCE_COLUMNS), dtype=numpy.int64)
+        top_binary = binary[:, top_columns].tocsc()
+        firsts = numpy.empty(0, dtype=numpy.int64)
+        seconds = numpy.empty(0, dtype=numpy.int64)
+        amounts = numpy.empty(0, dtype=numpy.float64)
+
+        for start in range(0, len(top_columns), self.COOCCURRENCE_BLOCK_SIZE):
+            block = top_binary[:, start:start + self.COOCCURRENCE_BLOCK_SIZE]
+            pairs = (block.T @ top_binary[:, start:]).tocoo()
+            upper = pairs.col > pairs.row
+
+            firsts = numpy.concatenate([firsts, pairs.row[upper] + start])
+            seconds = numpy.concatenate([seconds, pairs.col[upper] + start])
+            amounts = numpy.concatenate([amounts, pairs.data[upper]])
+
+            best = self.__get_top(amounts, limit)
+            firsts, seconds, amounts = firsts[best], seconds[best], amounts[best]
+
+        return [
+            {
+                'first': self.__get_column(top_columns[first]),
+                'second': self.__get_column(top_columns[second]),
+                'endpoints_amount': int(amount)
+            }
+            for first, second, amount in zip(firsts, seconds, amounts)
+        ]
+
+    def get_similar(
+            self,
+            access_url: str,
+            limit: int = 10
+        ) -> list:
+        """ Returns the endpoints with the highest cosine similarity of their class and property vectors """
+        rows = self.numpy.flatnonzero(self.access_urls == access_url)
+        if len(rows) == 0:
+            return []
+
+        normalized = self.__get_normalized()
+        similarities = (normalized @ normalized[rows[0]].T).toarray().ravel()
+        similarities[rows[0]] = 0
+
+        return [
+            {
+                DB.ACCESS_URL: str(self.access_urls[row]),
+                'similarity': float(similarities[row])
+            }
+            for row in self.__get_top(similarities, limit)
+        ]
+
+    def get_clusters(
+            self,
+            clusters: int = 8,
+            iterations: int = 20,
+            seed: int = 1,
+            terms: int = 10
+        ) -> list:
+        """ Groups the endpoints with spherical k-means over their normalized vectors and describes each cluster by its heaviest columns """
+        numpy = self.numpy
+        normalized = self.__get_normalized()
+        # Endpoints without any classes or properties can not be assigned
+        rows = numpy.flatnonzero(normalized.getnnz(axis=1) > 0)
+        vectors = normalized[rows]
+        clusters = min(clusters, len(rows))
+
+        if clusters == 0:
+            return []
+
+        generator = numpy.random.default_rng(seed)
+        centroids = vectors[generator.choice(len(rows), clusters, replace=False)].toarray()
+        labels = numpy.full(len(rows), -1)
+
+        for _ in range(iterations):
+            new_labels = numpy.asarray(vectors @ centroids.T).argmax(axis=1)
+            if numpy.array_equal(new_labels, labels):
+                break
+
+            labels = new_labels
+            membership = self.sparse.csr_matrix(
+                (numpy.ones(len(rows)), (labels, numpy.arange(len(rows)))),
+                shape=(clusters, len(rows))
+            )
+            centroids = (membership @ vectors).toarray()
+            norms = numpy.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids = numpy.divide(centroids, norms, out=numpy.zeros_like(centroids), where=norms > 0)
+
+        similarities = numpy.asarray(vectors @ centroids.T)
+        result = []
+
+        for cluster in range(clusters):
+            members = numpy.flatnonzero(labels == cluster)
+            if len(members) == 0:
+                continue
+
+            closest = members[numpy.argsort(-similarities[members, cluster], kind='stable')]
+            result.append({
+                'cluster': cluster,
+                'endpoints_amount': int(len(members)),
+                'top_instances': [self.__get_column(column) for column in self.__get_top(centroids[cluster], terms)],
+                'endpoints': [str(self.access_urls[rows[member]]) for member in closest]
+            })
+
+        return sorted(result, key=lambda cluster: cluster['endpoints_amount'], reverse=True)
+
+    def __apply_tfidf(self) -> None:
+        """ Replaces the amounts with sublinear term frequencies weighted by the smoothed inverse endpoint frequency of the column """
+        numpy = self.numpy
+        endpoints_amounts = numpy.bincount(self.matrix.indices, minlength=self.matrix.shape[1])
+        idf = numpy.log((1 + self.matrix.shape[0]) / (1 + endpoints_amounts)) + 1
+
+        self.matrix.data = numpy.log1p(self.matrix.data) * idf[self.matrix.indices]
+
+    def __get_binary(self) -> Any:
+        binary = self.matrix.copy()
+        binary.data = self.numpy.ones_like(binary.data)
+
+        return binary
+
+    def __get_normalized(self) -> Any:
+        """ Returns the matrix with every non-empty row scaled to unit length """
+        numpy = self.numpy
+        norms = numpy.sqrt(numpy.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel())
+        scale = numpy.divide(1.0, norms, out=numpy.zeros_like(norms), where=norms > 0)
+
+        return self.sparse.diags(scale) @ self.matrix
+
+    def __get_top(
+            self,
+            values: Any,
+            limit: int
+        ) -> list:
+        """ Returns the positions of the largest positive values in descending order """
+        numpy = self.numpy
+        positive = numpy.flatnonzero(values > 0)
+
+        if limit <= 0:
+            return []
+
+        if len(positive) > limit:
+            positive = positive[numpy.argpartition(-values[positive], limit - 1)[:limit]]
+
+        return positive[numpy.argsort(-values[positive], kind='stable')].tolist()
+
+    def __get_column(
+            self,
+            column: int
+        ) -> Dict[str, Any]:
+        return {
+            DB.INSTANCE_NAME: str(self.columns[column]),
+            'kind': self.KINDS[int(self.column_kinds[column])]
+        }
@@ -0,0 +1,88 @@
+from lodanalysis.count_min_sketch import CountMinSketch
+from lodanalysis.mongo_db import DB
+from lodanalysis.space_saving import SpaceSaving
+from typing import Any, Dict
+
+class HeavyHitters:
+    """
+    Streaming top-k of the used classes or properties of dumped endpoints with bounded memory, globally and per domain
+    """
+    SKETCH_SPACE_SAVING = 'space-saving'
+    SKETCH_COUNT_MIN = 'count-min'
+    SKETCHES = [SKETCH_SPACE_SAVING, SKETCH_COUNT_MIN]
+
+    def __init__(
+            self,
+            instance_array_name: str,
+            sketch: str = SKETCH_SPACE_SAVING,
+            capacity: int = 1000
+        ):
+        """ Sets up one sketch per domain on demand """
+        # capacity is the amount of counters (Space-Saving) or candidates (Count-Min) per sketch
+        if sketch not in self.SKETCHES:
+            raise ValueError(f'The sketch has to be one of: {", ".join(self.SKETCHES)}')
+
+        self.instance_array_name = instance_array_name
+        self.sketch = sketch
+        self.capacity = capacity
+        self.sketches: Dict[Any, Any] = {}
+
+    def add(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Adds the endpoint's instance amounts to the sketch of all domains and to the sketches of its own domains """
+        instances = endpoint_data.get(self.instance_array_name) or []
+        if len(instances) == 0:
+            return
+
+        for domain in [None] + list(dict.fromkeys(endpoint_data.get(DB.DOMAINS) or [])):
+            sketch = self.__get_sketch(domain)
+
+            for instance in instances:
+                if instance.get(DB.INSTANCE_NAME) != None:
+                    sketch.add(instance[DB.INSTANCE_NAME], instance.get(DB.INSTANCE_AMOUNT) or 0)
+
+    def get_top(
+            self,
+            domain: str = None,
+            limit: int = 50
+        ) -> list:
+        """ Returns the estimated most used instances of the domain (or of all domains) with their error bounds """
+        if domain not in self.sketches:
+            return []
+
+        return self.sketches[domain].get_top(limit)
+
+    def get_top_by_domain(
+            self,
+            limit: int = 50
+        ) -> Dict[str, list]:
+        """ Returns the estimated most used instances of every domain in descending order of the domain names """
+        domains = sorted([domain for domain in self.sketches if domain != None], reverse=True)
+
+        return {domain: self.get_top(domain, limit) for domain in domains}
+
+    def get_error_bounds(self) -> list:
+        """ Returns the summed amounts and the maximal overestimation of every sketch """
+        return [
+            {
+                DB.DOMAIN: domain,
+                DB.TOTAL: sketch.total,
+                'error': sketch.get_error_bound(),
+                'confidence': 1 - sketch.delta if self.sketch == self.SKETCH_COUNT_MIN else 1
+            }
+            for domain, sketch in self.sketches.items()
+        ]
+
+    def __get_sketch(
+            self,
+            domain: str
+        ) -> Any:
+        if domain not in self.sketches:
+            if self.sketch == self.SKETCH_COUNT_MIN:
+                self.sketches[domain] = CountMinSketch(candidates=self.capacity)
+            else:
+                self.sketches[domain] = SpaceSaving(self.capacity)
+
+        return self.sketches[domain]
@@ -0,0 +1,94 @@
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from typing import Dict
+import threading
+
+class IRIDictionary:
+    """
+    Shared dictionary that maps IRIs to integer ids so that endpoint documents can reference them compactly
+    """
+    NAME = 'name'
+    COUNTER_ID = 'iri_id'
+    COUNTER_VALUE = 'value'
+
+    def __init__(
+            self,
+            collection: Collection,
+            meta_collection: Collection
+        ):
+        """ Sets up empty caches that are filled from the collection as needed """
+        self.collection = collection
+        self.meta_collection = meta_collection
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def get_ids(
+            self,
+            names: list
+        ) -> list:
+        """ Returns the ids of the IRIs, adding the unknown ones to the dictionary """
+        with self.lock:
+            missing_names = [name for name in dict.fromkeys(names) if name not in self.ids]
+
+            if len(missing_names) > 0:
+                self.__load({ self.NAME: { '$in': missing_names } })
+                self.__add([name for name in missing_names if name not in self.ids])
+
+            return [self.ids[name] for name in names]
+
+    def get_names(
+            self,
+            ids: list
+        ) -> list:
+        """ Returns the IRIs behind the ids """
+        with self.lock:
+            missing_ids = [iri_id for iri_id in dict.fromkeys(ids) if iri_id not in self.names]
+
+            if len(missing_ids) > 0:
+                self.__load({ '_id': { '$in': missing_ids } })
+
+            return [self.names.get(iri_id) for iri_id in ids]
+
+    def reset(self) -> None:
+        """ Forgets the cached ids after the dictionary has been dropped """
+        with self.lock:
+            self.ids = {}
+            self.names = {}
+
+    def __load(
+            self,
+            filters: dict
+        ) -> None:
+        for iri in self.collection.find(filters):
+            self.ids[iri[self.NAME]] = iri['_id']
+            self.names[iri['_id']] = iri[self.NAME]
+
+    def __add(
+            self,
+            names: list
+        ) -> None:
+        """ Reserves a block of ids with one counter increment and inserts the new IRIs """
+        if len(names) == 0:
+            return
+
+        counter = self.meta_collection.find_one_and_update(
+            { '_id': self.COUNTER_ID },
+            { '$inc': { self.COUNTER_VALUE: len(names) } },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first_id = counter[self.COUNTER_VALUE] - len(names) + 1
+        iris = [{ '_id': first_id + index, self.NAME: name } for index, name in enumerate(names)]
+
+        try:
+            self.collection.insert_many(iris, ordered=False)
+        except BulkWriteError:
+            # Another process has added some of the IRIs in the meantime, their ids win
+            self.__load({ self.NAME: { '$in': names } })
+            return
+
+        for iri in iris:
+            self.ids[iri[self.NAME]] = iri['_id']
+            self.names[iri['_id']] = iri[self.NAME]
@@ -2,6 +2,8 @@ from lodanalysis.config import Config
 from lodanalysis.mongo_db import DB
 from lodanalysis.sparql_queries import SPARQLQueries
 from lodanalysis.sparql_data_extractor import SPARQLDataExtractor
+from lodanalysis.progress_reporter import ProgressReporter
+from typing import Any, Dict, List
 import json
 import os
 import urllib.request
@@ -15,13 +17,19 @@ class LODCloud:
         self.sparql_queries = SPARQLQueries()
         self.config = Config()
         self.data_extractor = SPARQLDataExtractor()
+        self.progress_reporter = None
 
     def process_data(
             self,
             include_base_queries=True,
-            queries_directory=None
+            queries_directory=None,
+            near_duplicate_threshold=None,
+            progress_reporter: ProgressReporter = None
         ) -> bool:
         """ Reads the file, extracts data from the datasets, makes SPARQL query calls and saves data """
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.progress_reporter = progress_reporter
+        self.data_extractor.set_progress_reporter(progress_reporter)
         input_file = self.config.get_file_config('raw_data') + '.json'
 
         if os.path.exists(input_file) == False:
@@ -31,6 +39,9 @@ class LODCloud:
         file = open(input_file)
         file_data = json.load(file)
 
+        if progress_reporter != None:
+            progress_reporter.start(self.__get_access_urls(file_data))
+
         # Process each dataset sequentially
         for dataset_code in file_data:
             self.dataset_data = file_data[dataset_code]
@@ -42,16 +53,41 @@ class LODCloud:
                 if (('title' in download) and (bool(download['title'])) and ('void' in download['title'].lower())) or (('description' in download) and (bool(download['description'])) and ('void' in download['description'])):
                     void_access_url = download['access_url']
 
-            for download in other_downloads:
-                if (('title' in download) and (bool(download['title'])) and ('sparql' in download['title']) or (('description' in download) and (bool(download['description'])) and ('sparql' in download['description']))):
-                    self.__set_endpoint_data(download, include_base_queries, queries_directory, dataset_code, void_access_url, is_sparql=False)
+            for download in self.__get_sparql_downloads(other_downloads):
+                self.__set_endpoint_data(download, include_base_queries, queries_directory, dataset_code, void_access_url, is_sparql=False)
 
             for endpoint in endpoints:
                 self.__set_endpoint_data(endpoint, include_base_queries, queries_directory, dataset_code, void_access_url)
 
         file.close()
+        self.db.flush()
 
         return True
+
+    def __get_sparql_downloads(
+            self,
+            other_downloads: List[Dict[str, Any]]
+        ) -> List[Dict[str, Any]]:
+        """ Returns the other downloads that are SPARQL endpoints by their title or description """
+        return [
+            download
+            for download in other_downloads
+            if (('title' in download) and (bool(download['title'])) and ('sparql' in download['title']) or (('description' in download) and (bool(download['description'])) and ('sparql' in download['description'])))
+        ]
+
+    def __get_access_urls(
+            self,
+            file_data: Dict[str, Any]
+        ) -> List[str]:
+        """ Returns the access URLs in the order of processing, including the ones that are already stored """
+        access_urls = []
+
+        for dataset_code in file_data:
+            dataset_data = file_data[dataset_code]
+            endpoints = self.__get_sparql_downloads(dataset_data['other_download']) + dataset_data['sparql']
+            access_urls.extend(endpoint[DB.ACCESS_URL] for endpoint in endpoints)
+
+        return access_urls
     
     def __get_str_value(self, arr: list, key: str) -> str:
         return arr[key] if (key in arr) and bool(arr[key]) else ''
@@ -66,7 +102,10 @@ class LODCloud:
             is_sparql: bool = True
         ) -> None:
         access_url = endpoint[DB.ACCESS_URL]
-        print(access_url)
+        self.__print(access_url)
+
+        if self.progress_reporter != None:
+            self.progress_reporter.start_endpoint(access_url)
 
         existing_endpoint = self.db.get_endpoint(access_url)
 
@@ -102,7 +141,7 @@ class LODCloud:
                     total_description[DB.DOMAIN] = domain
                     
                     names = existing_endpoint[DB.NAMES]
-                    print(names)
+                    self.__print(names)
                     names.append(total_description)
                     existing_endpoint[DB.NAMES] = names
                     if is_sparql:
@@ -111,6 +150,9 @@ class LODCloud:
                         existing_endpoint[DB.OTHER_DOWNLOAD] = True
                     
                     self.db.update_endpoint(existing_endpoint)
+
+            if self.progress_reporter != None:
+                self.progress_reporter.finish_endpoint(access_url, ProgressReporter.STATUS_EXISTING)
             return
 
         extracted_endpoint_data = self.data_extractor.extract_data(
@@ -133,13 +175,44 @@ class LODCloud:
 
         extracted_endpoint_data[DB.NAMES] = [total_description]
 
-        duplicate = self.db.get_duplicate(access_url)
+        duplicate = self.db.get_duplicate(extracted_endpoint_data)
         if duplicate != None:
             extracted_endpoint_data[DB.STATUS] = DB.STATUS_DUPLICATE
             extracted_endpoint_data[DB.DUPLICATE_REFERENCE] = duplicate[DB.ACCESS_URL]
+        elif self.near_duplicate_threshold != None and extracted_endpoint_data[DB.STATUS] == DB.STATUS_OK:
+            self.__set_near_duplicate(extracted_endpoint_data)
 
         self.db.save_endpoint(extracted_endpoint_data)
+
+        if self.progress_reporter != None:
+            self.progress_reporter.finish_endpoint(
+                access_url,
+                extracted_endpoint_data[DB.STATUS],
+                extracted_endpoint_data.get(DB.ERROR_MESSAGE)
+            )
+
+    def __print(
+            self,
+            message: Any
+        ) -> None:
+        if self.progress_reporter != None:
+            self.progress_reporter.print(message)
+        else:
+            print(message)
         
+    def __set_near_duplicate(
+            self,
+            endpoint_data: dict
+        ) -> None:
+        """ Refers the endpoint to the most similar stored active endpoint if it is similar enough """
+        similar_endpoints = self.db.get_similar_endpoints(endpoint_data, self.near_duplicate_threshold)
+
+        for similar_endpoint in similar_endpoints:
+            if similar_endpoint[DB.STATUS] == DB.STATUS_OK:
+                endpoint_data[DB.NEAR_DUPLICATE_REFERENCE] = similar_endpoint[DB.ACCESS_URL]
+                endpoint_data[DB.NEAR_DUPLICATE_SIMILARITY] = similar_endpoint['similarity']
+                return
+
     def get_lod_cloud_json(
             self, 
             file_name: str
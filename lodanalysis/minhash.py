@@ -0,0 +1,79 @@
+from typing import Iterable
+import hashlib
+import random
+
+class MinHash:
+    """
+    Class for computing MinHash signatures and their LSH band keys
+    """
+    PERMUTATIONS = 64
+    BANDS = 16
+    SEED = 1
+
+    PRIME = (1 << 61) - 1
+    MAX_HASH = (1 << 32) - 1
+
+    def __init__(
+            self,
+            permutations: int = PERMUTATIONS,
+            bands: int = BANDS,
+            seed: int = SEED
+        ):
+        """ Sets up the random permutations """
+        # Signatures are only comparable when built with the same parameters
+        if permutations % bands != 0:
+            raise ValueError('The amount of permutations must be divisible by the amount of bands')
+
+        generator = random.Random(seed)
+        self.permutations = [
+            (generator.randint(1, self.PRIME - 1), generator.randint(0, self.PRIME - 1))
+            for _ in range(permutations)
+        ]
+        self.bands = bands
+        self.rows = permutations // bands
+
+    def get_signature(
+            self,
+            tokens: Iterable[str]
+        ) -> list:
+        """ Returns the MinHash signature of the token set or an empty list for an empty set """
+        hashes = {
+            int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+            for token in tokens
+        }
+
+        if len(hashes) == 0:
+            return []
+
+        return [
+            min((a * value + b) % self.PRIME for value in hashes) & self.MAX_HASH
+            for a, b in self.permutations
+        ]
+
+    def get_band_keys(
+            self,
+            signature: list
+        ) -> list:
+        """ Returns one key per band of the signature """
+        # Signatures sharing any key are candidates for being similar
+        keys = []
+
+        for band in range(self.bands if len(signature) > 0 else 0):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(','.join(map(str, rows)).encode('utf-8'), digest_size=8).hexdigest()
+            keys.append(f'{band}:{digest}')
+
+        return keys
+
+    @staticmethod
+    def get_similarity(
+            signature: list,
+            other_signature: list
+        ) -> float:
+        """ Estimates the Jaccard similarity of the sets behind two signatures """
+        if len(signature) == 0 or len(signature) != len(other_signature):
+            return 0.0
+
+        matches = sum(1 for value, other_value in zip(signature, other_signature) if value == other_value)
+
+        return matches / len(signature)
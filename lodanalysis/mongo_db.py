@@ -1,8 +1,22 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, ReplaceOne, UpdateOne, ASCENDING, DESCENDING
+from lodanalysis.bulk_writer import BulkWriter
 from lodanalysis.config import Config
+from lodanalysis.iri_dictionary import IRIDictionary
+from lodanalysis.minhash import MinHash
+from pymongo.collection import Collection
 from pymongo.cursor import Cursor
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from pymongo.results import UpdateResult, DeleteResult
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+import hashlib
+import heapq
+import itertools
+import json
+import threading
+import time
 
 class DB:
     """ 
@@ -24,6 +38,10 @@ class DB:
     PROPERTIES_AMOUNT = 'properties_amount'
     USED_CLASSES = 'used_classes'
     USED_PROPERTIES = 'used_properties'
+    USED_CLASSES_IDS = 'used_classes_ids'
+    USED_CLASSES_AMOUNTS = 'used_classes_amounts'
+    USED_PROPERTIES_IDS = 'used_properties_ids'
+    USED_PROPERTIES_AMOUNTS = 'used_properties_amounts'
     VOID_ACCESS_URL = 'void_access_url'
     ERROR_MESSAGE = 'error_message'
 
@@ -52,72 +70,1315 @@ class DB:
     STATUS_UNKNOWN = 'UNKNOWN'
     STATUS_DUPLICATE = 'DUPLICATE'
 
+    PARTITION_BY_ID = 'id'
+    PARTITION_BY_DOMAIN = 'domain'
+    PARTITION_MODES = [PARTITION_BY_ID, PARTITION_BY_DOMAIN]
+
     DUPLICATE_REFERENCE = 'duplicate_reference'
+    FINGERPRINT = 'fingerprint'
+    MINHASH = 'minhash'
+    MINHASH_BANDS = 'minhash_bands'
+    NEAR_DUPLICATE_REFERENCE = 'near_duplicate_reference'
+    NEAR_DUPLICATE_SIMILARITY = 'near_duplicate_similarity'
+
+    REVISION = 'revision'
+    UPDATED_AT = 'updated_at'
+    REVISION_COUNTER_ID = 'revision'
+    DUMP_REVISION_ID = 'dump_revision'
+    USAGE_BUILT_ID = 'usage_built'
+    STATISTICS_BUILT_ID = 'statistics_built'
+    META_VALUE = 'value'
+    REVISION_RESERVATIONS = 'reservations'
+    RESERVATION_FIRST = 'first'
+    RESERVED_AT = 'reserved_at'
+    RESERVATION = 'reservation'
+
+    CHANGE_OPERATION = 'op'
+    CHANGE_UPSERT = 'upsert'
+    CHANGE_DELETE = 'delete'
+    CHANGE_ENDPOINT = 'endpoint'
+
+    TOTAL = 'total'
+    ENDPOINTS_AMOUNT = 'endpoints_amount'
+
+    ENCODED_INSTANCE_ARRAYS = {
+        USED_CLASSES: (USED_CLASSES_IDS, USED_CLASSES_AMOUNTS),
+        USED_PROPERTIES: (USED_PROPERTIES_IDS, USED_PROPERTIES_AMOUNTS)
+    }
+
+    SENTINEL_AMOUNTS = {
+        TRIPLES_AMOUNT: [10000, 100000],
+        CLASSES_AMOUNT: [10000, 100000],
+        INSTANCES_AMOUNT: [10000, 100000],
+        USED_PROPERTIES_AMOUNT: [10000, 100000],
+        UNIQUE_SUBJECTS_AMOUNT: [100, 500, 10000, 50000, 100000, 250000, 500000, 1000000]
+    }
+
+    VALIDITY_FLAGS = {
+        TRIPLES_AMOUNT: 'has_valid_triples_amount',
+        CLASSES_AMOUNT: 'has_valid_used_classes_amount',
+        INSTANCES_AMOUNT: 'has_valid_instances_amount',
+        USED_PROPERTIES_AMOUNT: 'has_valid_used_properties_amount',
+        UNIQUE_SUBJECTS_AMOUNT: 'has_valid_unique_subjects_amount'
+    }
+    HAS_VALID_AVERAGE_UNIQUE_SUBJECTS_AMOUNT = 'has_valid_average_unique_subjects_amount'
+
+    # Lookup data and statistics flags derived from the endpoint when it is stored; dumps leave them out and an import derives them again
+    INTERNAL_FIELDS = [
+        FINGERPRINT,
+        MINHASH,
+        MINHASH_BANDS,
+        *VALIDITY_FLAGS.values(),
+        HAS_VALID_AVERAGE_UNIQUE_SUBJECTS_AMOUNT
+    ]
+
+    STATISTICS_AMOUNTS = {
+        TRIPLES_AMOUNT: 'can_get_triple_amount',
+        CLASSES_AMOUNT: 'can_get_class_amount',
+        INSTANCES_AMOUNT: 'can_get_instance_amount',
+        USED_PROPERTIES_AMOUNT: 'can_get_property_amount',
+        UNIQUE_SUBJECTS_AMOUNT: 'can_get_unique_subject_amount'
+    }
+
+    STATISTICS_FIELDS = [
+        'endpoints_amount',
+        'active_endpoints_amount',
+        'failed_endpoints_amount',
+        'unknown_endpoints_amount',
+        'duplicate_endpoints_amount',
+        'can_get_triple_amount',
+        TRIPLES_AMOUNT,
+        'can_get_class_amount',
+        CLASSES_AMOUNT,
+        'can_get_instance_amount',
+        INSTANCES_AMOUNT,
+        'can_get_property_amount',
+        USED_PROPERTIES_AMOUNT,
+        'can_get_unique_subject_amount',
+        UNIQUE_SUBJECTS_AMOUNT,
+        'can_get_average_unique_subject_amount',
+        'totals_triples_for_subjects_avg',
+        'totals_unique_subjects_for_subjects_avg',
+        'is_virtuoso'
+    ]
+
+    SUMMARY_SOURCE_FIELDS = [
+        STATUS,
+        DOMAINS,
+        QUERY_EDITOR_NAME,
+        TRIPLES_AMOUNT,
+        CLASSES_AMOUNT,
+        INSTANCES_AMOUNT,
+        USED_PROPERTIES_AMOUNT,
+        UNIQUE_SUBJECTS_AMOUNT,
+        USED_CLASSES,
+        USED_PROPERTIES
+    ]
+
+    ENDPOINT_INDEXES = [
+        {
+            'name': 'access_url_unique',
+            'keys': [(ACCESS_URL, ASCENDING)],
+            'unique': True
+        },
+        {
+            'name': 'status',
+            'keys': [(STATUS, ASCENDING)],
+            'unique': False
+        },
+        {
+            'name': 'domains',
+            'keys': [(DOMAINS, ASCENDING)],
+            'unique': False
+        },
+        {
+            'name': 'fingerprint',
+            'keys': [(FINGERPRINT, ASCENDING)],
+            'unique': False
+        },
+        {
+            'name': 'minhash_bands',
+            'keys': [(MINHASH_BANDS, ASCENDING)],
+            'unique': False
+        },
+        {
+            'name': 'revision',
+            'keys': [(REVISION, ASCENDING)],
+            'unique': False
+        },
+        *[
+            {
+                'name': flag,
+                'keys': [(flag, ASCENDING)],
+                'unique': False
+            }
+            for flag in [*VALIDITY_FLAGS.values(), HAS_VALID_AVERAGE_UNIQUE_SUBJECTS_AMOUNT]
+        ]
+    ]
+
+    USAGE_INDEXES = [
+        {
+            'name': 'name_domain_unique',
+            'keys': [(INSTANCE_NAME, ASCENDING), (DOMAIN, ASCENDING)],
+            'unique': True
+        },
+        {
+            'name': 'domain_total',
+            'keys': [(DOMAIN, ASCENDING), (TOTAL, DESCENDING)],
+            'unique': False
+        }
+    ]
+
+    STATISTICS_INDEXES = [
+        {
+            'name': 'domain_unique',
+            'keys': [(DOMAIN, ASCENDING)],
+            'unique': True
+        }
+    ]
+
+    IRI_INDEXES = [
+        {
+            'name': 'name_unique',
+            'keys': [(IRIDictionary.NAME, ASCENDING)],
+            'unique': True
+        }
+    ]
+
+    TOMBSTONE_INDEXES = [
+        {
+            'name': 'access_url_unique',
+            'keys': [(ACCESS_URL, ASCENDING)],
+            'unique': True
+        },
+        {
+            'name': 'revision',
+            'keys': [(REVISION, ASCENDING)],
+            'unique': False
+        }
+    ]
+
+    SNAPSHOT_RUN = 'run'
+    SNAPSHOT_INDEXES = [
+        {
+            'name': 'access_url_run',
+            'keys': [(ACCESS_URL, ASCENDING), (SNAPSHOT_RUN, ASCENDING)],
+            'unique': False
+        },
+        {
+            'name': 'run',
+            'keys': [(SNAPSHOT_RUN, ASCENDING)],
+            'unique': False
+        }
+    ]
+
+    METRICS_INDEXES = [
+        {
+            'name': 'access_url_started_at',
+            'keys': [(ACCESS_URL, ASCENDING), ('started_at', ASCENDING)],
+            'unique': False
+        }
+    ]
+
+    CACHE_LAST_USED_AT = 'last_used_at'
+    RESULT_CACHE_INDEXES = [
+        {
+            'name': 'last_used_at',
+            'keys': [(CACHE_LAST_USED_AT, ASCENDING)],
+            'unique': False
+        }
+    ]
+
+    __client = None
+    __database = None
+    __writer = None
+    __iri_dictionary = None
+    __built_summaries = set()
+    __lock = threading.RLock()
 
     def __init__(self):
-        """ Sets up the connection with MongoDB """
+        """ Sets up the wrapper without opening the connection yet """
         self.config = Config()
-        self.client = MongoClient(
-            host=self.config.get_db_config('host'), 
-            port=int(self.config.get_db_config('port'))
-        )
+        self.minhash = MinHash()
+
+    @staticmethod
+    def reset_connection() -> None:
+        """ Forgets the process-wide connection, writer and IRI dictionary so that a forked worker process opens its own """
+        DB.__lock = threading.RLock()
+        DB.__client = None
+        DB.__database = None
+        DB.__writer = None
+        DB.__iri_dictionary = None
+        DB.__built_summaries = set()
+
+    @property
+    def db(self) -> Database:
+        """ Returns the application's database, connecting and ensuring the indexes on first use """
+        with DB.__lock:
+            if DB.__database is None:
+                write_concern = self.config.get_db_config('write_concern', '1')
+
+                DB.__client = MongoClient(
+                    host=self.config.get_db_config('host'), 
+                    port=int(self.config.get_db_config('port')),
+                    maxPoolSize=int(self.config.get_db_config('max_pool_size', '100')),
+                    serverSelectionTimeoutMS=int(self.config.get_db_config('server_selection_timeout_ms', '30000')),
+                    w=int(write_concern) if write_concern.isdigit() else write_concern
+                )
+                DB.__database = DB.__client[self.config.get_db_config('name')]
+                self.ensure_indexes()
+
+            return DB.__database
+
+    @property
+    def endpoints(self) -> Collection:
+        return self.db[self.config.get_db_config('endpoint_collection')]
+
+    @property
+    def usage_collections(self) -> Dict[str, Collection]:
+        return {
+            self.USED_CLASSES: self.db[self.config.get_db_config('class_collection', 'class')],
+            self.USED_PROPERTIES: self.db[self.config.get_db_config('property_collection', 'property')]
+        }
 
-        self.db = self.client[self.config.get_db_config('name')]
-        self.endpoints = self.db[self.config.get_db_config('endpoint_collection')]
+    @property
+    def statistics(self) -> Collection:
+        return self.db[self.config.get_db_config('statistics_collection', 'statistics')]
+
+    @property
+    def iris(self) -> Collection:
+        return self.db[self.config.get_db_config('iri_collection', 'iri')]
+
+    @property
+    def tombstones(self) -> Collection:
+        return self.db[self.config.get_db_config('tombstone_collection', 'tombstone')]
+
+    @property
+    def snapshots(self) -> Collection:
+        return self.db[self.config.get_db_config('snapshot_collection', 'snapshot')]
+
+    @property
+    def snapshot_runs(self) -> Collection:
+        return self.db[self.config.get_db_config('snapshot_run_collection', 'snapshot_run')]
+
+    @property
+    def snapshot_heads(self) -> Collection:
+        return self.db[self.config.get_db_config('snapshot_head_collection', 'snapshot_head')]
+
+    @property
+    def metrics(self) -> Collection:
+        return self.db[self.config.get_db_config('metrics_collection', 'metrics')]
+
+    @property
+    def result_cache(self) -> Collection:
+        return self.db[self.config.get_db_config('result_cache_collection', 'result_cache')]
+
+    @property
+    def meta(self) -> Collection:
+        return self.db[self.config.get_db_config('meta_collection', 'meta')]
+
+    @property
+    def iri_dictionary(self) -> IRIDictionary:
+        """ Returns the process-wide IRI dictionary with its id and name caches """
+        with DB.__lock:
+            if DB.__iri_dictionary is None:
+                DB.__iri_dictionary = IRIDictionary(self.iris, self.meta)
+
+            return DB.__iri_dictionary
+
+    @property
+    def writer(self) -> BulkWriter:
+        """ Returns the process-wide bulk writer, starting it on first use """
+        with DB.__lock:
+            if DB.__writer is None:
+                DB.__writer = BulkWriter(
+                    batch_size=int(self.config.get_db_config('bulk_batch_size', '500')),
+                    flush_interval=float(self.config.get_db_config('bulk_flush_interval', '2')),
+                    prepare=self.__prepare_operations,
+                    complete=self.__release_stamped_revisions
+                )
+
+            return DB.__writer
+
+    def ensure_indexes(self) -> None:
+        """ Creates the declared indexes on the endpoint, usage, statistics and IRI collections unless they already exist """
+        self.__create_indexes(self.endpoints, self.ENDPOINT_INDEXES)
+
+        for usage_collection in self.usage_collections.values():
+            self.__create_indexes(usage_collection, self.USAGE_INDEXES)
+
+        self.__create_indexes(self.statistics, self.STATISTICS_INDEXES)
+        self.__create_indexes(self.iris, self.IRI_INDEXES)
+        self.__create_indexes(self.tombstones, self.TOMBSTONE_INDEXES)
+        self.__create_indexes(self.snapshots, self.SNAPSHOT_INDEXES)
+        self.__create_indexes(self.result_cache, self.RESULT_CACHE_INDEXES)
+        self.__create_indexes(self.metrics, self.METRICS_INDEXES)
+
+    def __create_indexes(
+            self,
+            collection: Collection,
+            indexes: list
+        ) -> None:
+        for index in indexes:
+            try:
+                collection.create_index(
+                    index['keys'],
+                    name=index['name'],
+                    unique=index['unique']
+                )
+            except OperationFailure as e:
+                print(f'Could not create the index {index["name"]}: {e}')
+
+    def get_index_stats(self) -> list:
+        """ Returns usage statistics and sizes of the endpoint collection's indexes """
+        index_sizes = self.db.command('collStats', self.endpoints.name).get('indexSizes', {})
+        stats = []
+
+        for index in self.endpoints.aggregate([{'$indexStats': {}}]):
+            stats.append({
+                'name': index['name'],
+                'key': dict(index['key']),
+                'accesses': index['accesses']['ops'],
+                'since': index['accesses']['since'],
+                'size': index_sizes.get(index['name'], 0)
+            })
+
+        return sorted(stats, key=lambda index: index['name'])
 
     def save_endpoint(
             self,
             endpoint_data: Dict[str, Any]
         ) -> None:
-        """ Saves a new endpoint in the endpoint collection """
+        """ Buffers a new endpoint for insertion into the endpoint collection """
+        # The unique access_url index rejects an existing endpoint when the insert is written
+        endpoint = self.prepare_endpoint(endpoint_data)
+        endpoint_data = dict(endpoint_data)
+
+        self.writer.insert(
+            self.endpoints,
+            endpoint,
+            key=endpoint_data[self.ACCESS_URL],
+            on_written=lambda: self.__update_summaries(None, endpoint_data)
+        )
+
+    def prepare_endpoint(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Sets the validity flags and similarity signatures of a new endpoint and returns its encoded form for storing """
+        endpoint_data.update(self.get_validity_flags(endpoint_data))
+        self.__set_signatures(endpoint_data)
+
+        return self.encode_endpoint(endpoint_data)
+
+    def import_endpoints(
+            self,
+            endpoints: Iterable[Dict[str, Any]],
+            upsert: bool = False,
+            ordered: bool = False,
+            batch_size: int = 1000,
+            workers: int = 4
+        ) -> Dict[str, int]:
+        """ Loads dumped endpoints with parallel bulk writes and returns the write counts """
+        self.flush()
+
+        if self.endpoints.estimated_document_count() == 0:
+            # Building the indexes once after the load is cheaper than maintaining them on every insert
+            self.__drop_secondary_indexes()
+
+        counts = { 'inserted': 0, 'upserted': 0, 'modified': 0, 'failed': 0 }
+        futures = set()
+        batch = []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for endpoint in endpoints:
+                batch.append(endpoint)
+
+                if len(batch) < batch_size:
+                    continue
+
+                futures.add(executor.submit(self.__import_batch, batch, upsert, ordered))
+                batch = []
+
+                # Bounds the amount of documents held in memory when reading is faster than writing
+                if len(futures) >= workers * 2:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    self.__add_import_counts(counts, done)
+
+            if len(batch) > 0:
+                futures.add(executor.submit(self.__import_batch, batch, upsert, ordered))
+
+            done, futures = wait(futures)
+            self.__add_import_counts(counts, done)
+
+        self.ensure_indexes()
+        self.rebuild_usage()
+        self.rebuild_statistics()
+
+        return counts
+
+    def __import_batch(
+            self,
+            endpoints: list,
+            upsert: bool,
+            ordered: bool
+        ) -> Dict[str, int]:
+        """ Prepares, stamps and writes one batch of dumped endpoints with a single bulk_write """
+        requests = []
+        skipped = 0
+        if len(endpoints) == 0:
+            return {}
+
+        first_revision = self.__reserve_revisions(len(endpoints))
+        revision = first_revision
+        updated_at = datetime.now(timezone.utc)
+
+        for endpoint in endpoints:
+            if not isinstance(endpoint, dict) or self.ACCESS_URL not in endpoint:
+                skipped += 1
+                continue
+
+            document = self.prepare_endpoint(endpoint)
+            document[self.REVISION] = revision
+            document[self.UPDATED_AT] = updated_at
+            revision += 1
+
+            if upsert == True:
+                # The _id of an existing endpoint can not be replaced
+                document.pop('_id', None)
+                requests.append(ReplaceOne({ self.ACCESS_URL: document[self.ACCESS_URL] }, document, upsert=True))
+            else:
+                requests.append(InsertOne(document))
+
+        if skipped > 0:
+            print(f'Skipped {skipped} documents without an {self.ACCESS_URL}')
+
+        if len(requests) == 0:
+            self.__release_revisions(first_revision)
+            return { 'failed': skipped }
+
         try:
-            self.endpoints.insert_one(endpoint_data)
-        except Exception as e:
-            print(e)
+            result = self.endpoints.bulk_write(requests, ordered=ordered).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            write_errors = result.get('writeErrors', [])
+
+            if len(write_errors) > 0:
+                print(f'Could not import {len(write_errors)} endpoints: {write_errors[0]["errmsg"]}')
+        finally:
+            self.__release_revisions(first_revision)
+
+        # Failed writes and, in ordered mode, the writes after the first failure
+        written = result.get('nInserted', 0) + result.get('nUpserted', 0) + result.get('nMatched', 0)
+
+        return {
+            'inserted': result.get('nInserted', 0),
+            'upserted': result.get('nUpserted', 0),
+            'modified': result.get('nModified', 0),
+            'failed': skipped + len(requests) - written
+        }
+
+    def __add_import_counts(
+            self,
+            counts: Dict[str, int],
+            futures: set
+        ) -> None:
+        for future in futures:
+            for field, amount in future.result().items():
+                counts[field] += amount
+
+    def __drop_secondary_indexes(self) -> None:
+        """ Drops the endpoint indexes except for the unique access_url index, which upserts and duplicate checks rely on """
+        for index in self.ENDPOINT_INDEXES:
+            if index['unique'] == True:
+                continue
+
+            try:
+                self.endpoints.drop_index(index['name'])
+            except OperationFailure:
+                pass
  
     def update_endpoint(
             self,
             endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Buffers an update of an existing endpoint with new data """
+        existing_endpoint = None
+        if any(field in endpoint_data for field in self.SUMMARY_SOURCE_FIELDS):
+            existing_endpoint = self.get_endpoint(endpoint_data[self.ACCESS_URL])
+
+        if existing_endpoint != None:
+            endpoint_data.update(self.get_validity_flags({**existing_endpoint, **endpoint_data}))
+
+        self.__set_signatures(endpoint_data)
+        on_written = None
+
+        if existing_endpoint != None:
+            updated_endpoint = {**existing_endpoint, **endpoint_data}
+            on_written = lambda: self.__update_summaries(existing_endpoint, updated_endpoint)
+
+        self.writer.update(
+            self.endpoints,
+            { self.ACCESS_URL: endpoint_data[self.ACCESS_URL] },
+            self.__get_encoded_update(endpoint_data),
+            key=endpoint_data[self.ACCESS_URL],
+            on_written=on_written
+        )
+
+    def is_valid_amount(
+            self,
+            endpoint_data: Dict[str, Any],
+            amount_field: str
+        ) -> bool:
+        """ Checks whether the amount was harvested from an active endpoint and is neither an error nor a query limit """
+        amount = endpoint_data.get(amount_field)
+
+        if endpoint_data.get(self.STATUS) != self.STATUS_OK or not isinstance(amount, (int, float)):
+            return False
+
+        return amount > 0 and amount not in self.SENTINEL_AMOUNTS[amount_field]
+
+    def get_validity_flags(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> Dict[str, bool]:
+        """ Returns the validity flags of the endpoint's amounts that the statistics are based on """
+        flags = {}
+
+        for amount_field, flag in self.VALIDITY_FLAGS.items():
+            flags[flag] = self.is_valid_amount(endpoint_data, amount_field)
+
+        flags[self.HAS_VALID_AVERAGE_UNIQUE_SUBJECTS_AMOUNT] = flags[self.VALIDITY_FLAGS[self.UNIQUE_SUBJECTS_AMOUNT]] and flags[self.VALIDITY_FLAGS[self.TRIPLES_AMOUNT]]
+
+        return flags
+
+    def __get_domain_keys(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> list:
+        """ Returns the domains the endpoint is summarized under, None for all domains """
+        return [None] + list(dict.fromkeys(endpoint_data.get(self.DOMAINS) or []))
+
+    def __get_statistics(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> Dict[Any, Dict[str, Any]]:
+        """ Returns the endpoint's contribution to the statistics keyed by domain """
+        if endpoint_data == None:
+            return {}
+
+        flags = self.get_validity_flags(endpoint_data)
+        status = endpoint_data.get(self.STATUS)
+        statistics = {
+            'endpoints_amount': 1,
+            'active_endpoints_amount': int(status == self.STATUS_OK),
+            'failed_endpoints_amount': int(status == self.STATUS_FAIL),
+            'unknown_endpoints_amount': int(status == self.STATUS_UNKNOWN),
+            'duplicate_endpoints_amount': int(status == self.STATUS_DUPLICATE),
+            'is_virtuoso': int(endpoint_data.get(self.QUERY_EDITOR_NAME) == 'Virtuoso')
+        }
+
+        for amount_field, counter in self.STATISTICS_AMOUNTS.items():
+            is_valid = flags[self.VALIDITY_FLAGS[amount_field]]
+            statistics[counter] = int(is_valid)
+            statistics[amount_field] = endpoint_data[amount_field] if is_valid else 0
+
+        has_valid_average = flags[self.HAS_VALID_AVERAGE_UNIQUE_SUBJECTS_AMOUNT]
+        statistics['can_get_average_unique_subject_amount'] = int(has_valid_average)
+        statistics['totals_triples_for_subjects_avg'] = endpoint_data[self.TRIPLES_AMOUNT] if has_valid_average else 0
+        statistics['totals_unique_subjects_for_subjects_avg'] = endpoint_data[self.UNIQUE_SUBJECTS_AMOUNT] if has_valid_average else 0
+
+        return {domain: statistics for domain in self.__get_domain_keys(endpoint_data)}
+
+    def __update_statistics(
+            self,
+            old_endpoint_data: Dict[str, Any],
+            new_endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Buffers increments of the per-domain statistics by the difference between two versions of an endpoint """
+        old_statistics = self.__get_statistics(old_endpoint_data)
+        new_statistics = self.__get_statistics(new_endpoint_data)
+
+        for domain in old_statistics.keys() | new_statistics.keys():
+            increments = {}
+
+            for field in self.STATISTICS_FIELDS:
+                increment = new_statistics.get(domain, {}).get(field, 0) - old_statistics.get(domain, {}).get(field, 0)
+
+                if increment != 0:
+                    increments[field] = increment
+
+            if len(increments) > 0:
+                self.writer.update(
+                    self.statistics,
+                    { self.DOMAIN: domain },
+                    { '$inc': increments },
+                    upsert=True
+                )
+
+    def __update_summaries(
+            self,
+            old_endpoint_data: Dict[str, Any],
+            new_endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Keeps the usage collections and the statistics in line with a changed endpoint """
+        self.__update_usage(old_endpoint_data, new_endpoint_data)
+        self.__update_statistics(old_endpoint_data, new_endpoint_data)
+
+    def rebuild_statistics(self) -> None:
+        """ Recomputes the validity flags of all endpoints and recreates the statistics collection """
+        self.flush()
+        statistics = {}
+        endpoints = self.endpoints.find({}, {
+            self.ACCESS_URL: 1,
+            self.STATUS: 1,
+            self.DOMAINS: 1,
+            self.QUERY_EDITOR_NAME: 1,
+            **{amount_field: 1 for amount_field in self.STATISTICS_AMOUNTS}
+        })
+
+        def get_updates() -> Iterator[UpdateOne]:
+            for endpoint in endpoints:
+                for domain, endpoint_statistics in self.__get_statistics(endpoint).items():
+                    domain_statistics = statistics.setdefault(domain, {})
+
+                    for field, value in endpoint_statistics.items():
+                        domain_statistics[field] = domain_statistics.get(field, 0) + value
+
+                yield UpdateOne({ '_id': endpoint['_id'] }, { '$set': self.get_validity_flags(endpoint) })
+
+        self.__write_derived_fields(get_updates())
+
+        self.statistics.drop()
+        self.__create_indexes(self.statistics, self.STATISTICS_INDEXES)
+
+        for domain, domain_statistics in statistics.items():
+            self.writer.insert(self.statistics, { self.DOMAIN: domain, **domain_statistics })
+
+        self.flush()
+        self.__set_summary_built(self.STATISTICS_BUILT_ID)
+        # The statistics are rebuilt without endpoint revisions, so no revision marks the cached results as outdated
+        self.invalidate_results()
+
+    def __get_usage(
+            self,
+            endpoint_data: Dict[str, Any],
+            instance_array_name: str
+        ) -> Dict[tuple, int]:
+        """ Returns the endpoint's contribution to a usage collection keyed by (name, domain) """
+        usage = {}
+
+        if endpoint_data == None:
+            return usage
+
+        domains = self.__get_domain_keys(endpoint_data)
+
+        for instance in endpoint_data.get(instance_array_name) or []:
+            for domain in domains:
+                key = (instance[self.INSTANCE_NAME], domain)
+                usage[key] = usage.get(key, 0) + instance[self.INSTANCE_AMOUNT]
+
+        return usage
+
+    def __update_usage(
+            self,
+            old_endpoint_data: Dict[str, Any],
+            new_endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Buffers increments of the class and property usage collections by the difference between two versions of an endpoint """
+        for instance_array_name, usage_collection in self.usage_collections.items():
+            old_usage = self.__get_usage(old_endpoint_data, instance_array_name)
+            new_usage = self.__get_usage(new_endpoint_data, instance_array_name)
+
+            for key in old_usage.keys() | new_usage.keys():
+                total = new_usage.get(key, 0) - old_usage.get(key, 0)
+                endpoints_amount = int(key in new_usage) - int(key in old_usage)
+
+                if total == 0 and endpoints_amount == 0:
+                    continue
+
+                name, domain = key
+                self.writer.update(
+                    usage_collection,
+                    { self.INSTANCE_NAME: name, self.DOMAIN: domain },
+                    { '$inc': { self.TOTAL: total, self.ENDPOINTS_AMOUNT: endpoints_amount } },
+                    upsert=True
+                )
+
+    def rebuild_usage(self) -> None:
+        """ Recreates the class and property usage collections from the whole endpoint collection """
+        self.flush()
+
+        for instance_array_name, usage_collection in self.usage_collections.items():
+            usage = {}
+            endpoints = self.endpoints.find({}, {
+                self.DOMAINS: 1,
+                instance_array_name: 1,
+                **{encoded_field: 1 for encoded_field in self.ENCODED_INSTANCE_ARRAYS[instance_array_name]}
+            })
+
+            for endpoint in self.__decode_cursor(endpoints):
+                for key, total in self.__get_usage(endpoint, instance_array_name).items():
+                    totals = usage.setdefault(key, [0, 0])
+                    totals[0] += total
+                    totals[1] += 1
+
+            usage_collection.drop()
+            self.__create_indexes(usage_collection, self.USAGE_INDEXES)
+
+            for (name, domain), (total, endpoints_amount) in usage.items():
+                self.writer.insert(usage_collection, {
+                    self.INSTANCE_NAME: name,
+                    self.DOMAIN: domain,
+                    self.TOTAL: total,
+                    self.ENDPOINTS_AMOUNT: endpoints_amount
+                })
+
+        self.flush()
+        self.__set_summary_built(self.USAGE_BUILT_ID)
+        # The usage collections are rebuilt without endpoint writes, so no revision marks the cached results as outdated
+        self.invalidate_results()
+
+    def encode_endpoint(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns a copy of the endpoint where the used classes and properties are parallel arrays of IRI ids and amounts """
+        document = dict(endpoint_data)
+
+        for instance_array_name, (ids_field, amounts_field) in self.ENCODED_INSTANCE_ARRAYS.items():
+            if instance_array_name not in document:
+                continue
+
+            instances = document.pop(instance_array_name) or []
+            document[ids_field] = self.iri_dictionary.get_ids([instance[self.INSTANCE_NAME] for instance in instances])
+            document[amounts_field] = [instance[self.INSTANCE_AMOUNT] for instance in instances]
+
+        return document
+
+    def decode_endpoint(
+            self,
+            document: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Resolves the IRI ids of a stored endpoint back into the used classes and properties """
+        if document == None:
+            return None
+
+        for instance_array_name, (ids_field, amounts_field) in self.ENCODED_INSTANCE_ARRAYS.items():
+            if ids_field not in document:
+                continue
+
+            names = self.iri_dictionary.get_names(document.pop(ids_field))
+            amounts = document.pop(amounts_field, [])
+            document[instance_array_name] = [
+                { self.INSTANCE_NAME: name, self.INSTANCE_AMOUNT: amount }
+                for name, amount in zip(names, amounts)
+            ]
+
+        return document
+
+    def __get_encoded_update(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns the $set update of the endpoint that also removes the not encoded arrays of documents stored before the migration """
+        update = { '$set': self.encode_endpoint(endpoint_data) }
+        legacy_fields = {
+            instance_array_name: 1
+            for instance_array_name in self.ENCODED_INSTANCE_ARRAYS
+            if instance_array_name in endpoint_data
+        }
+
+        if len(legacy_fields) > 0:
+            update['$unset'] = legacy_fields
+
+        return update
+
+    def __get_instance_projection(self) -> Dict[str, int]:
+        """ Returns the projection of the used classes and properties in both the encoded and the not encoded form """
+        projection = {}
+
+        for instance_array_name, encoded_fields in self.ENCODED_INSTANCE_ARRAYS.items():
+            projection[instance_array_name] = 1
+
+            for encoded_field in encoded_fields:
+                projection[encoded_field] = 1
+
+        return projection
+
+    def __decode_cursor(
+            self,
+            cursor: Cursor
+        ) -> Iterator[Dict[str, Any]]:
+        for document in cursor:
+            yield self.decode_endpoint(document)
+
+    def get_encoded_instances(
+            self,
+            batch_size: int = 0
+        ) -> Iterator[Dict[str, Any]]:
+        """ Returns the access_url, domains and encoded instance arrays of the endpoints with used classes or properties """
+        # Endpoints that have not been migrated are encoded on the fly
+        endpoints = self.endpoints.find(
+            {
+                '$or': [
+                    { field: { '$exists': True } }
+                    for field in self.__get_instance_projection()
+                ]
+            },
+            {
+                self.ACCESS_URL: 1,
+                self.DOMAINS: 1,
+                **self.__get_instance_projection()
+            },
+            batch_size=batch_size
+        )
+
+        for endpoint in endpoints:
+            yield self.encode_endpoint(endpoint)
+
+    def migrate_iris(self) -> int:
+        """ Converts endpoints stored with full IRIs into the dictionary encoded form and returns the amount of converted endpoints """
+        self.flush()
+        endpoints = self.endpoints.find(
+            {
+                '$or': [
+                    { instance_array_name: { '$exists': True } }
+                    for instance_array_name in self.ENCODED_INSTANCE_ARRAYS
+                ]
+            },
+            {
+                self.ACCESS_URL: 1,
+                **self.__get_instance_projection()
+            }
+        )
+
+        return self.__write_derived_fields(
+            UpdateOne({ '_id': endpoint['_id'] }, self.__get_encoded_update(endpoint))
+            for endpoint in endpoints
+        )
+
+    def get_revision(self) -> int:
+        """ Returns the latest revision handed out to an endpoint change """
+        counter = self.meta.find_one({ '_id': self.REVISION_COUNTER_ID })
+
+        return counter[self.META_VALUE] if counter is not None else 0
+
+    def get_committed_revision(self) -> int:
+        """ Returns the latest revision up to which all endpoint changes have been written """
+        # Blocks still being written hold it back unless their reservation has timed out
+        counter = self.meta.find_one({ '_id': self.REVISION_COUNTER_ID })
+
+        if counter is None:
+            return 0
+
+        # Reservations of a crashed process are never released
+        expired_before = time.time() - float(self.config.get_db_config('revision_reservation_timeout', '3600'))
+        pending_revisions = [
+            reservation[self.RESERVATION_FIRST] - 1
+            for reservation in counter.get(self.REVISION_RESERVATIONS, [])
+            if reservation[self.RESERVED_AT] >= expired_before
+        ]
+
+        return min([counter[self.META_VALUE], *pending_revisions])
+
+    def get_dump_revision(self) -> int:
+        """ Returns the revision up to which the endpoints have been exported by the last dump """
+        dump_revision = self.meta.find_one({ '_id': self.DUMP_REVISION_ID })
+
+        return dump_revision[self.META_VALUE] if dump_revision is not None else 0
+
+    def set_dump_revision(
+            self,
+            revision: int
+        ) -> None:
+        """ Records the revision up to which the endpoints have been exported so that the next delta starts from there """
+        self.meta.update_one(
+            { '_id': self.DUMP_REVISION_ID },
+            { '$set': { self.META_VALUE: revision, self.UPDATED_AT: datetime.now(timezone.utc) } },
+            upsert=True
+        )
+
+    def get_changes(
+            self,
+            since: int,
+            until: int,
+            batch_size: int = 0,
+            exclude_internal: bool = False
+        ) -> Iterator[Dict[str, Any]]:
+        """ Yields the endpoint upserts and deletions with a revision after since and up to until, ordered by revision """
+        revision_range = { '$gt': since, '$lte': until }
+        if since <= 0:
+            # Endpoints stored before revisions were introduced have none and belong to the first delta
+            revision_range = { '$not': { '$gt': until } }
+
+        endpoints = self.endpoints.find(
+            { self.REVISION: revision_range },
+            self.__get_dump_projection(exclude_internal),
+            batch_size=batch_size
+        ).sort(self.REVISION, ASCENDING)
+        upserts = (
+            {
+                self.CHANGE_OPERATION: self.CHANGE_UPSERT,
+                self.REVISION: endpoint.get(self.REVISION, 0),
+                self.CHANGE_ENDPOINT: endpoint
+            }
+            for endpoint in self.__decode_cursor(endpoints)
+        )
+        deletions = (
+            {
+                self.CHANGE_OPERATION: self.CHANGE_DELETE,
+                self.REVISION: tombstone[self.REVISION],
+                self.ACCESS_URL: tombstone[self.ACCESS_URL]
+            }
+            for tombstone in self.tombstones.find({ self.REVISION: { '$gt': since, '$lte': until } }).sort(self.REVISION, ASCENDING)
+        )
+
+        return heapq.merge(upserts, deletions, key=lambda change: change[self.REVISION])
+
+    def __reserve_revisions(
+            self,
+            amount: int
+        ) -> int:
+        """ Reserves a block of consecutive revisions, records it as pending until it is released and returns the first one """
+        while True:
+            counter = self.meta.find_one({ '_id': self.REVISION_COUNTER_ID }, { self.META_VALUE: 1 })
+            revision = counter[self.META_VALUE] if counter is not None else 0
+
+            try:
+                # Compare-and-set, so that the counter and the pending block change in one atomic update
+                result = self.meta.update_one(
+                    { '_id': self.REVISION_COUNTER_ID, self.META_VALUE: revision },
+                    {
+                        '$set': { self.META_VALUE: revision + amount },
+                        '$push': {
+                            self.REVISION_RESERVATIONS: { self.RESERVATION_FIRST: revision + 1, self.RESERVED_AT: time.time() }
+                        }
+                    },
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                # Another writer has created or moved the counter in the meantime
+                continue
+
+            if result.matched_count > 0 or result.upserted_id is not None:
+                return revision + 1
+
+    def __release_revisions(
+            self,
+            first_revision: int
+        ) -> None:
+        """ Releases a reserved block once its writes have returned, which lets the committed revision pass it """
+        self.meta.update_one(
+            { '_id': self.REVISION_COUNTER_ID },
+            { '$pull': { self.REVISION_RESERVATIONS: { self.RESERVATION_FIRST: first_revision } } }
+        )
+
+    def __prepare_operations(
+            self,
+            collection: Collection,
+            operations: list
+        ) -> None:
+        """ Stamps the flushed endpoint writes with revisions and holds back the increments of summaries that have not been built yet """
+        if collection.full_name == self.endpoints.full_name:
+            self.__stamp_revisions(operations)
+            return
+
+        summary_id = self.__get_summary_id(collection)
+
+        if summary_id != None and not self.is_summary_built(summary_id):
+            # On a database from before the summaries, increments would only count the endpoints changed since; the first rebuild counts all of them
+            operations[:] = [
+                operation
+                for operation in operations
+                if operation['kind'] != BulkWriter.UPDATE or '$inc' not in operation['update']
+            ]
+
+    def __get_summary_id(
+            self,
+            collection: Collection
+        ) -> str:
+        """ Returns the meta id that marks the summary collection as built or None for other collections """
+        if collection.full_name in [usage_collection.full_name for usage_collection in self.usage_collections.values()]:
+            return self.USAGE_BUILT_ID
+
+        if collection.full_name == self.statistics.full_name:
+            return self.STATISTICS_BUILT_ID
+
+        return None
+
+    def is_summary_built(
+            self,
+            summary_id: str
+        ) -> bool:
+        """ Checks whether the summary has been built from all endpoints, so that it can be maintained incrementally """
+        if summary_id in DB.__built_summaries:
+            return True
+
+        if self.meta.find_one({ '_id': summary_id }) is None:
+            return False
+
+        DB.__built_summaries.add(summary_id)
+
+        return True
+
+    def __set_summary_built(
+            self,
+            summary_id: str
+        ) -> None:
+        self.meta.update_one(
+            { '_id': summary_id },
+            { '$set': { self.META_VALUE: True, self.UPDATED_AT: datetime.now(timezone.utc) } },
+            upsert=True
+        )
+        DB.__built_summaries.add(summary_id)
+
+    def __stamp_revisions(
+            self,
+            operations: list
+        ) -> None:
+        """ Stamps the buffered endpoint writes with consecutive revisions and the time of the flush """
+        first_revision = self.__reserve_revisions(len(operations))
+        revision = first_revision
+        updated_at = datetime.now(timezone.utc)
+
+        for operation in operations:
+            operation[self.RESERVATION] = first_revision
+            stamp = { self.REVISION: revision, self.UPDATED_AT: updated_at }
+
+            if operation['kind'] == BulkWriter.INSERT:
+                operation['document'].update(stamp)
+            else:
+                operation['update'].setdefault('$set', {}).update(stamp)
+
+            revision += 1
+
+    def __write_derived_fields(
+            self,
+            updates: Iterable[UpdateOne]
+        ) -> int:
+        """ Writes recomputed derived fields of stored endpoints and returns the amount of updates """
+        # Derived fields are no content change, so unlike the buffered writes they get no revision
+        batch_size = int(self.config.get_db_config('bulk_batch_size', '500'))
+        amount = 0
+        batch = []
+
+        for update in itertools.chain(updates, [None]):
+            if update != None:
+                batch.append(update)
+                amount += 1
+
+            if len(batch) > 0 and (len(batch) >= batch_size or update == None):
+                try:
+                    self.endpoints.bulk_write(batch, ordered=False)
+                except BulkWriteError as e:
+                    write_errors = e.details.get('writeErrors', [])
+                    print(f'Could not update {len(write_errors)} endpoints: {write_errors[0]["errmsg"] if len(write_errors) > 0 else e}')
+
+                batch = []
+
+        return amount
+
+    def __release_stamped_revisions(
+            self,
+            collection: Collection,
+            operations: list
+        ) -> None:
+        """ Releases the revisions of the flushed endpoint writes once the bulk write has returned """
+        if collection.full_name != self.endpoints.full_name or self.RESERVATION not in operations[0]:
+            return
+
+        self.__release_revisions(operations[0][self.RESERVATION])
+
+    def invalidate_results(self) -> None:
+        """ Removes all cached analytics results, for writes that do not hand out a revision """
+        self.result_cache.delete_many({})
+
+    def flush(self) -> None:
+        """ Writes all buffered endpoint saves and updates """
+        if DB.__writer is not None:
+            DB.__writer.flush()
+
+    def get_fingerprint(
+            self,
+            endpoint_data: Dict[str, Any]
         ) -> Any:
-        """ Updates existing endpoint with new data """
+        """ Returns a hash over the endpoint's amounts and sorted class and property histograms or None when there is nothing to compare """
+        for field in (self.TRIPLES_AMOUNT, self.USED_CLASSES, self.USED_PROPERTIES):
+            if field not in endpoint_data:
+                return None
 
-        if self.get_endpoint(endpoint_data[self.ACCESS_URL]):
-            return self.endpoints.update_one(
-                { self.ACCESS_URL: endpoint_data[self.ACCESS_URL] },
-                { '$set': endpoint_data }
-            )
+        if endpoint_data[self.TRIPLES_AMOUNT] == -1:
+            return None
+
+        canonical_data = [
+            endpoint_data[self.TRIPLES_AMOUNT],
+            endpoint_data.get(self.CLASSES_AMOUNT),
+            endpoint_data.get(self.INSTANCES_AMOUNT),
+            endpoint_data.get(self.USED_PROPERTIES_AMOUNT),
+            sorted([instance[self.INSTANCE_NAME], instance[self.INSTANCE_AMOUNT]] for instance in endpoint_data[self.USED_CLASSES]),
+            sorted([instance[self.INSTANCE_NAME], instance[self.INSTANCE_AMOUNT]] for instance in endpoint_data[self.USED_PROPERTIES])
+        ]
 
+        return hashlib.sha1(json.dumps(canonical_data, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def get_minhash(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> list:
+        """ Returns the MinHash signature over the names of the endpoint's used classes and properties """
+        tokens = []
+
+        for instance in endpoint_data.get(self.USED_CLASSES) or []:
+            tokens.append('c ' + instance[self.INSTANCE_NAME])
+
+        for instance in endpoint_data.get(self.USED_PROPERTIES) or []:
+            tokens.append('p ' + instance[self.INSTANCE_NAME])
+
+        return self.minhash.get_signature(tokens)
+
+    def __set_signatures(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Stores the fingerprint and the MinHash signature with the endpoint data if the data contains the harvested amounts """
+        fingerprint = self.get_fingerprint(endpoint_data)
+
+        if fingerprint != None:
+            endpoint_data[self.FINGERPRINT] = fingerprint
+
+        if self.USED_CLASSES in endpoint_data or self.USED_PROPERTIES in endpoint_data:
+            signature = self.get_minhash(endpoint_data)
+            endpoint_data[self.MINHASH] = signature
+            endpoint_data[self.MINHASH_BANDS] = self.minhash.get_band_keys(signature)
 
     def get_duplicate(
             self,
-            access_url: str
+            endpoint_data: Dict[str, Any]
         ) -> Any:
         """ Check whether the results correspond to an existing record endpoint record and return the original record  """
-        endpoint = self.get_endpoint(access_url)
+        fingerprint = endpoint_data.get(self.FINGERPRINT) or self.get_fingerprint(endpoint_data)
 
-        if endpoint == None:
-            return None
-        
-        if endpoint[DB.TRIPLES_AMOUNT] == -1:
+        if fingerprint == None:
             return None
 
-        result = self.endpoints.aggregate([
+        access_url = endpoint_data[self.ACCESS_URL]
+        pending_duplicate = self.writer.find_pending(
+            self.endpoints,
+            lambda document: document.get(self.FINGERPRINT) == fingerprint
+                and document.get(self.ACCESS_URL) != access_url
+                and document.get(self.STATUS) == self.STATUS_OK
+        )
+
+        if pending_duplicate != None:
+            return self.decode_endpoint(dict(pending_duplicate))
+
+        return self.decode_endpoint(self.endpoints.find_one({
+            self.FINGERPRINT: fingerprint,
+            self.STATUS: self.STATUS_OK,
+            self.ACCESS_URL: {
+                '$ne': access_url
+            }
+        }))
+
+    def get_similar_endpoints(
+            self,
+            endpoint_data: Dict[str, Any],
+            threshold: float,
+            limit: int = 50
+        ) -> list:
+        """ Returns endpoints whose estimated Jaccard similarity of classes and properties is at least the threshold, most similar first """
+        signature = endpoint_data.get(self.MINHASH) or self.get_minhash(endpoint_data)
+
+        if len(signature) == 0:
+            return []
+
+        access_url = endpoint_data[self.ACCESS_URL]
+        band_keys = self.minhash.get_band_keys(signature)
+        stored_candidates = self.endpoints.find(
             {
-                '$match': {
-                    DB.TRIPLES_AMOUNT: endpoint[DB.TRIPLES_AMOUNT],
-                    DB.CLASSES_AMOUNT: endpoint[DB.CLASSES_AMOUNT],
-                    DB.USED_PROPERTIES: endpoint[DB.USED_PROPERTIES],
-                    DB.USED_CLASSES: endpoint[DB.USED_CLASSES],
-                    DB.CLASSES_AMOUNT: endpoint[DB.CLASSES_AMOUNT],
-                    DB.ACCESS_URL: {
-                        '$ne': access_url
-                    } 
+                self.MINHASH_BANDS: {
+                    '$in': band_keys
+                },
+                self.ACCESS_URL: {
+                    '$ne': access_url
                 }
+            },
+            {
+                self.ACCESS_URL: 1,
+                self.STATUS: 1,
+                self.MINHASH: 1,
+                '_id': 0
             }
-        ])
+        )
+        candidates = {candidate[self.ACCESS_URL]: candidate for candidate in stored_candidates}
+
+        # Buffered writes are newer than the stored endpoints; a buffered signature replaces the stored one
+        band_keys = set(band_keys)
+        for document in self.writer.get_pending(self.endpoints):
+            candidate_access_url = document.get(self.ACCESS_URL)
+
+            if candidate_access_url == None or candidate_access_url == access_url:
+                continue
+
+            if self.MINHASH in document and band_keys.isdisjoint(document.get(self.MINHASH_BANDS) or []):
+                candidates.pop(candidate_access_url, None)
+            elif self.MINHASH in document or candidate_access_url in candidates:
+                candidates[candidate_access_url] = {**candidates.get(candidate_access_url, {}), **document}
+
+        similar_endpoints = []
+
+        for candidate in candidates.values():
+            similarity = MinHash.get_similarity(signature, candidate[self.MINHASH])
+
+            if similarity >= threshold:
+                similar_endpoints.append({
+                    self.ACCESS_URL: candidate[self.ACCESS_URL],
+                    self.STATUS: candidate.get(self.STATUS),
+                    'similarity': similarity
+                })
 
-        if len(list(result)) > 0:
-            return result
+        similar_endpoints.sort(key=lambda endpoint: endpoint['similarity'], reverse=True)
+
+        return similar_endpoints[:limit]
+
+    def rebuild_fingerprints(self) -> int:
+        """ Recomputes the fingerprints and MinHash signatures of all stored endpoints and returns the amount of processed endpoints """
+        self.flush()
+        endpoints = self.endpoints.find({}, {
+            self.ACCESS_URL: 1,
+            self.TRIPLES_AMOUNT: 1,
+            self.CLASSES_AMOUNT: 1,
+            self.INSTANCES_AMOUNT: 1,
+            self.USED_PROPERTIES_AMOUNT: 1,
+            **self.__get_instance_projection()
+        })
+
+        return self.__write_derived_fields(
+            UpdateOne({ '_id': endpoint['_id'] }, self.__get_signature_update(endpoint))
+            for endpoint in self.__decode_cursor(endpoints)
+        )
+
+    def __get_signature_update(
+            self,
+            endpoint: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns the update that sets the recomputed fingerprint and MinHash signature of a stored endpoint """
+        fingerprint = self.get_fingerprint(endpoint)
+        signature = self.get_minhash(endpoint)
+        update = {
+            '$set': {
+                self.MINHASH: signature,
+                self.MINHASH_BANDS: self.minhash.get_band_keys(signature)
+            }
+        }
+
+        if fingerprint != None:
+            update['$set'][self.FINGERPRINT] = fingerprint
+        else:
+            update['$unset'] = { self.FINGERPRINT: 1 }
+
+        return update
 
     def endpoint_has_custom_query(
             self,
@@ -137,7 +1398,10 @@ class DB:
             access_url: str
         ) -> Any:
         """ Returns an endpoint from the endpoint collection by access_url """
-        return self.endpoints.find_one({'access_url': access_url})
+        if DB.__writer is not None and DB.__writer.is_pending(access_url):
+            self.flush()
+
+        return self.decode_endpoint(self.endpoints.find_one({'access_url': access_url}))
 
     def delete_queries(
             self, 
@@ -149,25 +1413,130 @@ class DB:
         for query in queries:
             unset_fields[query] = 1
 
-        return self.endpoints.update_many(
-            {},
-            {
-                '$unset': unset_fields
-            }
-        )
+        self.flush()
+        revision = self.__reserve_revisions(1)
+
+        try:
+            return self.endpoints.update_many(
+                {
+                    '$or': [{ query: { '$exists': True } } for query in queries]
+                },
+                {
+                    '$unset': unset_fields,
+                    '$set': {
+                        self.REVISION: revision,
+                        self.UPDATED_AT: datetime.now(timezone.utc)
+                    }
+                }
+            )
+        finally:
+            self.__release_revisions(revision)
 
     def drop_all_collections(self) -> None:
         """ Drops the whole endpoint collection alongisde with the database """
+        self.flush()
         self.endpoints.drop()
 
+        for usage_collection in self.usage_collections.values():
+            usage_collection.drop()
+
+        self.statistics.drop()
+        self.iris.drop()
+        self.tombstones.drop()
+        # The snapshots reference the dropped IRI ids
+        self.snapshots.drop()
+        self.snapshot_runs.drop()
+        self.snapshot_heads.drop()
+        self.metrics.drop()
+        self.invalidate_results()
+        self.meta.delete_one({ '_id': IRIDictionary.COUNTER_ID })
+        self.iri_dictionary.reset()
+
     def get_endpoint_collection(
         self, 
-        filters: dict = {}
-    ) -> Cursor:
-        """ Returns whole collection of endpoints """
-        return self.endpoints.find(filters)
+        filters: dict = {},
+        batch_size: int = 0,
+        exclude_internal: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """ Returns whole collection of endpoints fetched in batches of batch_size (0 for the server default) """
+        return self.__decode_cursor(self.endpoints.find(filters, self.__get_dump_projection(exclude_internal), batch_size=batch_size))
+
+    def __get_dump_projection(
+            self,
+            exclude_internal: bool
+        ) -> Any:
+        if exclude_internal == False:
+            return None
+
+        return {field: 0 for field in self.INTERNAL_FIELDS}
+
+    def get_access_urls(
+            self,
+            filters: dict = {}
+        ) -> list:
+        """ Returns the access URLs of the endpoints without fetching the endpoints themselves """
+        return [endpoint[self.ACCESS_URL] for endpoint in self.endpoints.find(filters, {self.ACCESS_URL: 1, '_id': 0})]
+
+    def get_partition_filters(
+            self,
+            filters: dict,
+            partitions: int,
+            partition_by: str = PARTITION_BY_ID
+        ) -> list:
+        """ Splits the endpoints matching the filters into at most the given amount of disjoint partitions, returning one filter per partition """
+        if partition_by == self.PARTITION_BY_DOMAIN:
+            return self.__get_domain_partition_filters(filters, partitions)
+
+        buckets = list(self.endpoints.aggregate([
+            { '$match': filters },
+            { '$project': { '_id': 1 } },
+            { '$bucketAuto': { 'groupBy': '$_id', 'buckets': partitions } }
+        ], allowDiskUse=True))
+        partition_filters = []
+
+        for index, bucket in enumerate(buckets):
+            # Bucket bounds are exclusive except for the upper bound of the last bucket
+            upper_bound = '$lte' if index == len(buckets) - 1 else '$lt'
+            partition_filters.append({
+                '$and': [filters, { '_id': { '$gte': bucket['_id']['min'], upper_bound: bucket['_id']['max'] } }]
+            })
+
+        return partition_filters
+
+    def __get_domain_partition_filters(
+            self,
+            filters: dict,
+            partitions: int
+        ) -> list:
+        """ Groups the endpoints by their first domain and balances the domains across the partitions by endpoint count """
+        domain_field = f'{self.DOMAINS}.0'
+        counts = self.endpoints.aggregate([
+            { '$match': filters },
+            { '$group': { '_id': { '$arrayElemAt': ['$' + self.DOMAINS, 0] }, 'amount': { '$sum': 1 } } },
+            { '$sort': { 'amount': -1 } }
+        ], allowDiskUse=True)
+        groups = [{ 'domains': [], 'amount': 0 } for _ in range(partitions)]
+
+        for count in counts:
+            group = min(groups, key=lambda group: group['amount'])
+            group['domains'].append(count['_id'])
+            group['amount'] += count['amount']
+
+        partition_filters = []
+        for group in groups:
+            if len(group['domains']) == 0:
+                continue
+
+            domains = [domain for domain in group['domains'] if domain != None]
+            conditions = [{ domain_field: { '$in': domains } }]
+            if None in group['domains']:
+                conditions.append({ domain_field: { '$exists': False } })
+
+            partition_filters.append({ '$and': [filters, { '$or': conditions }] })
 
-    def get_endpoint_collection_totals(self, domain=None) -> Cursor:
+        return partition_filters
+
+    def get_endpoint_collection_totals(self, domain=None, include_domains=False) -> Cursor:
         """ Returns whole collection of endpoints """
         conditions = {self.STATUS: self.STATUS_OK}
 
@@ -176,7 +1545,28 @@ class DB:
                 '$in': [domain]
             }
 
-        return self.endpoints.find(conditions, {
+        return self.__find_totals(conditions, include_domains)
+
+    def get_endpoint_collection_totals_by_domain(self) -> Dict[str, list]:
+        """ Returns the totals of active endpoints grouped by domain, reading the collection once """
+        totals = {domain: [] for domain in self.get_domains()}
+
+        for endpoint in self.__find_totals({self.STATUS: self.STATUS_OK}, include_domains=True):
+            domains = endpoint.pop(self.DOMAINS, None) or []
+
+            for domain in dict.fromkeys(domains):
+                if domain in totals:
+                    totals[domain].append(endpoint)
+
+        return totals
+
+    def __find_totals(
+            self,
+            conditions: dict,
+            include_domains: bool = False
+        ) -> Cursor:
+        """ Finds the general amounts of the matching endpoints, the largest first """
+        projection = {
             self.ACCESS_URL:1, 
             self.TRIPLES_AMOUNT: 1, 
             self.CLASSES_AMOUNT: 1, 
@@ -184,8 +1574,13 @@ class DB:
             self.USED_PROPERTIES_AMOUNT: 1,
             self.UNIQUE_SUBJECTS_AMOUNT: 1,
             self.AVERAGE_UNIQUE_SUBJECTS_AMOUNT: 1,
-            self.TRIPLES_AMOUNT:1, 
-            '_id': 0}).sort([
+            '_id': 0
+        }
+
+        if include_domains:
+            projection[self.DOMAINS] = 1
+
+        return self.endpoints.find(conditions, projection).sort([
                 [self.TRIPLES_AMOUNT, -1], 
                 [self.CLASSES_AMOUNT, -1], 
                 [self.INSTANCES_AMOUNT, -1]
@@ -195,481 +1590,211 @@ class DB:
             self,
             access_url: str
         ):
-        """ Deletes an existing endpoint by the access_url """
-        return self.endpoints.delete_one({
+        """ Deletes an existing endpoint by the access_url and leaves a tombstone for delta dumps """
+        existing_endpoint = self.get_endpoint(access_url)
+        self.flush()
+
+        result = self.endpoints.delete_one({
             self.ACCESS_URL: access_url
         })
+
+        if result.deleted_count > 0:
+            self.__update_summaries(existing_endpoint, None)
+            revision = self.__reserve_revisions(1)
+
+            try:
+                self.tombstones.update_one(
+                    { self.ACCESS_URL: access_url },
+                    {
+                        '$set': {
+                            self.REVISION: revision,
+                            self.UPDATED_AT: datetime.now(timezone.utc)
+                        }
+                    },
+                    upsert=True
+                )
+            finally:
+                self.__release_revisions(revision)
+
+        return result
     
-    def get_domains(self) -> None:
+    def get_domains(self) -> list:
+        """ Returns the names of all domains the endpoints belong to in descending order """
+        domains = [domain for domain in self.endpoints.distinct(self.DOMAINS) if domain != None]
+
+        return sorted(domains, reverse=True)
+    
+    def get_most_used_instances(
+            self,
+            instance_array_name: str,
+            domain: str = None,
+            limit: int = 50
+        ) -> Any:
         """ Retrievs the most used instances accross endpoints """
-        return self.endpoints.aggregate([
-            {
-                '$unwind': {
-                    'path': f'${self.DOMAINS}'
-                },
-            },
+        usage_collection = self.usage_collections[instance_array_name]
+
+        if not self.is_summary_built(self.USAGE_BUILT_ID):
+            print('Building the usage collections...')
+            self.rebuild_usage()
+
+        return usage_collection.find(
             {
-                '$group': {
-                    '_id': f'${self.DOMAINS}'
+                self.DOMAIN: domain,
+                self.ENDPOINTS_AMOUNT: {
+                    '$gt': 0
                 }
             },
             {
-                '$sort': {
-                    '_id': -1
-                }
+                self.INSTANCE_NAME: 1,
+                self.TOTAL: 1,
+                '_id': 0
             }
-        ])
+        ).sort([(self.TOTAL, DESCENDING)]).limit(limit)
     
-    def get_most_used_instances(
+    def get_most_used_instances_by_domain(
             self,
             instance_array_name: str,
-            domain: str = None,
             limit: int = 50
-        ) -> Any:
-        """ Retrievs the most used instances accross endpoints """
-        pipeline = [
+        ) -> Dict[str, list]:
+        """ Retrievs the most used instances of every domain """
+        # Each domain's top is a bounded read of the (domain, total) index
+        return {
+            domain: list(self.get_most_used_instances(instance_array_name, domain, limit))
+            for domain in self.get_domains()
+        }
+
+    def save_query_metrics(
+            self,
+            metrics: Dict[str, Any]
+        ) -> None:
+        """ Buffers the query timings of an endpoint harvest """
+        self.writer.insert(self.metrics, metrics)
+
+    def get_slowest_endpoints(
+            self,
+            limit: int = 50
+        ) -> list:
+        """ Returns the endpoints with the longest harvests, averaged over their harvests """
+        return list(self.metrics.aggregate([
             {
-                '$unwind': {
-                    'path': f'${instance_array_name}'
+                '$group': {
+                    '_id': '$access_url',
+                    'host': { '$last': '$host' },
+                    'harvests_amount': { '$sum': 1 },
+                    'average_duration_ms': { '$avg': '$duration_ms' },
+                    'max_duration_ms': { '$max': '$duration_ms' },
+                    'last_harvest_at': { '$max': '$started_at' }
                 }
             },
+            { '$sort': { 'average_duration_ms': DESCENDING } },
+            { '$limit': limit }
+        ], allowDiskUse=True))
+
+    def get_phase_timings(self) -> list:
+        """ Returns the duration, response size and outcomes of the queries of every phase, the slowest phase first """
+        return list(self.metrics.aggregate([
+            { '$unwind': '$phases' },
+            { '$unwind': '$phases.queries' },
             {
                 '$group': {
-                    '_id': {
-                            self.INSTANCE_NAME: f'${instance_array_name}.{self.INSTANCE_NAME}'
-                        },
-                    'name': {
-                        '$first':  f'${instance_array_name}.{self.INSTANCE_NAME}'
-                    },
-                    'total': {
-                        '$sum': f'${instance_array_name}.{self.INSTANCE_AMOUNT}'
-                    },
+                    '_id': { 'phase': '$phases.phase', 'variant': '$phases.queries.variant' },
+                    'queries_amount': { '$sum': 1 },
+                    'total_duration_ms': { '$sum': '$phases.queries.duration_ms' },
+                    'average_duration_ms': { '$avg': '$phases.queries.duration_ms' },
+                    'max_duration_ms': { '$max': '$phases.queries.duration_ms' },
+                    'total_size': { '$sum': '$phases.queries.size' },
+                    'timeouts_amount': { '$sum': { '$cond': [{ '$eq': ['$phases.queries.outcome', 'timeout'] }, 1, 0] } },
+                    'errors_amount': { '$sum': { '$cond': [{ '$eq': ['$phases.queries.outcome', 'error'] }, 1, 0] } },
+                    'won_amount': { '$sum': { '$cond': [{ '$eq': ['$phases.variant', '$phases.queries.variant'] }, 1, 0] } }
                 }
             },
             {
-                '$unset': '_id'
+                '$group': {
+                    '_id': '$_id.phase',
+                    'queries_amount': { '$sum': '$queries_amount' },
+                    'total_duration_ms': { '$sum': '$total_duration_ms' },
+                    'max_duration_ms': { '$max': '$max_duration_ms' },
+                    'total_size': { '$sum': '$total_size' },
+                    'timeouts_amount': { '$sum': '$timeouts_amount' },
+                    'errors_amount': { '$sum': '$errors_amount' },
+                    'variants': {
+                        '$push': {
+                            'variant': '$_id.variant',
+                            'queries_amount': '$queries_amount',
+                            'average_duration_ms': '$average_duration_ms',
+                            'timeouts_amount': '$timeouts_amount',
+                            'errors_amount': '$errors_amount',
+                            'won_amount': '$won_amount'
+                        }
+                    }
+                }
             },
+            { '$sort': { 'total_duration_ms': DESCENDING } }
+        ], allowDiskUse=True))
+
+    def get_host_timings(
+            self,
+            limit: int = 50
+        ) -> list:
+        """ Returns the hosts that took the longest to harvest in total with the share of timed out queries """
+        return list(self.metrics.aggregate([
+            { '$unwind': { 'path': '$phases', 'preserveNullAndEmptyArrays': True } },
+            { '$unwind': { 'path': '$phases.queries', 'preserveNullAndEmptyArrays': True } },
             {
-                '$sort': {
-                    'total': -1
+                '$group': {
+                    '_id': '$_id',
+                    'host': { '$first': '$host' },
+                    'access_url': { '$first': '$access_url' },
+                    'duration_ms': { '$first': '$duration_ms' },
+                    'queries_amount': { '$sum': { '$cond': [{ '$ifNull': ['$phases.queries.variant', False] }, 1, 0] } },
+                    'timeouts_amount': { '$sum': { '$cond': [{ '$eq': ['$phases.queries.outcome', 'timeout'] }, 1, 0] } }
                 }
             },
-            {
-                '$limit': limit
-            }
-        ]
-
-        if domain != None:
-            pipeline.insert(0, {
-                    '$match': {
-                        self.DOMAINS: domain
-                    }
-                })
-
-            pipeline.insert(0, {
-                    '$unwind': {
-                        'path': f'${self.DOMAINS}'
-                    }
-                })
-                    
-        return self.endpoints.aggregate(pipeline)
-    
-    def get_statistics(
-            self, 
-            separate: bool = False
-        ) -> Any:
-        """ Get statistics across all amounts from the collection """
-        pipeline = [
             {
                 '$group': {
-                    '_id': '',
-                    'endpoints_amount': {
-                        '$sum': 1
-                    },
-                    "active_endpoints_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { "$eq": [ "$status", f'{self.STATUS_OK}' ] }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "failed_endpoints_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { "$eq": [ "$status", f'{self.STATUS_FAIL}' ] }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "unknown_endpoints_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { "$eq": [ "$status", f'{self.STATUS_UNKNOWN}' ] }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "duplicate_endpoints_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { "$eq": [ "$status", f'{self.STATUS_DUPLICATE}' ] }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_triple_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.TRIPLES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    DB.TRIPLES_AMOUNT: {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.TRIPLES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-
-                                            ]
-                                        }, 
-                                        "then": f"${self.TRIPLES_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_class_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.CLASSES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.CLASSES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.CLASSES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    DB.CLASSES_AMOUNT: {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.CLASSES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.CLASSES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.CLASSES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-
-                                            ]
-                                        }, 
-                                        "then": f"${self.CLASSES_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_instance_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.INSTANCES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.INSTANCES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.INSTANCES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    DB.INSTANCES_AMOUNT: {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.INSTANCES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.INSTANCES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.INSTANCES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-
-                                            ]
-                                        }, 
-                                        "then": f"${self.INSTANCES_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_property_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                { "$gt": [ f"${self.USED_PROPERTIES_AMOUNT}", 0 ] },
-                                                { '$ne': [ f"${self.USED_PROPERTIES_AMOUNT}", 10000 ] },
-                                                { '$ne': [ f"${self.USED_PROPERTIES_AMOUNT}", 100000 ] },
-                                                { '$eq': [ f'${self.STATUS}', self.STATUS_OK] }
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    DB.USED_PROPERTIES_AMOUNT: {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.USED_PROPERTIES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.USED_PROPERTIES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.USED_PROPERTIES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": f"${self.USED_PROPERTIES_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_unique_subject_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": {
-                                            '$and': [
-                                                {"$gt": [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 50000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 250000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 1000000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    }, 
-                    DB.UNIQUE_SUBJECTS_AMOUNT: {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 50000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 250000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 1000000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": f"${self.UNIQUE_SUBJECTS_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "can_get_average_unique_subject_amount": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": {
-                                            '$and': [
-                                                {"$gt": [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 50000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 250000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 1000000 ]},
-                                                {"$gt": [ f"${self.TRIPLES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    'totals_triples_for_subjects_avg': {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    {
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 50000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 250000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 1000000 ]},
-                                                {"$gt": [ f"${self.TRIPLES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        },
-                                        "then": f"${self.TRIPLES_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    'totals_unique_subjects_for_subjects_avg': {
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    {
-                                        "case": { 
-                                            '$and': [
-                                                {"$gt": [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 50000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 100000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 250000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 500000 ]},
-                                                {'$ne': [ f"${self.UNIQUE_SUBJECTS_AMOUNT}", 1000000 ]},
-                                                {"$gt": [ f"${self.TRIPLES_AMOUNT}", 0 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 10000 ]},
-                                                {'$ne': [ f"${self.TRIPLES_AMOUNT}", 100000 ]},
-                                                {'$eq': [ f'${self.STATUS}', self.STATUS_OK]}
-                                            ]
-                                        },
-                                        "then": f"${self.UNIQUE_SUBJECTS_AMOUNT}"
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    },
-                    "is_virtuoso": { 
-                        "$sum": { 
-                            "$switch": { 
-                                "branches": [ 
-                                    { 
-                                        "case": { "$eq": [ f"${self.QUERY_EDITOR_NAME}", 'Virtuoso' ] }, 
-                                        "then": 1
-                                    }
-                                ],
-                                'default': 0
-                            }
-                        }
-                    }
+                    '_id': '$host',
+                    'endpoints': { '$addToSet': '$access_url' },
+                    'harvests_amount': { '$sum': 1 },
+                    'total_duration_ms': { '$sum': '$duration_ms' },
+                    'queries_amount': { '$sum': '$queries_amount' },
+                    'timeouts_amount': { '$sum': '$timeouts_amount' }
                 }
             },
             {
-                '$sort': {
-                    '_id': 1
+                '$project': {
+                    'endpoints_amount': { '$size': '$endpoints' },
+                    'harvests_amount': 1,
+                    'total_duration_ms': 1,
+                    'queries_amount': 1,
+                    'timeouts_amount': 1
                 }
-            }
-        ]
+            },
+            { '$sort': { 'total_duration_ms': DESCENDING } },
+            { '$limit': limit }
+        ], allowDiskUse=True))
+
+    def get_statistics(
+            self, 
+            separate: bool = False
+        ) -> list:
+        """ Get statistics across all amounts from the collection """
+        # The rebuild also sets the validity flags of endpoints stored before the statistics
+        if not self.is_summary_built(self.STATISTICS_BUILT_ID):
+            print('Building the statistics...')
+            self.rebuild_statistics()
 
-        if separate == True:
-            pipeline[0]['$group']['_id'] = f'${self.DOMAINS}'
+        filters = {
+            self.DOMAIN: { '$ne': None } if separate == True else None,
+            'endpoints_amount': { '$gt': 0 }
+        }
+        statistics = []
 
-            pipeline.insert(0, {
-                '$unwind': {
-                    'path': f'${self.DOMAINS}'
-                },
-            })
+        for domain_statistics in self.statistics.find(filters).sort([(self.DOMAIN, ASCENDING)]):
+            result = { '_id': domain_statistics[self.DOMAIN] if separate == True else '' }
+
+            for field in self.STATISTICS_FIELDS:
+                result[field] = domain_statistics.get(field, 0)
+
+            statistics.append(result)
 
-        return self.endpoints.aggregate(pipeline)
\ No newline at end of file
+        return statistics
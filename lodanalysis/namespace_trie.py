@@ -0,0 +1,157 @@
+from typing import Dict, Tuple
+
+class NamespaceTrie:
+    """
+    Prefix trie for splitting IRIs into a namespace and a local name
+    """
+    WELL_KNOWN_PREFIXES = {
+        'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+        'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
+        'owl': 'http://www.w3.org/2002/07/owl#',
+        'xsd': 'http://www.w3.org/2001/XMLSchema#',
+        'skos': 'http://www.w3.org/2004/02/skos/core#',
+        'skosxl': 'http://www.w3.org/2008/05/skos-xl#',
+        'dc': 'http://purl.org/dc/elements/1.1/',
+        'dcterms': 'http://purl.org/dc/terms/',
+        'dctype': 'http://purl.org/dc/dcmitype/',
+        'foaf': 'http://xmlns.com/foaf/0.1/',
+        'schema': 'http://schema.org/',
+        'schema-https': 'https://schema.org/',
+        'void': 'http://rdfs.org/ns/void#',
+        'dcat': 'http://www.w3.org/ns/dcat#',
+        'prov': 'http://www.w3.org/ns/prov#',
+        'org': 'http://www.w3.org/ns/org#',
+        'qb': 'http://purl.org/linked-data/cube#',
+        'sh': 'http://www.w3.org/ns/shacl#',
+        'vcard': 'http://www.w3.org/2006/vcard/ns#',
+        'geo': 'http://www.w3.org/2003/01/geo/wgs84_pos#',
+        'geosparql': 'http://www.opengis.net/ont/geosparql#',
+        'gn': 'http://www.geonames.org/ontology#',
+        'sioc': 'http://rdfs.org/sioc/ns#',
+        'bibo': 'http://purl.org/ontology/bibo/',
+        'fabio': 'http://purl.org/spar/fabio/',
+        'cito': 'http://purl.org/spar/cito/',
+        'doap': 'http://usefulinc.com/ns/doap#',
+        'cc': 'http://creativecommons.org/ns#',
+        'adms': 'http://www.w3.org/ns/adms#',
+        'time': 'http://www.w3.org/2006/time#',
+        'event': 'http://purl.org/NET/c4dm/event.owl#',
+        'mo': 'http://purl.org/ontology/mo/',
+        'gr': 'http://purl.org/goodrelations/v1#',
+        'dbo': 'http://dbpedia.org/ontology/',
+        'dbp': 'http://dbpedia.org/property/',
+        'dbr': 'http://dbpedia.org/resource/',
+        'yago': 'http://dbpedia.org/class/yago/',
+        'wd': 'http://www.wikidata.org/entity/',
+        'wdt': 'http://www.wikidata.org/prop/direct/',
+        'umbel': 'http://umbel.org/umbel#',
+        'obo': 'http://purl.obolibrary.org/obo/',
+        'oboinowl': 'http://www.geneontology.org/formats/oboInOwl#',
+        'sio': 'http://semanticscience.org/resource/',
+        'virtrdf': 'http://www.openlinksw.com/schemas/virtrdf#',
+        'sd': 'http://www.w3.org/ns/sparql-service-description#',
+        'ldp': 'http://www.w3.org/ns/ldp#',
+        'oa': 'http://www.w3.org/ns/oa#',
+        'lexinfo': 'http://www.lexinfo.net/ontology/2.0/lexinfo#',
+        'ontolex': 'http://www.w3.org/ns/lemon/ontolex#'
+    }
+    CACHE_SIZE = 100000
+
+    # Characters are single-character keys, so the empty key can mark the end of a namespace
+    END = ''
+
+    def __init__(
+            self,
+            prefixes: Dict[str, str] = WELL_KNOWN_PREFIXES
+        ):
+        """ Seeds the trie with the namespaces of the prefixes """
+        self.root = {}
+        self.prefixes = {}
+        self.cache = {}
+
+        for prefix, namespace in prefixes.items():
+            self.add(namespace, prefix)
+
+    def add(
+            self,
+            namespace: str,
+            prefix: str = None
+        ) -> None:
+        """ Adds a namespace that takes precedence over the guessed namespaces of the IRIs it is a prefix of """
+        node = self.root
+
+        for character in namespace:
+            node = node.setdefault(character, {})
+
+        node[self.END] = namespace
+        self.prefixes[namespace] = prefix
+        self.cache = {}
+
+    def split(
+            self,
+            iri: str
+        ) -> Tuple[str, str]:
+        """ Returns the namespace and the local name of the IRI """
+        # The longest known namespace wins, otherwise the namespace is guessed
+        result = self.cache.get(iri)
+
+        if result == None:
+            namespace = self.__find_namespace(iri)
+            if namespace == None:
+                namespace = self.__guess_namespace(iri)
+
+            result = (namespace, iri[len(namespace):])
+
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache = {}
+            self.cache[iri] = result
+
+        return result
+
+    def get_prefix(
+            self,
+            namespace: str
+        ) -> str:
+        """ Returns the well-known prefix of the namespace or None """
+        return self.prefixes.get(namespace)
+
+    def __find_namespace(
+            self,
+            iri: str
+        ) -> str:
+        node = self.root
+        namespace = None
+
+        for character in iri:
+            node = node.get(character)
+            if node == None:
+                break
+
+            namespace = node.get(self.END, namespace)
+
+        return namespace
+
+    def __guess_namespace(
+            self,
+            iri: str
+        ) -> str:
+        # The scheme and the authority are never cut, so http://example.org/ stays a namespace of its own
+        authority_end = 0
+        scheme_end = iri.find('://')
+
+        if scheme_end >= 0:
+            authority_end = iri.find('/', scheme_end + 3)
+
+            if authority_end < 0:
+                return ''
+
+        # A trailing slash belongs to the local name
+        trimmed_iri = iri.rstrip('/')
+
+        for separator in ['#', '/', ':']:
+            position = trimmed_iri.rfind(separator)
+
+            if position >= authority_end:
+                return iri[:position + 1]
+
+        return iri[:authority_end + 1] if scheme_end >= 0 else ''
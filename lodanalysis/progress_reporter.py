@@ -0,0 +1,328 @@
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+import contextlib
+import heapq
+import json
+import shutil
+import sys
+import threading
+import time
+
+class ProgressReporter:
+    """
+    Class for reporting the progress of a harvest as a live status line or JSON lines: completed/total, endpoints per minute, ETA, in-flight queries, per-host queues and a rolling failure rate
+    """
+    OUTPUT_AUTO = 'auto'
+    OUTPUT_STATUS = 'status'
+    OUTPUT_JSON = 'json'
+    OUTPUT_OFF = 'off'
+    OUTPUTS = [OUTPUT_AUTO, OUTPUT_STATUS, OUTPUT_JSON, OUTPUT_OFF]
+
+    # Endpoints that are already stored and therefore not harvested again
+    STATUS_EXISTING = 'EXISTING'
+    STATUS_FAIL = 'FAIL'
+
+    EVENT = 'event'
+    EVENT_START = 'start'
+    EVENT_ENDPOINT = 'endpoint'
+    EVENT_PROGRESS = 'progress'
+    EVENT_SUMMARY = 'summary'
+
+    def __init__(
+            self,
+            output: str = OUTPUT_AUTO,
+            log_file: str = '',
+            interval: float = 1.0,
+            window: int = 50,
+            hosts: int = 3
+        ):
+        """ Sets up the outputs """
+        # The status line goes to a terminal on stderr, the JSON lines to the log file or else stdout
+        if output not in self.OUTPUTS:
+            raise ValueError(f'The progress output has to be one of: {", ".join(self.OUTPUTS)}')
+
+        if output == self.OUTPUT_AUTO:
+            output = self.OUTPUT_STATUS if sys.stderr.isatty() else self.OUTPUT_OFF
+
+        self.output = output
+        self.interval = interval
+        self.hosts = hosts
+        self.log = None
+        self.finished = False
+
+        if log_file != '':
+            self.log = open(log_file, 'a')
+        elif output == self.OUTPUT_JSON:
+            self.log = sys.stdout
+
+        self.is_log_file = log_file != ''
+
+        self.lock = threading.Lock()
+        self.total = 0
+        self.completed = 0
+        self.statuses = Counter()
+        self.queries = Counter()
+        self.host_queues = Counter()
+        self.in_flight = 0
+        self.phases: Dict[str, str] = {}
+        self.endpoint_started: Dict[str, float] = {}
+        # The rate and failure rate only cover harvested endpoints; existing endpoints are passed in no time
+        self.completion_times = deque(maxlen=window)
+        self.failures = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.reported = 0.0
+        self.status_length = 0
+
+    def is_active(self) -> bool:
+        """ Tells whether anything is reported at all """
+        return self.output != self.OUTPUT_OFF or self.log != None
+
+    def is_printing(self) -> bool:
+        """ Tells whether the progress replaces the plain prints of the harvest """
+        return self.output != self.OUTPUT_OFF
+
+    def redirect_prints(self) -> Any:
+        """ Moves the other prints to stderr while the JSON lines go to stdout """
+        if self.log == sys.stdout:
+            return contextlib.redirect_stdout(sys.stderr)
+
+        return contextlib.nullcontext()
+
+    def start(
+            self,
+            access_urls: List[str]
+        ) -> None:
+        """ Plans the harvest of the access URLs in the order of processing """
+        with self.lock:
+            self.total = len(access_urls)
+            self.host_queues = Counter(self.__get_host(access_url) for access_url in access_urls)
+            self.started = time.perf_counter()
+
+            self.__write_event(self.EVENT_START, { 'total': self.total, 'hosts': len(self.host_queues) })
+            self.__report(True)
+
+    def start_endpoint(
+            self,
+            access_url: str
+        ) -> None:
+        with self.lock:
+            self.endpoint_started[access_url] = time.perf_counter()
+            self.phases[access_url] = None
+
+    def set_phase(
+            self,
+            access_url: str,
+            phase: str
+        ) -> None:
+        with self.lock:
+            self.phases[access_url] = phase
+            self.__report()
+
+    def start_query(
+            self,
+            access_url: str
+        ) -> None:
+        with self.lock:
+            self.in_flight += 1
+            self.__report()
+
+    def end_query(
+            self,
+            access_url: str,
+            outcome: str
+        ) -> None:
+        with self.lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.queries[outcome] += 1
+
+    def finish_endpoint(
+            self,
+            access_url: str,
+            status: str,
+            error_message: str = None
+        ) -> None:
+        """ Counts the endpoint as completed with its status: OK, FAIL, DUPLICATE or EXISTING """
+        with self.lock:
+            now = time.perf_counter()
+            started = self.endpoint_started.pop(access_url, now)
+            self.phases.pop(access_url, None)
+            self.completed += 1
+            self.statuses[status] += 1
+
+            host = self.__get_host(access_url)
+            if self.host_queues[host] > 1:
+                self.host_queues[host] -= 1
+            else:
+                del self.host_queues[host]
+
+            if status != self.STATUS_EXISTING:
+                self.completion_times.append(now)
+                self.failures.append(status == self.STATUS_FAIL)
+
+            event = {
+                'access_url': access_url,
+                'host': host,
+                'status': status,
+                'duration_ms': int(round((now - started) * 1000)),
+                'completed': self.completed,
+                'total': self.total
+            }
+
+            if error_message != None:
+                event['error'] = error_message
+
+            self.__write_event(self.EVENT_ENDPOINT, event)
+            self.__report()
+
+    def print(
+            self,
+            message: Any
+        ) -> None:
+        """ Prints a message of the harvest unless the progress takes its place """
+        if self.is_printing() == False:
+            print(message)
+
+    def get_progress(self) -> Dict[str, Any]:
+        """ Returns the current progress """
+        # The rate is taken over the last window of harvested endpoints
+        now = time.perf_counter()
+        rate = self.__get_rate(now)
+        remaining = self.total - self.completed
+
+        return {
+            'completed': self.completed,
+            'total': self.total,
+            'elapsed_s': round(now - self.started, 1),
+            'endpoints_per_minute': round(rate, 2),
+            'eta_s': round(remaining / rate * 60) if rate > 0 else None,
+            'in_flight': self.in_flight,
+            'failure_rate': round(sum(self.failures) / len(self.failures), 3) if len(self.failures) > 0 else None,
+            'statuses': dict(self.statuses),
+            'queries': dict(self.queries),
+            'host_queues': dict(heapq.nlargest(self.hosts, self.host_queues.items(), key=lambda host: host[1])),
+            'phases': { access_url: phase for access_url, phase in self.phases.items() if phase != None }
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """ Reports the final state, prints the summary of the statuses and closes the log """
+        with self.lock:
+            if self.finished:
+                return self.get_progress()
+
+            self.finished = True
+            self.__report(True)
+            progress = self.get_progress()
+
+            if self.output == self.OUTPUT_STATUS:
+                sys.stderr.write('\n')
+
+            self.__write_event(self.EVENT_SUMMARY, progress)
+
+            if self.is_log_file:
+                self.log.close()
+
+            self.log = None
+
+        if self.output != self.OUTPUT_OFF:
+            statuses = ', '.join(f'{status}: {amount}' for status, amount in sorted(progress['statuses'].items()))
+            print(f'{progress["completed"]} of {progress["total"]} endpoints in {self.__format_duration(progress["elapsed_s"])} ({statuses or "none"})', file=sys.stderr)
+
+        return progress
+
+    def __get_rate(
+            self,
+            now: float
+        ) -> float:
+        """ Returns the harvested endpoints per minute """
+        if len(self.completion_times) == 0:
+            return 0.0
+
+        if len(self.completion_times) < self.completion_times.maxlen:
+            amount, since = len(self.completion_times), self.started
+        else:
+            amount, since = len(self.completion_times) - 1, self.completion_times[0]
+
+        elapsed = now - since
+
+        return amount / elapsed * 60 if elapsed > 0 else 0.0
+
+    def __report(
+            self,
+            force: bool = False
+        ) -> None:
+        """ Renders the status line and the JSON progress at most once per interval, which keeps the overhead negligible """
+        now = time.perf_counter()
+        if force == False and now - self.reported < self.interval:
+            return
+
+        self.reported = now
+
+        if self.output == self.OUTPUT_STATUS:
+            self.__write_status(self.get_progress())
+        elif self.output == self.OUTPUT_JSON:
+            self.__write_event(self.EVENT_PROGRESS, self.get_progress())
+
+    def __write_status(
+            self,
+            progress: Dict[str, Any]
+        ) -> None:
+        """ Rewrites the status line, cut to the width of the terminal """
+        share = progress['completed'] / progress['total'] * 100 if progress['total'] > 0 else 100.0
+        parts = [
+            f'{progress["completed"]}/{progress["total"]} ({share:.1f}%)',
+            f'{progress["endpoints_per_minute"]:.1f}/min',
+            f'ETA {self.__format_duration(progress["eta_s"])}',
+            f'in flight {progress["in_flight"]}'
+        ]
+
+        if progress['failure_rate'] != None:
+            parts.append(f'failing {progress["failure_rate"] * 100:.0f}%')
+
+        parts.append(' '.join(f'{status} {amount}' for status, amount in sorted(progress['statuses'].items())))
+
+        if len(progress['host_queues']) > 0:
+            parts.append('queued ' + ', '.join(f'{host} {amount}' for host, amount in progress['host_queues'].items()))
+
+        for access_url, phase in progress['phases'].items():
+            parts.append(f'{self.__get_host(access_url)} {phase}')
+
+        width = shutil.get_terminal_size().columns - 1
+        line = ' | '.join(part for part in parts if part != '')[:width]
+
+        sys.stderr.write('\r' + line.ljust(self.status_length))
+        sys.stderr.flush()
+        self.status_length = len(line)
+
+    def __write_event(
+            self,
+            event: str,
+            data: Dict[str, Any]
+        ) -> None:
+        if self.log == None:
+            return
+
+        self.log.write(json.dumps({ self.EVENT: event, 'time': datetime.now(timezone.utc).isoformat(), **data }) + '\n')
+        self.log.flush()
+
+    def __get_host(
+            self,
+            access_url: str
+        ) -> str:
+        try:
+            return urlparse(access_url).hostname or access_url
+        except ValueError:
+            return access_url
+
+    def __format_duration(
+            self,
+            seconds: float
+        ) -> str:
+        if seconds == None:
+            return '?'
+
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+
+        return f'{hours}:{minutes:02}:{seconds:02}'
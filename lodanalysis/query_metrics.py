@@ -0,0 +1,183 @@
+from datetime import datetime, timezone
+from typing import Any, Dict
+from urllib.parse import urlparse
+import socket
+import time
+
+class QueryMetrics:
+    """
+    Class for recording the latency, response size, HTTP status and outcome of every query of an endpoint harvest, grouped by phase
+    """
+    ACCESS_URL = 'access_url'
+    HOST = 'host'
+    STARTED_AT = 'started_at'
+    DURATION = 'duration_ms'
+    PHASES = 'phases'
+    PHASE = 'phase'
+    QUERIES = 'queries'
+    VARIANT = 'variant'
+    SIZE = 'size'
+    HTTP_STATUS = 'status'
+    OUTCOME = 'outcome'
+    ERROR = 'error'
+
+    OUTCOME_OK = 'ok'
+    OUTCOME_TIMEOUT = 'timeout'
+    OUTCOME_ERROR = 'error'
+
+    TIMEOUT_STATUSES = [408, 504]
+    # Virtuoso reports its query time limit as S1T00, other stores mention the timeout in the message
+    TIMEOUT_MARKERS = ['timeout', 'timed out', 's1t00', 'time limit']
+    ERROR_LENGTH = 200
+
+    def __init__(self):
+        self.progress_reporter = None
+        self.reset(None)
+
+    def reset(
+            self,
+            access_url: str
+        ) -> None:
+        """ Starts the metrics of a new endpoint harvest """
+        self.access_url = access_url
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.phases = []
+        self.phase = None
+
+    def start_phase(
+            self,
+            phase: str
+        ) -> None:
+        """ Starts the phase that the queries recorded from now on belong to """
+        self.phase = {
+            self.PHASE: phase,
+            self.DURATION: 0,
+            self.VARIANT: None,
+            self.QUERIES: []
+        }
+        self.phases.append(self.phase)
+        self.phase_started = time.perf_counter()
+
+        if self.progress_reporter != None:
+            self.progress_reporter.set_phase(self.access_url, phase)
+
+    def end_phase(
+            self,
+            is_valid: bool = True
+        ) -> None:
+        """ Ends the phase """
+        # The fallbacks stop at the first working variant, so a valid phase was won by its last query
+        if self.phase == None:
+            return
+
+        self.phase[self.DURATION] = self.__to_milliseconds(time.perf_counter() - self.phase_started)
+
+        if is_valid and len(self.phase[self.QUERIES]) > 0:
+            self.phase[self.VARIANT] = self.phase[self.QUERIES][-1][self.VARIANT]
+
+        self.phase = None
+
+    def start_query(self) -> None:
+        """ Tells the progress reporter that a query is in flight until it is added """
+        if self.progress_reporter != None:
+            self.progress_reporter.start_query(self.access_url)
+
+    def add_query(
+            self,
+            variant: str,
+            duration: float,
+            size: int,
+            status: int,
+            error: Exception = None
+        ) -> None:
+        """ Records a query of the current phase with its duration in seconds """
+        if self.phase == None:
+            self.start_phase(variant)
+
+        query = {
+            self.VARIANT: variant,
+            self.DURATION: self.__to_milliseconds(duration),
+            self.SIZE: size,
+            self.HTTP_STATUS: status,
+            self.OUTCOME: self.classify(error, status)
+        }
+
+        if error != None:
+            query[self.ERROR] = str(error)[:self.ERROR_LENGTH]
+
+        self.phase[self.QUERIES].append(query)
+
+        if self.progress_reporter != None:
+            self.progress_reporter.end_query(self.access_url, query[self.OUTCOME])
+
+    def classify(
+            self,
+            error: Exception,
+            status: int = None
+        ) -> str:
+        """ Tells timeouts of the client or the endpoint apart from other errors """
+        if error == None:
+            return self.OUTCOME_OK
+
+        if isinstance(error, (socket.timeout, TimeoutError)) or status in self.TIMEOUT_STATUSES:
+            return self.OUTCOME_TIMEOUT
+
+        message = str(error).lower()
+        if any(marker in message for marker in self.TIMEOUT_MARKERS):
+            return self.OUTCOME_TIMEOUT
+
+        return self.OUTCOME_ERROR
+
+    def get_status(
+            self,
+            error: Exception
+        ) -> int:
+        """ Returns the HTTP status behind an error """
+        # SPARQLWrapper raises its own exceptions while handling the HTTPError
+        while error != None:
+            if isinstance(getattr(error, 'code', None), int):
+                return error.code
+
+            error = error.__context__
+
+        return None
+
+    def get_document(self) -> Dict[str, Any]:
+        """ Returns the metrics of the harvest as a single document """
+        return {
+            self.ACCESS_URL: self.access_url,
+            self.HOST: urlparse(self.access_url or '').hostname,
+            self.STARTED_AT: self.started_at,
+            self.DURATION: self.__to_milliseconds(time.perf_counter() - self.started),
+            self.PHASES: self.phases
+        }
+
+    def __to_milliseconds(
+            self,
+            duration: float
+        ) -> int:
+        return int(round(duration * 1000))
+
+class MeasuredResponse:
+    """
+    Proxy of an HTTP response that counts the bytes read from it
+    """
+    def __init__(
+            self,
+            response: Any
+        ):
+        self.response = response
+        self.size = 0
+
+    def read(self, *args) -> bytes:
+        data = self.response.read(*args)
+        self.size += len(data)
+
+        return data
+
+    def __getattr__(
+            self,
+            name: str
+        ) -> Any:
+        return getattr(self.response, name)
@@ -0,0 +1,93 @@
+from lodanalysis.mongo_db import DB
+from bson.errors import InvalidDocument
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+import hashlib
+import json
+
+class ResultCache:
+    """
+    Cache of analytics results keyed by command, options and the endpoint revision, evicting the least recently used results
+    """
+    COMMAND = 'command'
+    OPTIONS = 'options'
+    RESULT = 'result'
+    LAST_USED_AT = DB.CACHE_LAST_USED_AT
+
+    def __init__(
+            self,
+            db: DB = None
+        ):
+        """ Sets up the cache for at most size results """
+        self.db = db if db != None else DB()
+        self.size = max(int(self.db.config.get_db_config('result_cache_size', '64')), 1)
+
+    def get_or_compute(
+            self,
+            command: str,
+            options: Dict[str, Any],
+            compute: Callable[[], Any]
+        ) -> Any:
+        """ Returns the cached result of the command if no endpoint has been written since, otherwise computes and caches it """
+        # Buffered writes only receive their revision when they are flushed
+        self.db.flush()
+        revision = self.db.get_committed_revision()
+        key = self.get_key(command, options)
+
+        cached = self.db.result_cache.find_one_and_update(
+            { '_id': key, DB.REVISION: revision },
+            { '$set': { self.LAST_USED_AT: datetime.now(timezone.utc) } }
+        )
+        if cached is not None:
+            return cached[self.RESULT]
+
+        result = compute()
+        self.__put(key, command, options, revision, result)
+
+        return result
+
+    def get_key(
+            self,
+            command: str,
+            options: Dict[str, Any]
+        ) -> str:
+        """ Returns the cache key of the command with its options, independent of the options' order """
+        return hashlib.sha256(json.dumps([command, options], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def __put(
+            self,
+            key: str,
+            command: str,
+            options: Dict[str, Any],
+            revision: int,
+            result: Any
+        ) -> None:
+        """ Stores the result in place of the outdated one and evicts the least recently used results above the size """
+        try:
+            self.db.result_cache.replace_one(
+                { '_id': key },
+                {
+                    self.COMMAND: command,
+                    self.OPTIONS: options,
+                    DB.REVISION: revision,
+                    self.LAST_USED_AT: datetime.now(timezone.utc),
+                    self.RESULT: result
+                },
+                upsert=True
+            )
+        except InvalidDocument as e:
+            # Also raised for results above the document size limit
+            print(f'The result is not cached: {e}')
+            return
+        except PyMongoError as e:
+            print(e)
+            return
+
+        excess = self.db.result_cache.count_documents({}) - self.size
+        if excess <= 0:
+            return
+
+        evicted = self.db.result_cache.find({}, { '_id': 1 }).sort(self.LAST_USED_AT, ASCENDING).limit(excess)
+        self.db.result_cache.delete_many({ '_id': { '$in': [entry['_id'] for entry in evicted] } })
@@ -0,0 +1,349 @@
+from lodanalysis.mongo_db import DB
+from pymongo import ASCENDING, DESCENDING
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator
+
+class SnapshotStore:
+    """
+    Class for recording the state of every endpoint after each harvest run as periodic baselines and compact deltas
+    """
+    RUN = DB.SNAPSHOT_RUN
+    TYPE = 'type'
+    CHANGES = 'changes'
+    STATE = 'state'
+    BASELINE = 'baseline'
+    DELTA = 'delta'
+    DELETED = 'deleted'
+    STARTED_AT = 'started_at'
+    FINISHED_AT = 'finished_at'
+
+    SCALAR_FIELDS = [
+        DB.STATUS,
+        DB.DOMAINS,
+        DB.TRIPLES_AMOUNT,
+        DB.CLASSES_AMOUNT,
+        DB.INSTANCES_AMOUNT,
+        DB.USED_PROPERTIES_AMOUNT,
+        DB.PROPERTIES_AMOUNT,
+        DB.UNIQUE_SUBJECTS_AMOUNT,
+        DB.AVERAGE_UNIQUE_SUBJECTS_AMOUNT,
+        DB.FINGERPRINT
+    ]
+    HISTOGRAM_FIELDS = DB.ENCODED_INSTANCE_ARRAYS
+
+    def __init__(
+            self,
+            db: DB = None
+        ):
+        """ Sets up the store """
+        # Every baseline_interval-th run stores the full state of every endpoint
+        self.db = db if db != None else DB()
+        self.baseline_interval = max(int(self.db.config.get_db_config('snapshot_baseline_interval', '10')), 1)
+
+    def take(self) -> Dict[str, Any]:
+        """ Stores the changes of every endpoint since the previous run and returns the run summary """
+        self.db.flush()
+
+        last_run = self.__get_last_run()
+        self.__discard_interrupted_runs(last_run)
+
+        run = last_run + 1 if last_run != None else 1
+        last_baseline = self.__get_baseline_run(run)
+        is_baseline = last_baseline == None or run - last_baseline >= self.baseline_interval
+        summary = {
+            '_id': run,
+            self.BASELINE: is_baseline,
+            self.STARTED_AT: datetime.now(timezone.utc),
+            DB.ENDPOINTS_AMOUNT: 0,
+            'changed_amount': 0,
+            'deleted_amount': 0
+        }
+        deleted_access_urls = []
+
+        for access_url, endpoint, head in self.__join_heads():
+            if endpoint == None:
+                self.__add_entry(run, access_url, self.DELETED, None)
+                deleted_access_urls.append(access_url)
+                summary['deleted_amount'] += 1
+                continue
+
+            state = self.get_state(endpoint)
+            previous_state = head[self.STATE] if head != None else {}
+            changes = self.get_changes(previous_state, state)
+            summary[DB.ENDPOINTS_AMOUNT] += 1
+
+            if is_baseline:
+                self.__add_entry(run, access_url, self.BASELINE, state)
+            elif len(changes) > 0:
+                self.__add_entry(run, access_url, self.DELTA, changes)
+
+            if len(changes) > 0:
+                summary['changed_amount'] += 1
+                self.db.writer.update(
+                    self.db.snapshot_heads,
+                    { '_id': access_url },
+                    { '$set': { self.STATE: state, self.RUN: run } },
+                    upsert=True
+                )
+
+        self.db.flush()
+
+        for index in range(0, len(deleted_access_urls), 1000):
+            self.db.snapshot_heads.delete_many({ '_id': { '$in': deleted_access_urls[index:index + 1000] } })
+
+        # The run is only recorded once all of its entries and heads are written
+        summary[self.FINISHED_AT] = datetime.now(timezone.utc)
+        self.db.snapshot_runs.insert_one(summary)
+
+        return summary
+
+    def get_runs(self) -> list:
+        """ Returns the summaries of all runs, the latest first """
+        return list(self.db.snapshot_runs.find().sort('_id', DESCENDING))
+
+    def get_state(
+            self,
+            endpoint: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns the tracked fields of an encoded endpoint, the used classes and properties as {IRI id: amount} """
+        state = {field: endpoint[field] for field in self.SCALAR_FIELDS if endpoint.get(field) != None}
+
+        for instance_array_name, (ids_field, amounts_field) in self.HISTOGRAM_FIELDS.items():
+            if ids_field in endpoint:
+                state[instance_array_name] = {
+                    str(iri_id): amount
+                    for iri_id, amount in zip(endpoint[ids_field], endpoint.get(amounts_field) or [])
+                }
+
+        return state
+
+    def get_changes(
+            self,
+            previous_state: Dict[str, Any],
+            state: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns the fields that differ between the states, removed ones as None """
+        changes = {}
+
+        for field in dict.fromkeys([*previous_state, *state]):
+            previous_value = previous_state.get(field)
+            value = state.get(field)
+
+            if field in self.HISTOGRAM_FIELDS and previous_value != None and value != None:
+                histogram_changes = {
+                    iri_id: value.get(iri_id)
+                    for iri_id in dict.fromkeys([*previous_value, *value])
+                    if previous_value.get(iri_id) != value.get(iri_id)
+                }
+                if len(histogram_changes) > 0:
+                    changes[field] = histogram_changes
+            elif previous_value != value:
+                changes[field] = value
+
+        return changes
+
+    def apply_changes(
+            self,
+            state: Dict[str, Any],
+            changes: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Returns the state after the changes of a delta """
+        state = dict(state)
+
+        for field, value in changes.items():
+            if value == None:
+                state.pop(field, None)
+            elif field in self.HISTOGRAM_FIELDS and field in state:
+                histogram = dict(state[field])
+
+                for iri_id, amount in value.items():
+                    if amount == None:
+                        histogram.pop(iri_id, None)
+                    else:
+                        histogram[iri_id] = amount
+
+                state[field] = histogram
+            else:
+                state[field] = value
+
+        return state
+
+    def get_time_series(
+            self,
+            access_url: str
+        ) -> list:
+        """ Returns the decoded state of the endpoint after every run in which it has changed """
+        entries = self.db.snapshots.find({ DB.ACCESS_URL: access_url }).sort(self.RUN, ASCENDING)
+        finished_at = {run['_id']: run.get(self.FINISHED_AT) for run in self.db.snapshot_runs.find({}, { self.FINISHED_AT: 1 })}
+        time_series = []
+        state = {}
+
+        for entry in entries:
+            # Entries of an interrupted run are discarded by the next take
+            if finished_at.get(entry[self.RUN]) == None:
+                continue
+
+            if entry[self.TYPE] == self.DELETED:
+                state = {}
+                time_series.append({ self.RUN: entry[self.RUN], self.FINISHED_AT: finished_at.get(entry[self.RUN]), self.DELETED: True })
+                continue
+
+            previous_state = state
+            state = entry[self.CHANGES] if entry[self.TYPE] == self.BASELINE else self.apply_changes(state, entry[self.CHANGES])
+
+            # Baselines repeat unchanged endpoints, they are no point of the series
+            if entry[self.TYPE] == self.BASELINE and state == previous_state:
+                continue
+
+            time_series.append({
+                self.RUN: entry[self.RUN],
+                self.FINISHED_AT: finished_at.get(entry[self.RUN]),
+                **self.decode_state(state)
+            })
+
+        return time_series
+
+    def get_collection_as_of(
+            self,
+            run: int
+        ) -> Iterator[Dict[str, Any]]:
+        """ Yields the decoded state of every endpoint after the run, replaying the deltas from the latest baseline """
+        states = self.__replay(run)
+
+        for access_url in sorted(states):
+            yield { DB.ACCESS_URL: access_url, **self.decode_state(states[access_url][0]) }
+
+    def decode_state(
+            self,
+            state: Dict[str, Any]
+        ) -> Dict[str, Any]:
+        """ Resolves the IRI ids of a state back into used classes and properties, the most used first """
+        state = dict(state)
+
+        for instance_array_name in self.HISTOGRAM_FIELDS:
+            if instance_array_name not in state:
+                continue
+
+            histogram = sorted(state[instance_array_name].items(), key=lambda instance: instance[1], reverse=True)
+            names = self.db.iri_dictionary.get_names([int(iri_id) for iri_id, _ in histogram])
+            state[instance_array_name] = [
+                { DB.INSTANCE_NAME: name, DB.INSTANCE_AMOUNT: amount }
+                for name, (_, amount) in zip(names, histogram)
+            ]
+
+        return state
+
+    def __get_baseline_run(
+            self,
+            before_run: int
+        ) -> int:
+        """ Returns the latest finished baseline run before the given run """
+        baseline = self.db.snapshot_runs.find_one(
+            { self.BASELINE: True, self.FINISHED_AT: { '$exists': True }, '_id': { '$lt': before_run } },
+            sort=[('_id', DESCENDING)]
+        )
+
+        return baseline['_id'] if baseline is not None else None
+
+    def __get_last_run(self) -> int:
+        """ Returns the latest finished run """
+        last_run = self.db.snapshot_runs.find_one(
+            { self.FINISHED_AT: { '$exists': True } },
+            sort=[('_id', DESCENDING)]
+        )
+
+        return last_run['_id'] if last_run is not None else None
+
+    def __replay(
+            self,
+            run: int
+        ) -> Dict[str, tuple]:
+        """ Returns the encoded state and the last changing run of every endpoint after the run """
+        # Entries of unfinished runs are skipped
+        last_run = self.__get_last_run()
+        if last_run == None:
+            return {}
+
+        run = min(run, last_run)
+        baseline_run = self.__get_baseline_run(run + 1)
+        if baseline_run == None:
+            return {}
+
+        entries = self.db.snapshots.find({ self.RUN: { '$gte': baseline_run, '$lte': run } }).sort(self.RUN, ASCENDING)
+        states = {}
+
+        for entry in entries:
+            access_url = entry[DB.ACCESS_URL]
+            previous_state, previous_run = states.get(access_url, ({}, None))
+
+            if entry[self.TYPE] == self.DELETED:
+                states.pop(access_url, None)
+            elif entry[self.TYPE] == self.BASELINE:
+                # Baselines repeat unchanged endpoints without changing them
+                states[access_url] = (entry[self.CHANGES], entry[self.RUN] if entry[self.CHANGES] != previous_state else previous_run)
+            else:
+                states[access_url] = (self.apply_changes(previous_state, entry[self.CHANGES]), entry[self.RUN])
+
+        return states
+
+    def __discard_interrupted_runs(
+            self,
+            last_run: int
+        ) -> None:
+        """ Removes what an interrupted take left behind and restores the heads of the last finished run """
+        later_runs = { '$gt': last_run if last_run != None else 0 }
+        self.db.snapshot_runs.delete_many({ '$or': [{ '_id': later_runs }, { self.FINISHED_AT: { '$exists': False } }] })
+
+        if self.db.snapshots.find_one({ self.RUN: later_runs }) is None and self.db.snapshot_heads.find_one({ self.RUN: later_runs }) is None:
+            return
+
+        print('Discarding the entries of an interrupted snapshot run...')
+        self.db.snapshots.delete_many({ self.RUN: later_runs })
+        self.db.snapshot_heads.delete_many({})
+
+        for access_url, (state, run) in self.__replay(last_run or 0).items():
+            self.db.writer.insert(self.db.snapshot_heads, { '_id': access_url, self.STATE: state, self.RUN: run })
+
+        self.db.flush()
+
+    def __add_entry(
+            self,
+            run: int,
+            access_url: str,
+            entry_type: str,
+            changes: Dict[str, Any]
+        ) -> None:
+        self.db.writer.insert(self.db.snapshots, {
+            self.RUN: run,
+            DB.ACCESS_URL: access_url,
+            self.TYPE: entry_type,
+            self.CHANGES: changes
+        })
+
+    def __join_heads(self) -> Iterator[tuple]:
+        """ Merge-joins the endpoints and the heads of the previous run by access URL, yielding (access_url, endpoint, head) """
+        endpoints = self.db.endpoints.find(
+            {},
+            {
+                DB.ACCESS_URL: 1,
+                **{field: 1 for field in self.SCALAR_FIELDS},
+                **{field: 1 for field in DB.ENCODED_INSTANCE_ARRAYS},
+                **{field: 1 for fields in DB.ENCODED_INSTANCE_ARRAYS.values() for field in fields}
+            }
+        ).sort(DB.ACCESS_URL, ASCENDING)
+        heads = self.db.snapshot_heads.find().sort('_id', ASCENDING)
+
+        endpoint = next(endpoints, None)
+        head = next(heads, None)
+
+        while endpoint != None or head != None:
+            if head == None or (endpoint != None and endpoint[DB.ACCESS_URL] < head['_id']):
+                yield endpoint[DB.ACCESS_URL], self.db.encode_endpoint(endpoint), None
+                endpoint = next(endpoints, None)
+            elif endpoint == None or head['_id'] < endpoint[DB.ACCESS_URL]:
+                yield head['_id'], None, head
+                head = next(heads, None)
+            else:
+                yield endpoint[DB.ACCESS_URL], self.db.encode_endpoint(endpoint), head
+                endpoint = next(endpoints, None)
+                head = next(heads, None)
@@ -0,0 +1,78 @@
+from typing import Dict, List
+import heapq
+
+class SpaceSaving:
+    """
+    Space-Saving sketch that keeps the heaviest items of a weighted stream in a bounded amount of counters
+    """
+    def __init__(
+            self,
+            capacity: int = 1000
+        ):
+        """ Sets up the counters """
+        # Unmonitored items are not tracked at all, so the memory does not grow with the vocabulary
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = {}
+        self.heap = []
+        self.total = 0
+
+    def add(
+            self,
+            name: str,
+            amount: int = 1
+        ) -> None:
+        """ Adds the amount to the item, taking over the smallest counter if the item is not monitored and all counters are in use """
+        self.total += amount
+        counter = self.counters.get(name)
+
+        if counter == None:
+            error = 0
+
+            if len(self.counters) >= self.capacity:
+                error, evicted_name = self.__pop_smallest()
+                del self.counters[evicted_name]
+
+            counter = [error, error]
+            self.counters[name] = counter
+
+        counter[0] += amount
+        heapq.heappush(self.heap, (counter[0], name))
+
+        # The heap keeps outdated entries of updated counters until they surface
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, name) for name, (count, _) in self.counters.items()]
+            heapq.heapify(self.heap)
+
+    def get_top(
+            self,
+            limit: int
+        ) -> list:
+        """ Returns the estimated heaviest items with their maximal overestimation """
+        # An item is guaranteed when its lower bound is not below the next estimate
+        top = sorted(self.counters.items(), key=lambda counter: counter[1][0], reverse=True)
+        next_count = top[limit][1][0] if len(top) > limit else 0
+
+        return [
+            {
+                'name': name,
+                'total': count,
+                'error': error,
+                'guaranteed': count - error >= next_count
+            }
+            for name, (count, error) in top[:limit]
+        ]
+
+    def get_error_bound(self) -> float:
+        """ Returns the maximal overestimation of any item: the smallest counter, which is at most total / capacity """
+        if len(self.counters) < self.capacity:
+            return 0
+
+        return min(count for count, _ in self.counters.values())
+
+    def __pop_smallest(self) -> tuple:
+        while True:
+            count, name = heapq.heappop(self.heap)
+            counter = self.counters.get(name)
+
+            if counter != None and counter[0] == count:
+                return count, name
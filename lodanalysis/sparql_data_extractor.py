@@ -4,6 +4,7 @@ from lodanalysis.mongo_db import DB
 from lodanalysis.sparql_queries import SPARQLQueries
 from typing import Dict, Any
 import requests
+import time
 
 class SPARQLDataExtractor:
     """
@@ -13,6 +14,24 @@ class SPARQLDataExtractor:
         self.sparql_queries = SPARQLQueries()
         self.db = DB()
         self.config = Config()
+        self.progress_reporter = None
+
+    def set_progress_reporter(
+            self,
+            progress_reporter: Any
+        ) -> None:
+        """ Hands the progress of the harvest and its queries to the reporter, which replaces the plain prints """
+        self.progress_reporter = progress_reporter
+        self.sparql_queries.metrics.progress_reporter = progress_reporter
+
+    def __print(
+            self,
+            message: Any
+        ) -> None:
+        if self.progress_reporter != None:
+            self.progress_reporter.print(message)
+        else:
+            print(message)
 
     def __reset_local_endpoint(self) -> None:
         """ Sets/resets the local endpoint dictionary that's used for keeping data about SPARQL endpoint, triples, classes and properties """
@@ -32,12 +51,15 @@ class SPARQLDataExtractor:
         self.__reset_local_endpoint()
         self.save_endpoint = save_endpoint
         self.sparql_queries.set_wrapper(access_url)
+        self.metrics = self.sparql_queries.metrics
+        self.metrics.reset(access_url)
         self.endpoint_data[DB.ACCESS_URL] = access_url
 
         if include_base_queries == True or only_new_custom_queries == False:
             inactive_endpoint = self.__test_connection()
 
             if inactive_endpoint != None:
+                self.__save_metrics()
                 return inactive_endpoint
 
         if include_base_queries == True:
@@ -46,54 +68,76 @@ class SPARQLDataExtractor:
         if queries_directory:
             self.__call_custom_queries(only_new_custom_queries, queries_directory)
 
+        self.__save_metrics()
+
         return self.endpoint_data
+
+    def __save_metrics(self) -> None:
+        """ Stores the timings of the harvest unless the endpoint is only analyzed for a dump """
+        if self.save_endpoint == True:
+            self.db.save_query_metrics(self.metrics.get_document())
     
     def __test_connection(self) -> Any:
         try:
-            print('Testing connection...')
+            self.__print('Testing connection...')
+            self.metrics.start_phase('connection')
             self.sparql_queries.test_connection()
         except Exception as e:
-            print(e)
+            self.__print(e)
+            self.metrics.end_phase(False)
 
             self.endpoint_data[DB.STATUS] = DB.STATUS_FAIL
             self.endpoint_data[DB.ERROR_MESSAGE] = str(e)
 
             return self.endpoint_data
 
+        self.metrics.end_phase()
         self.endpoint_data[DB.STATUS] = DB.STATUS_OK
 
     def __analyse(self) -> None:
-        print('Getting editor...')
+        self.__print('Getting editor...')
+        self.metrics.start_phase('editor')
         editor_data = self.__get_query_editor()
         self.endpoint_data[DB.QUERY_EDITOR_NAME] = editor_data[DB.QUERY_EDITOR_NAME]
         self.endpoint_data[DB.QUERY_EDITOR_ADDITIONAL_INFORMATION] = editor_data[DB.QUERY_EDITOR_ADDITIONAL_INFORMATION]
+        self.metrics.end_phase(editor_data[DB.QUERY_EDITOR_NAME] != '')
 
-        print('Getting total triples...')
+        self.__print('Getting total triples...')
+        self.metrics.start_phase('triples')
         self.endpoint_data[DB.TRIPLES_AMOUNT] = self.sparql_queries.get_total_triple_amount()
+        self.metrics.end_phase(self.endpoint_data[DB.TRIPLES_AMOUNT] != SPARQLQueries.ERROR_NUMBER)
 
-        print('Getting classes...')
+        self.__print('Getting classes...')
+        self.metrics.start_phase('classes')
         classes_data = self.__get_classes()
         self.endpoint_data[DB.USED_CLASSES] = classes_data[DB.USED_CLASSES]
         self.endpoint_data[DB.CLASSES_AMOUNT] = classes_data[DB.CLASSES_AMOUNT]
+        self.metrics.end_phase(classes_data[DB.CLASSES_AMOUNT] != SPARQLQueries.ERROR_NUMBER)
         
-        print('Getting total instances...')
+        self.__print('Getting total instances...')
+        self.metrics.start_phase('instances')
         self.endpoint_data[DB.INSTANCES_AMOUNT] = self.sparql_queries.get_total_instance_amount()
+        self.metrics.end_phase(self.endpoint_data[DB.INSTANCES_AMOUNT] != SPARQLQueries.ERROR_NUMBER)
 
-        print('Getting properties...')
+        self.__print('Getting properties...')
+        self.metrics.start_phase('properties')
         properties_data = self.__get_properties()
         self.endpoint_data[DB.USED_PROPERTIES] = properties_data[DB.USED_PROPERTIES]
         self.endpoint_data[DB.USED_PROPERTIES_AMOUNT] = properties_data[DB.USED_PROPERTIES_AMOUNT]
+        self.metrics.end_phase(properties_data[DB.USED_PROPERTIES_AMOUNT] != SPARQLQueries.ERROR_NUMBER)
 
         if (self.endpoint_data[DB.TRIPLES_AMOUNT] != SPARQLQueries.ERROR_NUMBER) & (self.endpoint_data[DB.INSTANCES_AMOUNT] != SPARQLQueries.ERROR_NUMBER) & (self.endpoint_data[DB.TRIPLES_AMOUNT] != 10000) & (self.endpoint_data[DB.TRIPLES_AMOUNT] > self.endpoint_data[DB.INSTANCES_AMOUNT]) & (self.endpoint_data[DB.INSTANCES_AMOUNT] != 10000):
             self.endpoint_data[DB.PROPERTIES_AMOUNT] = self.endpoint_data[DB.TRIPLES_AMOUNT] - self.endpoint_data[DB.INSTANCES_AMOUNT]
         else:
             self.endpoint_data[DB.PROPERTIES_AMOUNT] = SPARQLQueries.ERROR_NUMBER
 
-        print('Getting total unique subject amount...')
+        self.__print('Getting total unique subject amount...')
+        self.metrics.start_phase('unique_subjects')
         total_unique_object_amount = self.sparql_queries.get_total_unique_subject_amount()
+        self.metrics.end_phase(total_unique_object_amount != SPARQLQueries.ERROR_NUMBER)
         self.endpoint_data[DB.UNIQUE_SUBJECTS_AMOUNT] = total_unique_object_amount
         self.endpoint_data[DB.AVERAGE_UNIQUE_SUBJECTS_AMOUNT] = -1
-        print(total_unique_object_amount)
+        self.__print(total_unique_object_amount)
 
         if (total_unique_object_amount > 0) & (total_unique_object_amount != 10000) & (total_unique_object_amount != 100000):
             et = int(self.endpoint_data[DB.TRIPLES_AMOUNT])
@@ -107,10 +151,16 @@ class SPARQLDataExtractor:
             DB.QUERY_EDITOR_ADDITIONAL_INFORMATION: ''
         }
 
+        self.metrics.start_query()
+        started = time.perf_counter()
+
         try:
             request = requests.get(self.endpoint_data[DB.ACCESS_URL])
-        except:
+        except Exception as e:
+            self.metrics.add_query('http_get', time.perf_counter() - started, 0, self.metrics.get_status(e), e)
             return editor_data
+
+        self.metrics.add_query('http_get', time.perf_counter() - started, len(request.content), request.status_code)
         
         if request.ok:
             soup = BeautifulSoup(request.content, features='xml')
@@ -195,12 +245,14 @@ class SPARQLDataExtractor:
             queries_directory_name: str
         ) -> None:
         """ Calls custom queries on the endpoint """
-        print('Performing custom queries...')
+        self.__print('Performing custom queries...')
         custom_queries = self.config.get_custom_queries(queries_directory_name)
 
         for query in custom_queries:
             if only_new == True and self.db.endpoint_has_custom_query(self.endpoint_data[DB.ACCESS_URL], query[DB.CUSTOM_QUERY_NAME]):
                 continue
             
+            self.metrics.start_phase(f'custom:{query[DB.CUSTOM_QUERY_NAME]}')
             query_result = self.sparql_queries.get_custom_query_result(query[DB.CUSTOM_QUERY_BODY])
+            self.metrics.end_phase(query_result != SPARQLQueries.ERROR_NUMBER)
             self.endpoint_data[query[DB.CUSTOM_QUERY_NAME]] = query_result
\ No newline at end of file
@@ -1,5 +1,7 @@
+from lodanalysis.query_metrics import QueryMetrics, MeasuredResponse
 from SPARQLWrapper import SPARQLWrapper, JSON
 from typing import Dict, Any
+import time
 
 class SPARQLQueries:
     """ 
@@ -18,6 +20,10 @@ class SPARQLQueries:
 
     DEFAULT_TIMEOUT = '30000'
 
+    def __init__(self):
+        """ Sets up the metrics that record every query made through the wrapper """
+        self.metrics = QueryMetrics()
+
     def set_wrapper(
             self,
             endpoint_name: str
@@ -32,6 +38,29 @@ class SPARQLQueries:
         ) -> None:
         self.wrapper.addExtraURITag('timeout', amount)
 
+    def __query_and_convert(
+            self,
+            variant: str
+        ) -> Any:
+        """ Runs the set query and records its latency, response size, HTTP status and outcome under the variant name """
+        self.metrics.start_query()
+        started = time.perf_counter()
+        response = None
+
+        try:
+            query_result = self.wrapper.query()
+            response = MeasuredResponse(query_result.response)
+            query_result.response = response
+            result = query_result.convert()
+        except Exception as e:
+            size = response.size if response != None else 0
+            self.metrics.add_query(variant, time.perf_counter() - started, size, self.metrics.get_status(e), e)
+            raise
+
+        self.metrics.add_query(variant, time.perf_counter() - started, response.size, response.getcode())
+
+        return result
+
     def __test_result(self, result: list) -> None:
         if len(result) == 0:
             raise Exception("Empty result")
@@ -42,7 +71,7 @@ class SPARQLQueries:
             SELECT * WHERE {?s ?p ?o} LIMIT 10
             """
         )
-        result = self.wrapper.queryAndConvert()
+        result = self.__query_and_convert('select_limit_10')
 
         try:
             ok = 'results' in result
@@ -60,7 +89,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('count')['results']['bindings']
             self.__test_result(result)
 
             return int(result[0][self.PROPERTY_AMOUNT]['value'])
@@ -76,7 +105,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('select_all')['results']['bindings']
             self.__test_result(result)
 
             return len(result)
@@ -93,7 +122,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('select_limit')['results']['bindings']
             self.__test_result(result)
 
             return len(result)
@@ -110,7 +139,7 @@ class SPARQLQueries:
                 }
                 """)
 
-            return int(self.wrapper.queryAndConvert()['results']['bindings'][0]['instanceAmount']['value'])
+            return int(self.__query_and_convert('count')['results']['bindings'][0]['instanceAmount']['value'])
         except Exception:
             pass
 
@@ -122,7 +151,7 @@ class SPARQLQueries:
                 }
                 """)
 
-            return int(len(list(self.wrapper.queryAndConvert()['results']['bindings'])))
+            return int(len(list(self.__query_and_convert('select_all')['results']['bindings'])))
         except Exception:
             return self.ERROR_NUMBER
 
@@ -136,7 +165,7 @@ class SPARQLQueries:
                 }
                 """)
 
-            return int(self.wrapper.queryAndConvert()['results']['bindings'][0]['subjectsAmount']['value'])
+            return int(self.__query_and_convert('count_distinct')['results']['bindings'][0]['subjectsAmount']['value'])
         except Exception:
             pass
 
@@ -148,7 +177,7 @@ class SPARQLQueries:
                 }
                 """)
 
-            return int(len(list(self.wrapper.queryAndConvert()['results']['bindings'])))
+            return int(len(list(self.__query_and_convert('select_distinct')['results']['bindings'])))
         except Exception:
             return self.ERROR_NUMBER
 
@@ -166,7 +195,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('group_by_count')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -185,7 +214,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('group_by_count_retry')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -203,7 +232,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('distinct_inner_limit')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -221,7 +250,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('distinct_limit')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -242,7 +271,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('group_by_count')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -261,7 +290,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('group_by_count_retry')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -279,7 +308,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('distinct_limit')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -297,7 +326,7 @@ class SPARQLQueries:
                 """
             )
 
-            result = self.wrapper.queryAndConvert()['results']['bindings']
+            result = self.__query_and_convert('distinct_limit_retry')['results']['bindings']
             self.__test_result(result)
 
             return { 'is_valid': True, 'value': result }
@@ -312,7 +341,7 @@ class SPARQLQueries:
         self.wrapper.setQuery(query)
 
         try:
-            return self.wrapper.queryAndConvert()['results']['bindings']
+            return self.__query_and_convert('custom')['results']['bindings']
         except Exception as e:
             print(e)
             return self.ERROR_NUMBER
\ No newline at end of file
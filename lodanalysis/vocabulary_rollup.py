@@ -0,0 +1,86 @@
+from lodanalysis.mongo_db import DB
+from lodanalysis.namespace_trie import NamespaceTrie
+from typing import Any, Dict
+
+class VocabularyRollup:
+    """
+    Class for aggregating the used classes and properties of endpoints by namespace
+    """
+    KINDS = [DB.USED_CLASSES, DB.USED_PROPERTIES]
+
+    NAMESPACE = 'namespace'
+    PREFIX = 'prefix'
+    KIND = 'kind'
+    COVERAGE = 'coverage'
+    INSTANCES = 'instances_amount'
+
+    def __init__(
+            self,
+            trie: NamespaceTrie = None
+        ):
+        """ Sets up empty rollups by domain, None for all domains """
+        self.trie = trie if trie != None else NamespaceTrie()
+        self.rollups: Dict[Any, Dict[tuple, Dict[str, Any]]] = {}
+        self.endpoints_amounts: Dict[Any, int] = {}
+
+    def add(
+            self,
+            endpoint_data: Dict[str, Any]
+        ) -> None:
+        """ Adds the used classes and properties of a decoded endpoint to the rollups of all domains and of its own domains """
+        endpoint_rollups = {}
+
+        for kind in self.KINDS:
+            for instance in endpoint_data.get(kind) or []:
+                name = instance.get(DB.INSTANCE_NAME)
+                if name == None:
+                    continue
+
+                namespace, _ = self.trie.split(name)
+                endpoint_rollup = endpoint_rollups.setdefault((namespace, kind), [0, set()])
+                endpoint_rollup[0] += instance.get(DB.INSTANCE_AMOUNT) or 0
+                endpoint_rollup[1].add(name)
+
+        if len(endpoint_rollups) == 0:
+            return
+
+        for domain in [None] + list(dict.fromkeys(endpoint_data.get(DB.DOMAINS) or [])):
+            self.endpoints_amounts[domain] = self.endpoints_amounts.get(domain, 0) + 1
+
+            for (namespace, kind), (total, names) in endpoint_rollups.items():
+                rollup = self.rollups.setdefault(domain, {}).setdefault((namespace, kind), {
+                    DB.TOTAL: 0,
+                    DB.ENDPOINTS_AMOUNT: 0,
+                    self.INSTANCES: set()
+                })
+                rollup[DB.TOTAL] += total
+                rollup[DB.ENDPOINTS_AMOUNT] += 1
+                rollup[self.INSTANCES].update(names)
+
+    def get_rollup(
+            self,
+            domain: str = None
+        ) -> list:
+        """ Returns the namespaces of the domain (or of all domains) by the amount of endpoints using them """
+        # coverage is the share of the endpoints with used classes or properties
+        endpoints_amount = self.endpoints_amounts.get(domain, 0)
+        rollup = []
+
+        for (namespace, kind), namespace_rollup in self.rollups.get(domain, {}).items():
+            rollup.append({
+                self.NAMESPACE: namespace,
+                self.PREFIX: self.trie.get_prefix(namespace),
+                self.KIND: kind,
+                DB.ENDPOINTS_AMOUNT: namespace_rollup[DB.ENDPOINTS_AMOUNT],
+                self.COVERAGE: namespace_rollup[DB.ENDPOINTS_AMOUNT] / endpoints_amount,
+                DB.TOTAL: namespace_rollup[DB.TOTAL],
+                self.INSTANCES: len(namespace_rollup[self.INSTANCES])
+            })
+
+        return sorted(rollup, key=lambda row: (row[DB.ENDPOINTS_AMOUNT], row[DB.TOTAL]), reverse=True)
+
+    def get_rollup_by_domain(self) -> Dict[str, list]:
+        """ Returns the rollups of the individual domains in descending order of the domain names """
+        domains = sorted([domain for domain in self.endpoints_amounts if domain != None], reverse=True)
+
+        return {domain: self.get_rollup(domain) for domain in domains}